@@ -1,16 +1,27 @@
 # agents/ppo_agent.py
 
 import os
+import itertools
 import logging
+import time
 import numpy as np
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.vec_env import VecTransposeImage
 from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback, EvalCallback
+from stable_baselines3.common.evaluation import evaluate_policy
 from sb3_contrib import RecurrentPPO
 from sb3_contrib.ppo_recurrent import CnnLstmPolicy  # Corrected import
 from environments.throne_env import ThroneAndLibertyEnv  # Main environment
+from environments.frame_skip import FrameSkipWrapper
+from environments.batched_synthetic_env import BatchedSyntheticVecEnv
+from environments.trajectory_recorder import TrajectoryRecorder
+from environments.replay_env import ReplayThroneEnv
+from environments.reward_manager import REWARD_COMPONENTS
+from environments.reward_telemetry import summarize_components
 
-def create_wrapped_env(window_title="TL 1.281.22.935", n_envs=1, resized_size=(160, 90)):
+def create_wrapped_env(window_title="TL 1.281.22.935", n_envs=1, resized_size=(160, 90), frame_skip=None, macros_path=None,
+                       control_hz=None, backend="live", record_path=None, replay_path=None, replay_policy="open_loop",
+                       timing=False, step_events_path=None, record_frames="raw"):
     """
     Creates and wraps the ThroneAndLiberty environment consistently.
 
@@ -18,13 +29,57 @@ def create_wrapped_env(window_title="TL 1.281.22.935", n_envs=1, resized_size=(1
         window_title (str): Title of the game window to capture.
         n_envs (int): Number of parallel environments.
         resized_size (tuple): Desired size for resized observations.
+        frame_skip (dict, optional): Action class -> (frames, mode) passed to FrameSkipWrapper.
+            Frame skip is disabled if None.
+        macros_path (str, optional): JSON file of macros added as extra discrete actions.
+        control_hz (float, optional): Fixed control rate for each environment's steps.
+        backend (str): "live" for the game window, "synthetic" for the in-process synthetic game, or
+            "batched_synthetic" for a BatchedSyntheticVecEnv stepping all n_envs in NumPy, or "replay"
+            for a ReplayThroneEnv serving the recording at replay_path.
+        record_path (str, optional): Directory each environment's trajectory is recorded to,
+            in an env_<rank> subdirectory. Nothing is recorded if None.
+        record_frames (str): Frames recorded with the trajectory (see TrajectoryRecorder). "raw" frames
+            can be replayed with the "replay" backend.
+        replay_path (str, optional): Recording replayed by the "replay" backend.
+        replay_policy (str): "open_loop" or "nearest_action" (see ReplayThroneEnv).
+        timing (bool): Adds step timing spans to each step's info (see ThroneAndLibertyEnv).
+        step_events_path (str, optional): JSONL file of per-step events. With several environments,
+            each writes to its own file with the rank appended to the name.
 
     Returns:
-        VecTransposeImage: Wrapped vectorized environment.
+        VecEnv: Wrapped vectorized environment with channel-first observations.
     """
+    if backend == "batched_synthetic":
+        if any(option is not None for option in (frame_skip, macros_path, control_hz, record_path, step_events_path)):
+            logging.warning("frame_skip, macros_path, control_hz, record_path and step_events_path are ignored by "
+                            "the batched synthetic backend.")
+        return BatchedSyntheticVecEnv(num_envs=n_envs, resized_size=resized_size)
+
+    ranks = itertools.count()
+
+    def make_env():
+        rank = next(ranks)
+        env_step_events_path = step_events_path
+        if step_events_path is not None and n_envs > 1:
+            root, extension = os.path.splitext(step_events_path)
+            env_step_events_path = f"{root}_{rank}{extension}"
+        # DummyVecEnv copies each observation into its own buffer, so the envs skip their copy
+        if backend == "replay":
+            env = ReplayThroneEnv(replay_path, policy=replay_policy, resized_size=resized_size, macros_path=macros_path,
+                                  control_hz=control_hz, timing=timing, copy_observations=False)
+        else:
+            env = ThroneAndLibertyEnv(window_title=window_title, resized_size=resized_size, macros_path=macros_path,
+                                      control_hz=control_hz, backend=backend, timing=timing,
+                                      step_events_path=env_step_events_path, copy_observations=False)
+        if record_path is not None:
+            env = TrajectoryRecorder(env, os.path.join(record_path, f"env_{rank}"), frames=record_frames)
+        return env
+
     env = make_vec_env(
-        lambda: ThroneAndLibertyEnv(window_title=window_title, resized_size=resized_size),
-        n_envs=n_envs
+        make_env,
+        n_envs=n_envs,
+        wrapper_class=FrameSkipWrapper if frame_skip is not None else None,
+        wrapper_kwargs={"frame_skip": frame_skip} if frame_skip is not None else None
     )
     env = VecTransposeImage(env)
     return env
@@ -54,6 +109,115 @@ class TQDMCallback(BaseCallback):
             self.progress_bar.close()
         logging.info("Training has ended.")
 
+class StepTimingCallback(BaseCallback):
+    """
+    Logs step timing spans and rollout versus update time to TensorBoard.
+
+    The spans of every step in a rollout (info['timings'], see ThroneAndLibertyEnv) are
+    logged as millisecond histograms ('timing/<span>_ms') with p50/p95 scalars.
+    'timing/rollout_s' is the time spent collecting the rollout. 'timing/update_s' is the
+    preceding policy update, measured when the next rollout starts. For environments
+    paced to a control rate, the rollout's StepPacer statistics are logged as
+    'pacing/overrun_rate', 'pacing/max_overrun_ms', 'pacing/mean_jitter_ms' and
+    'pacing/idle_s'.
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.spans = {}
+        self.rollout_start = None
+        self.rollout_end = None
+        self.pacing = True
+
+    def _on_rollout_start(self):
+        now = time.perf_counter()
+        if self.rollout_end is not None:
+            self.logger.record("timing/update_s", now - self.rollout_end)
+        self.rollout_start = now
+
+    def _on_step(self):
+        for info in self.locals.get("infos", ()):
+            for name, duration in info.get("timings", {}).items():
+                self.spans.setdefault(name, []).append(duration)
+        return True
+
+    def _on_rollout_end(self):
+        self.rollout_end = time.perf_counter()
+        self.logger.record("timing/rollout_s", self.rollout_end - self.rollout_start)
+        for name, durations in self.spans.items():
+            milliseconds = np.array(durations) * 1000
+            self.logger.record(f"timing/{name}_ms", milliseconds, exclude=("stdout", "log", "json", "csv"))
+            p50, p95 = np.percentile(milliseconds, (50, 95))
+            self.logger.record(f"timing/{name}_p50_ms", p50)
+            self.logger.record(f"timing/{name}_p95_ms", p95)
+        self.spans = {}
+        self._record_pacing()
+
+    def _record_pacing(self):
+        if not self.pacing:
+            return
+        try:
+            stats = [entry for entry in self.training_env.env_method("get_pacing_stats", reset=True) if entry]
+        except AttributeError:
+            self.pacing = False  # Not a ThroneAndLibertyEnv, e.g. the batched synthetic backend
+            return
+        ticks = sum(entry["ticks"] for entry in stats)
+        if not ticks:
+            return
+        overruns = sum(entry["overruns"] for entry in stats)
+        on_time = ticks - overruns
+        jitter_sum = sum(entry["mean_jitter_ms"] * (entry["ticks"] - entry["overruns"]) for entry in stats)
+        self.logger.record("pacing/overrun_rate", overruns / ticks)
+        self.logger.record("pacing/max_overrun_ms", max(entry["max_overrun_ms"] for entry in stats))
+        self.logger.record("pacing/mean_jitter_ms", jitter_sum / on_time if on_time else 0.0)
+        self.logger.record("pacing/idle_s", sum(entry["idle_time"] for entry in stats))
+
+class RewardTelemetryCallback(BaseCallback):
+    """
+    Logs per-rollout reward component statistics to TensorBoard.
+
+    At the end of each rollout, the reward telemetry ring buffers of the training
+    environments (see RewardTelemetry) are drained, pooled and reduced into
+    'reward/<component>_mean', '_var' and '_rate' scalars, where rate is the fraction
+    of steps in which the component was non-zero. The buffers are sized at the start
+    of training to hold a whole rollout, n_steps decisions of up to `max_frames` frames
+    each with frame skip.
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.enabled = True
+
+    def _disable(self):
+        logging.warning("The training environment has no reward telemetry; reward components are not logged.")
+        self.enabled = False
+
+    def _on_training_start(self):
+        try:
+            frames = max(self.training_env.get_attr("max_frames"))
+        except AttributeError:
+            frames = 1  # No frame skip
+        try:
+            self.training_env.env_method("reserve_reward_telemetry", self.model.n_steps * frames)
+        except AttributeError:
+            self._disable()
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        if not self.enabled:
+            return
+        try:
+            windows = self.training_env.env_method("drain_reward_components")
+        except AttributeError:
+            self._disable()
+            return
+        summary = summarize_components(np.concatenate(windows, axis=1), REWARD_COMPONENTS)
+        for name, stats in summary.items():
+            for statistic, value in stats.items():
+                self.logger.record(f"reward/{name}_{statistic}", value)
+
 def preprocess_observation(observation):
     """
     Preprocess observation by normalizing the image.
@@ -111,13 +275,44 @@ def load_model_if_exists(model_path, env):
     logging.info("Initialized a new Recurrent PPO model.")
     return model
 
-def train_ppo(total_timesteps=5000, model_path="data/models/ppo_throne_liberty"):
+def evaluate_on_recording(model, replay_path, n_eval_episodes=None, replay_policy="open_loop", deterministic=True):
+    """
+    Evaluates a model on a recorded session instead of the game.
+
+    Args:
+        model (RecurrentPPO): Model to evaluate.
+        replay_path (str): Directory of a recording made with TrajectoryRecorder(frames="raw").
+        n_eval_episodes (int, optional): Episodes to evaluate. Defaults to every recorded episode.
+        replay_policy (str): "open_loop" or "nearest_action" (see ReplayThroneEnv).
+        deterministic (bool): Whether to use deterministic actions.
+
+    Returns:
+        tuple: (mean reward, standard deviation of the reward).
+    """
+    eval_env = create_wrapped_env(backend="replay", replay_path=replay_path, replay_policy=replay_policy)
+    try:
+        if n_eval_episodes is None:
+            n_eval_episodes = len(eval_env.get_attr("episodes")[0])
+        return evaluate_policy(model, eval_env, n_eval_episodes=n_eval_episodes, deterministic=deterministic)
+    finally:
+        eval_env.close()
+
+def train_ppo(total_timesteps=5000, model_path="data/models/ppo_throne_liberty", backend="live", eval_replay_path=None,
+              step_timing=True, step_events_path=None, reward_telemetry=True, save=True):
     """
     Trains the PPO agent.
 
     Args:
         total_timesteps (int): Number of timesteps to train.
         model_path (str): Path to save the trained model.
+        backend (str): "live" to train on the game, or "synthetic" / "batched_synthetic" to train headless.
+        eval_replay_path (str, optional): Recording to evaluate on instead of an environment like the
+            training one.
+        step_timing (bool): Times each environment step and logs the spans with StepTimingCallback.
+        step_events_path (str, optional): JSONL file of the training environment's step events.
+        reward_telemetry (bool): Logs per-rollout reward component statistics with RewardTelemetryCallback.
+        save (bool): Saves the model, checkpoints and the best evaluated model. If False, the model at
+            model_path is only loaded, e.g. for a profiling run, and no evaluation is made.
 
     Returns:
         RecurrentPPO: Trained model.
@@ -126,53 +321,69 @@ def train_ppo(total_timesteps=5000, model_path="data/models/ppo_throne_liberty")
 
     # Initialize the training environment
     logging.info("Initializing Training Environment...")
-    env = create_wrapped_env()
+    env = create_wrapped_env(backend=backend, timing=step_timing, step_events_path=step_events_path)
+    eval_env = None
 
-    # Load or initialize model
-    model = load_model_if_exists(model_path, env)
+    try:
+        # Load or initialize model
+        model = load_model_if_exists(model_path, env)
 
-    # Initialize the evaluation environment with the same wrappers
-    logging.info("Initializing Evaluation Environment...")
-    eval_env = create_wrapped_env()
+        # Define callbacks
+        callbacks = [TQDMCallback(total_timesteps)]
+        if save:
+            # Initialize the evaluation environment with the same wrappers
+            logging.info("Initializing Evaluation Environment...")
+            if eval_replay_path is not None:
+                eval_env = create_wrapped_env(backend="replay", replay_path=eval_replay_path)
+            else:
+                eval_env = create_wrapped_env(backend=backend)
 
-    # Define callbacks
-    training_callback = TQDMCallback(total_timesteps)
-    checkpoint_callback = CheckpointCallback(
-        save_freq=1000,
-        save_path=os.path.dirname(model_path),
-        name_prefix="ppo_checkpoint"
-    )
-    eval_callback = EvalCallback(
-        eval_env=eval_env,
-        best_model_save_path=os.path.join(os.path.dirname(model_path), 'best_model'),
-        log_path=os.path.join(os.path.dirname(model_path), 'logs'),
-        eval_freq=5000,
-        deterministic=True,
-        render=False
-    )
-    callbacks = [training_callback, checkpoint_callback, eval_callback]
+            checkpoint_callback = CheckpointCallback(
+                save_freq=1000,
+                save_path=os.path.dirname(model_path),
+                name_prefix="ppo_checkpoint"
+            )
+            eval_callback = EvalCallback(
+                eval_env=eval_env,
+                best_model_save_path=os.path.join(os.path.dirname(model_path), 'best_model'),
+                log_path=os.path.join(os.path.dirname(model_path), 'logs'),
+                eval_freq=5000,
+                deterministic=True,
+                render=False
+            )
+            callbacks += [checkpoint_callback, eval_callback]
+        if step_timing:
+            callbacks.append(StepTimingCallback())
+        if reward_telemetry:
+            callbacks.append(RewardTelemetryCallback())
 
-    try:
-        logging.info(f"Training for {total_timesteps} timesteps...")
-        print("Before model.learn()")  # Debug print
-        model.learn(total_timesteps=total_timesteps, callback=callbacks)
-        print("After model.learn()")  # Debug print
-        logging.info("Training completed successfully.")
-        model.save(model_path)
-        logging.info(f"Model saved at {model_path}.zip")
-    except Exception as e:
-        logging.error(f"An error occurred during training: {e}")
-        return model
+        try:
+            logging.info(f"Training for {total_timesteps} timesteps...")
+            print("Before model.learn()")  # Debug print
+            model.learn(total_timesteps=total_timesteps, callback=callbacks)
+            print("After model.learn()")  # Debug print
+            logging.info("Training completed successfully.")
+            if save:
+                model.save(model_path)
+                logging.info(f"Model saved at {model_path}.zip")
+        except Exception as e:
+            logging.error(f"An error occurred during training: {e}")
+    finally:
+        # Stops the envs' background threads; main.py calls train_ppo once per training iteration
+        env.close()
+        if eval_env is not None:
+            eval_env.close()
 
     return model
 
-def test_ppo(model_path, num_episodes=5):
+def test_ppo(model_path, num_episodes=5, backend="live"):
     """
     Tests the trained PPO agent.
 
     Args:
         model_path (str): Path to the trained model.
         num_episodes (int): Number of episodes to test.
+        backend (str): "live", "synthetic" or "batched_synthetic" (see create_wrapped_env).
 
     Returns:
         None
@@ -181,7 +392,7 @@ def test_ppo(model_path, num_episodes=5):
 
     # Initialize the testing environment
     logging.info("Initializing Testing Environment...")
-    test_env = create_wrapped_env()
+    test_env = create_wrapped_env(backend=backend)
 
     try:
         # Load the trained model
@@ -189,27 +400,31 @@ def test_ppo(model_path, num_episodes=5):
         logging.info(f"Loaded model from {model_path}")
     except Exception as e:
         logging.error(f"Error loading model: {e}")
+        test_env.close()
         return
 
-    for episode in range(1, num_episodes + 1):
-        state, info = test_env.reset()
-        total_reward = 0
-        terminated = False
-        truncated = False
-        step = 0
-        hidden_states = None  # Initialize hidden states for RNN
-        try:
-            while not (terminated or truncated) and step < 1000:
-                processed_state = preprocess_observation(state)
-                # Expand dimensions to match the expected input shape (batch_size, height, width, channels)
-                processed_state = np.expand_dims(processed_state, axis=0)
-                action, hidden_states = model.predict(processed_state, state=hidden_states, deterministic=True)
-                state, reward, terminated, truncated, info = test_env.step(action)
-                total_reward += reward
-                step += 1
-            logging.info(f"Episode {episode} finished with total reward: {total_reward}")
-        except Exception as e:
-            logging.error(f"Error during testing: {e}")
-            break
+    try:
+        for episode in range(1, num_episodes + 1):
+            state, info = test_env.reset()
+            total_reward = 0
+            terminated = False
+            truncated = False
+            step = 0
+            hidden_states = None  # Initialize hidden states for RNN
+            try:
+                while not (terminated or truncated) and step < 1000:
+                    processed_state = preprocess_observation(state)
+                    # Expand dimensions to match the expected input shape (batch_size, height, width, channels)
+                    processed_state = np.expand_dims(processed_state, axis=0)
+                    action, hidden_states = model.predict(processed_state, state=hidden_states, deterministic=True)
+                    state, reward, terminated, truncated, info = test_env.step(action)
+                    total_reward += reward
+                    step += 1
+                logging.info(f"Episode {episode} finished with total reward: {total_reward}")
+            except Exception as e:
+                logging.error(f"Error during testing: {e}")
+                break
+    finally:
+        test_env.close()
 
     logging.info("Testing Complete.")
@@ -0,0 +1,292 @@
+# benchmarks/step_latency.py
+
+import argparse
+import itertools
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from environments.throne_env import ThroneAndLibertyEnv
+from environments.replay_env import ReplayThroneEnv
+from environments.synthetic_game import SyntheticGame, SyntheticCapture, SyntheticInput
+from utilities.action_registry import ACTION_REGISTRY
+
+DEFAULT_RESOLUTIONS = ((1280, 720), (1920, 1080), (2560, 1440))
+DEFAULT_OBSERVATION_SIZES = ((160, 90), (320, 180))
+STAGES = ("perform_action", "capture", "process_hud", "build_observation", "calculate_reward", "step")
+PERCENTILES = (50, 95, 99)
+
+# Actions cycled through by the benchmark: targeting, combat, movement and camera
+BENCHMARK_ACTIONS = ("find_target", "attack", "use_skill_1", "move_forward", "camera_left", "attack", "use_skill_2",
+                     "move_right")
+
+
+def make_env(resolution=None, resized_size=(160, 90), replay_path=None, seed=0):
+    """
+    Creates a headless environment to benchmark.
+
+    Args:
+        resolution (tuple, optional): (width, height) of synthetic frames. Ignored for replays.
+        resized_size (tuple): Observation size.
+        replay_path (str, optional): Recording made with TrajectoryRecorder(frames="raw") to replay
+            instead of synthetic frames.
+        seed (int): Seed of the synthetic game.
+
+    Returns:
+        ThroneAndLibertyEnv: Environment with synthetic or replayed frames.
+    """
+    if replay_path is not None:
+        return ReplayThroneEnv(replay_path, resized_size=resized_size)
+    game = SyntheticGame(seed=seed)
+    return ThroneAndLibertyEnv(resized_size=resized_size, capture_backend=SyntheticCapture(game, resolution=resolution),
+                               input_backend=SyntheticInput(game))
+
+
+def _stage_calls(env):
+    """
+    Returns stage name -> (prepare, run). prepare() is untimed and returns run()'s argument,
+    so every call sees a fresh frame or state as in a real step.
+    """
+    hud_manager = env.hud_manager
+    actions = itertools.cycle([ACTION_REGISTRY.index(name) for name in BENCHMARK_ACTIONS])
+    return {
+        "perform_action": (lambda: next(actions), env.input_dispatcher.dispatch),
+        "capture": (lambda: None, lambda _: hud_manager.capture_frame()),
+        "process_hud": (hud_manager.capture_frame, lambda screen: hud_manager.process_hud(screen=screen)),
+        "build_observation": (hud_manager.capture_frame, hud_manager.build_observation),
+        "calculate_reward": (env._get_state, env.reward_manager.calculate_reward),
+        "step": (lambda: next(actions), env.step),
+    }
+
+
+def summarize(durations):
+    """
+    Summarizes per-call durations.
+
+    Args:
+        durations (np.ndarray): Durations in seconds.
+
+    Returns:
+        dict: Mean, max and percentile latencies in milliseconds, and calls per second.
+    """
+    milliseconds = durations * 1000
+    summary = {f"p{percentile}_ms": float(value)
+               for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES))}
+    summary["mean_ms"] = float(milliseconds.mean())
+    summary["max_ms"] = float(milliseconds.max())
+    summary["per_second"] = float(len(durations) / durations.sum()) if durations.sum() > 0 else 0.0
+    return summary
+
+
+def measure_stage(prepare, run, iterations=200, warmup=20, measure_allocations=True):
+    """
+    Times a stage and measures its allocations.
+
+    Args:
+        prepare (callable): Untimed call returning the argument of run().
+        run (callable): Timed call.
+        iterations (int): Timed calls.
+        warmup (int): Untimed calls made first.
+        measure_allocations (bool): Whether to make a second, traced pass for allocations.
+
+    Returns:
+        dict: Latency summary (see summarize()) plus, with allocations, the median bytes
+            allocated at peak within a call ('alloc_peak_bytes') and the Python memory
+            blocks still allocated after a call ('retained_blocks_per_call').
+    """
+    for _ in range(warmup):
+        run(prepare())
+
+    durations = np.empty(iterations)
+    for i in range(iterations):
+        argument = prepare()
+        start = time.perf_counter()
+        run(argument)
+        durations[i] = time.perf_counter() - start
+    result = summarize(durations)
+
+    if measure_allocations:
+        peaks = np.empty(iterations)
+        tracemalloc.start()
+        try:
+            blocks = 0
+            for i in range(iterations):
+                argument = prepare()
+                before = sys.getallocatedblocks()
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                run(argument)
+                _, peak = tracemalloc.get_traced_memory()
+                blocks += sys.getallocatedblocks() - before
+                peaks[i] = peak - current
+        finally:
+            tracemalloc.stop()
+        result["alloc_peak_bytes"] = float(np.median(peaks))
+        result["retained_blocks_per_call"] = blocks / iterations
+    return result
+
+
+def benchmark_env(env, iterations=200, warmup=20, stages=STAGES, measure_allocations=True):
+    """
+    Benchmarks each stage of an environment step and the full step.
+
+    Args:
+        env (ThroneAndLibertyEnv): Environment to benchmark. It is reset first.
+        iterations (int): Timed calls per stage.
+        warmup (int): Untimed calls per stage.
+        stages (sequence): Stages to run, from STAGES.
+        measure_allocations (bool): Whether to measure allocations.
+
+    Returns:
+        dict: Stage name -> measure_stage() result.
+    """
+    env.reset()
+    calls = _stage_calls(env)
+    results = {}
+    for stage in stages:
+        prepare, run = calls[stage]
+        results[stage] = measure_stage(prepare, run, iterations=iterations, warmup=warmup,
+                                       measure_allocations=measure_allocations)
+        env.reset()  # Start every stage from the same game state
+    return results
+
+
+def run_benchmarks(resolutions=DEFAULT_RESOLUTIONS, observation_sizes=DEFAULT_OBSERVATION_SIZES, replay_path=None,
+                   iterations=200, warmup=20, stages=STAGES, measure_allocations=True):
+    """
+    Benchmarks every combination of window resolution and observation size.
+
+    Args:
+        resolutions (sequence): Synthetic window resolutions. A replay has its recorded resolution.
+        observation_sizes (sequence): Observation sizes.
+        replay_path (str, optional): Recording to replay instead of synthetic frames.
+        iterations (int): Timed calls per stage.
+        warmup (int): Untimed calls per stage.
+        stages (sequence): Stages to run, from STAGES.
+        measure_allocations (bool): Whether to measure allocations.
+
+    Returns:
+        dict: Machine-readable results with environment metadata and one entry per configuration.
+    """
+    if replay_path is not None:
+        resolutions = (None,)
+    results = []
+    for resolution, resized_size in itertools.product(resolutions, observation_sizes):
+        env = make_env(resolution=resolution, resized_size=resized_size, replay_path=replay_path)
+        try:
+            stage_results = benchmark_env(env, iterations=iterations, warmup=warmup, stages=stages,
+                                          measure_allocations=measure_allocations)
+        finally:
+            env.close()
+        results.append({
+            "source": "replay" if replay_path is not None else "synthetic",
+            "resolution": list(env.hud_manager.original_size),
+            "observation_size": list(resized_size),
+            "stages": stage_results,
+        })
+        logging.info(f"Benchmarked {results[-1]['resolution']} -> {resized_size}")
+    return {"metadata": collect_metadata(iterations, warmup), "results": results}
+
+
+def collect_metadata(iterations, warmup):
+    """
+    Returns what is needed to compare results between versions and machines.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": time.time(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "iterations": iterations,
+        "warmup": warmup,
+    }
+
+
+def compare(results, baseline, metric="p50_ms", threshold=1.2):
+    """
+    Lists stages that got slower than a baseline run.
+
+    Args:
+        results (dict): Output of run_benchmarks().
+        baseline (dict): Earlier output of run_benchmarks().
+        metric (str): Latency metric compared.
+        threshold (float): Ratio above which a stage counts as a regression.
+
+    Returns:
+        list: (resolution, observation size, stage, baseline value, new value) of each regression.
+    """
+    def key(entry):
+        return entry["source"], tuple(entry["resolution"]), tuple(entry["observation_size"])
+
+    baseline_entries = {key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results["results"]:
+        previous = baseline_entries.get(key(entry))
+        if previous is None:
+            continue
+        for stage, stage_result in entry["stages"].items():
+            old = previous["stages"].get(stage, {}).get(metric)
+            new = stage_result[metric]
+            if old and new > old * threshold:
+                regressions.append((entry["resolution"], entry["observation_size"], stage, old, new))
+    return regressions
+
+
+def _parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ThroneAndLibertyEnv step latency per stage.")
+    parser.add_argument("--resolutions", nargs="+", type=_parse_size, default=DEFAULT_RESOLUTIONS,
+                        help="Synthetic window resolutions, e.g. 1920x1080.")
+    parser.add_argument("--observation-sizes", nargs="+", type=_parse_size, default=DEFAULT_OBSERVATION_SIZES,
+                        help="Observation sizes, e.g. 160x90.")
+    parser.add_argument("--replay", help="Benchmark on a raw-frame recording instead of synthetic frames.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--no-allocations", action="store_true", help="Skip the traced allocation pass.")
+    parser.add_argument("--output", help="JSON file to write the results to. Printed if not set.")
+    parser.add_argument("--baseline", help="Earlier results to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p50 slowdown ratio reported as a regression.")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking.")
+    args = parser.parse_args(argv)
+
+    # Replace the INFO handlers configured on import by the utilities modules
+    logging.basicConfig(level=args.log_level, format="%(asctime)s - %(levelname)s - %(message)s", force=True)
+    results = run_benchmarks(resolutions=args.resolutions, observation_sizes=args.observation_sizes,
+                             replay_path=args.replay, iterations=args.iterations, warmup=args.warmup,
+                             stages=args.stages, measure_allocations=not args.no_allocations)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), threshold=args.threshold)
+        for resolution, observation_size, stage, old, new in regressions:
+            print(f"Regression: {stage} at {resolution} -> {observation_size}: p50 {old:.3f} ms -> {new:.3f} ms",
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+# environments/batched_synthetic_env.py
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from environments.hud_layout import REFERENCE_RESOLUTION
+from environments.synthetic_game import DEFAULT_ACTION_DAMAGE, DEFAULT_BAR_REGIONS
+from utilities.action_registry import ACTION_REGISTRY
+
+# Per-action state changes, by action name
+MOVE_DELTAS = {"move_forward": (0, 1), "move_backward": (0, -1), "move_left": (-1, 0), "move_right": (1, 0)}
+YAW_DELTAS = {"camera_left": -8, "camera_right": 8}
+PITCH_DELTAS = {"camera_up": 4, "camera_down": -4}
+
+# BGR observation colours
+BAR_FILL_BGR = (40, 40, 200)
+BAR_EMPTY_BGR = (30, 30, 30)
+TARGET_BGR = (30, 30, 160)
+
+
+class BatchedSyntheticVecEnv(VecEnv):
+    """
+    SyntheticGame dynamics for N agents stepped together with NumPy.
+
+    Implements the SB3 VecEnv interface directly, so no per-env Python objects or
+    VecTransposeImage are involved. Observations are rendered straight at the
+    observation size into channel-first (N, 3, height, width) uint8 buffers.
+    Rewards mirror the components RewardManager produces for ThroneAndLibertyEnv
+    (survival, low health, death, combat, kill, missed target and the first-step
+    exploration bonus), clipped the same way.
+
+    Two observation buffers are alternated: the array returned by step_wait() or
+    reset() is overwritten two calls later. SB3's rollout collection copies each
+    observation before then.
+
+    get_attr() and set_attr() index the per-agent state arrays listed in
+    PER_ENV_ATTRIBUTES by env; other attributes and env_method() act on the whole
+    batch, so they only accept all envs as indices.
+    """
+
+    # Game and reward state with one row per agent
+    PER_ENV_ATTRIBUTES = ("player_health", "target_health", "previous_target_health", "target_position", "position",
+                          "yaw", "pitch", "cooldowns", "tick_count", "episode_steps", "episode_returns",
+                          "target_acquired", "target_killed", "actions")
+
+    def __init__(self, num_envs=8, resized_size=(160, 90), registry=ACTION_REGISTRY, action_damage=None,
+                 skill_cooldown=5, target_damage=0.01, regeneration=0.005, step_seconds=0.1,
+                 max_episode_steps=1000, seed=None):
+        """
+        Initializes the BatchedSyntheticVecEnv.
+
+        Args:
+            num_envs (int): Number of agents.
+            resized_size (tuple): (width, height) of the observations.
+            registry (ActionRegistry): Registry defining the discrete actions.
+            action_damage (dict, optional): Action name -> target damage. Defaults to DEFAULT_ACTION_DAMAGE.
+            skill_cooldown (int): Steps before a skill can damage the target again.
+            target_damage (float): Player health lost per step while a target is alive.
+            regeneration (float): Player health regained per step without a target.
+            step_seconds (float): Game time of one step, used for the kill reward.
+            max_episode_steps (int, optional): Steps after which an episode is truncated.
+            seed (int, optional): Seed for target spawn positions.
+        """
+        width, height = resized_size
+        self.render_mode = None
+        observation_space = spaces.Box(low=0, high=255, shape=(3, height, width), dtype=np.uint8)
+        super().__init__(num_envs, observation_space, spaces.Discrete(len(registry)))
+        self.resized_size = resized_size
+        self.skill_cooldown = skill_cooldown
+        self.target_damage = target_damage
+        self.regeneration = regeneration
+        self.step_seconds = step_seconds
+        self.max_episode_steps = max_episode_steps
+        self.rng = np.random.default_rng(seed)
+
+        # Compile the action effects into per-action tables
+        n_actions = len(registry)
+        action_damage = DEFAULT_ACTION_DAMAGE if action_damage is None else action_damage
+        self.move_table = np.zeros((n_actions, 2), dtype=np.int64)
+        self.yaw_table = np.zeros(n_actions, dtype=np.int64)
+        self.pitch_table = np.zeros(n_actions, dtype=np.int64)
+        self.damage_table = np.zeros(n_actions, dtype=np.float64)
+        self.cooldown_table = np.zeros(n_actions, dtype=bool)
+        self.find_target_table = np.zeros(n_actions, dtype=bool)
+        for action in registry.actions:
+            self.move_table[action.index] = MOVE_DELTAS.get(action.name, (0, 0))
+            self.yaw_table[action.index] = YAW_DELTAS.get(action.name, 0)
+            self.pitch_table[action.index] = PITCH_DELTAS.get(action.name, 0)
+            self.damage_table[action.index] = action_damage.get(action.name, 0.0)
+            self.cooldown_table[action.index] = action.group == "skill" and action.name in action_damage
+            self.find_target_table[action.index] = action.name == "find_target"
+
+        # Game and reward state
+        self.player_health = np.ones(num_envs)
+        self.target_health = np.zeros(num_envs)
+        self.previous_target_health = np.zeros(num_envs)
+        self.target_position = np.zeros(num_envs, dtype=np.int64)
+        self.position = np.zeros((num_envs, 2), dtype=np.int64)
+        self.yaw = np.zeros(num_envs, dtype=np.int64)
+        self.pitch = np.zeros(num_envs, dtype=np.int64)
+        self.cooldowns = np.zeros((num_envs, n_actions), dtype=np.int64)
+        self.tick_count = np.zeros(num_envs, dtype=np.int64)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.episode_returns = np.zeros(num_envs)
+        self.target_acquired = np.zeros(num_envs, dtype=bool)
+        self.target_killed = np.zeros(num_envs, dtype=bool)
+        self.actions = np.zeros(num_envs, dtype=np.int64)
+
+        # Static background and scene band, rendered at observation size
+        texture_rng = np.random.default_rng(0)
+        coarse = texture_rng.integers(20, 90, (height // 4 + 1, width // 4 + 1), dtype=np.uint8)
+        texture = np.repeat(np.repeat(coarse, 4, axis=0), 4, axis=1)[:height, :width]
+        self.background = np.ascontiguousarray(np.broadcast_to(texture, (3, height, width)))
+        self.scene_rows = slice(height // 3, 2 * height // 3)
+        self.scene_texture = self.background[:, self.scene_rows]
+        self.columns = np.arange(width)
+
+        # Bar regions scaled to the observation size
+        scale_x = width / REFERENCE_RESOLUTION[0]
+        scale_y = height / REFERENCE_RESOLUTION[1]
+        self.bar_regions = {
+            name: (
+                int(round(region["start"][0] * scale_x)),
+                int(round(region["start"][1] * scale_y)),
+                max(int(round(region["width"] * scale_x)), 1),
+                max(int(round(region["height"] * scale_y)), 1),
+            )
+            for name, region in DEFAULT_BAR_REGIONS.items()
+        }
+        self.target_half_width = max(int(round(20 * scale_x)), 1)
+
+        self.buffers = [np.empty((num_envs, 3, height, width), dtype=np.uint8) for _ in range(2)]
+        for buffer in self.buffers:
+            buffer[:] = self.background
+        self._buffer_index = 0
+
+    def _reset_envs(self, mask):
+        self.player_health[mask] = 1.0
+        self.target_health[mask] = 0.0
+        self.previous_target_health[mask] = 0.0
+        self.target_position[mask] = 0
+        self.position[mask] = 0
+        self.yaw[mask] = 0
+        self.pitch[mask] = 0
+        self.cooldowns[mask] = 0
+        self.tick_count[mask] = 0
+        self.episode_steps[mask] = 0
+        self.episode_returns[mask] = 0.0
+        self.target_acquired[mask] = False
+        self.target_killed[mask] = False
+
+    def _render(self, envs=None):
+        """
+        Renders observations.
+
+        Args:
+            envs (np.ndarray, optional): Indices of the agents to redraw in the current buffer.
+                If None, every agent is drawn into the other buffer, which is returned.
+
+        Returns:
+            np.ndarray: The buffer drawn into.
+        """
+        if envs is None:
+            self._buffer_index ^= 1
+            envs = slice(None)
+        obs = self.buffers[self._buffer_index]
+        rows = obs[envs]  # View for all agents, copy for an index array
+        width = self.resized_size[0]
+        yaw, position, pitch = self.yaw[envs], self.position[envs], self.pitch[envs]
+        target_health, target_position = self.target_health[envs], self.target_position[envs]
+
+        # Scene band scrolls with yaw and sideways position, brightness follows forward position and pitch
+        shift = (yaw + position[:, 0] * 4) % width
+        columns = (self.columns[None, :] + shift[:, None]) % width
+        scene = rows[:, :, self.scene_rows]
+        scene[:] = np.moveaxis(np.take(self.scene_texture, columns, axis=2), 2, 0)
+        brightness = ((position[:, 1] * 3 + pitch) % 64).astype(np.uint8)
+        scene[:, 0] += brightness[:, None, None]
+
+        # Target marker in the middle of the scene band
+        has_target = target_health > 0
+        center = (width // 2 + target_position - yaw) % width
+        marker = has_target[:, None] & (np.abs(self.columns[None, :] - center[:, None]) <= self.target_half_width)
+        middle, half_height = scene.shape[2] // 2, max(scene.shape[2] // 8, 1)
+        marker_rows = scene[:, :, middle - half_height:middle + half_height]
+        np.copyto(marker_rows, np.array(TARGET_BGR, dtype=np.uint8)[None, :, None, None], where=marker[:, None, None, :])
+
+        # Health bars
+        for name, health in (("player_health", self.player_health[envs]), ("target_health", target_health)):
+            x, y, bar_width, bar_height = self.bar_regions[name]
+            filled = np.rint(bar_width * np.clip(health, 0.0, 1.0)).astype(np.int64)
+            fill_mask = np.arange(bar_width)[None, :] < filled[:, None]
+            bar = rows[:, :, y:y + bar_height, x:x + bar_width]
+            bar[:] = np.array(BAR_EMPTY_BGR, dtype=np.uint8)[None, :, None, None]
+            np.copyto(bar, np.array(BAR_FILL_BGR, dtype=np.uint8)[None, :, None, None], where=fill_mask[:, None, None, :])
+        if not isinstance(envs, slice):
+            obs[envs] = rows
+        return obs
+
+    def reset(self):
+        """
+        Resets every agent.
+
+        Returns:
+            np.ndarray: Observations of shape (N, 3, height, width).
+        """
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._render()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def _apply_actions(self, actions):
+        # Movement and camera
+        self.position += self.move_table[actions]
+        self.yaw += self.yaw_table[actions]
+        self.pitch = np.clip(self.pitch + self.pitch_table[actions], -40, 40)
+
+        # Target acquisition
+        spawn = self.find_target_table[actions] & (self.target_health <= 0)
+        self.target_health[spawn] = 1.0
+        self.target_position[spawn] = self.rng.integers(-200, 200, size=int(spawn.sum()))
+
+        # Combat, with skills gated by their cooldowns
+        rows = np.arange(self.num_envs)
+        ready = self.cooldowns[rows, actions] <= self.tick_count
+        hits = (self.damage_table[actions] > 0) & (self.target_health > 0) & ready
+        self.target_health[hits] = np.maximum(self.target_health[hits] - self.damage_table[actions][hits], 0.0)
+        cooldown_hits = hits & self.cooldown_table[actions]
+        self.cooldowns[rows[cooldown_hits], actions[cooldown_hits]] = self.tick_count[cooldown_hits] + self.skill_cooldown
+
+    def _tick(self):
+        self.tick_count += 1
+        alive = self.player_health > 0
+        in_combat = alive & (self.target_health > 0)
+        self.player_health[in_combat] = np.maximum(self.player_health[in_combat] - self.target_damage, 0.0)
+        resting = alive & ~in_combat
+        self.player_health[resting] = np.minimum(self.player_health[resting] + self.regeneration, 1.0)
+
+    def _compute_rewards(self):
+        health = self.player_health
+        target = self.target_health
+        rewards = health * 10  # Survival
+        low_health = (health <= 0.3) & (health > 0)
+        rewards -= np.where(low_health, (0.3 - health) * 50, 0.0)
+        rewards += np.where(health == 0, -500.0, 0.0)
+
+        # ThroneAndLibertyEnv marks a visible target as acquired before the reward is computed
+        acquired_now = (target > 0) & ~self.target_killed
+        self.target_acquired |= acquired_now
+
+        # Combat reward from the target health change; the first step has no previous reading
+        has_previous = self.episode_steps > 0
+        difference = self.previous_target_health - target
+        kills = has_previous & (target == 0) & (difference > 0)
+        damage = has_previous & ~kills & (difference > 0)
+        prolonged = has_previous & ~kills & ~damage & (target > 0) & ~self.target_killed
+        self.target_killed |= kills
+        self.target_killed &= ~acquired_now | kills
+        # The acquisition time is refreshed every step while the target is alive
+        rewards += np.where(kills, max(50 - self.step_seconds * 2, 10), 0.0)
+        rewards += np.where(damage, difference * 20, 0.0)
+        rewards -= np.where(prolonged, 10.0, 0.0)
+        self.previous_target_health[:] = target
+
+        rewards -= np.where(self.target_acquired & ~self.target_killed, 20.0, 0.0)  # Missed target
+        rewards += np.where(self.episode_steps == 0, 15.0, 0.0)  # First visit of the start position
+        return np.clip(rewards, -100, 200).astype(np.float32)
+
+    def step_wait(self):
+        """
+        Steps every agent with the actions passed to step_async().
+
+        Returns:
+            tuple: (observations, rewards, dones, infos). Finished agents are reset; their
+                last observation is in info["terminal_observation"].
+        """
+        self._apply_actions(self.actions)
+        self._tick()
+        rewards = self._compute_rewards()
+        self.episode_steps += 1
+        self.episode_returns += rewards
+
+        terminated = self.player_health == 0.0
+        truncated = ~terminated
+        if self.max_episode_steps is not None:
+            truncated &= self.episode_steps >= self.max_episode_steps
+        else:
+            truncated[:] = False
+        dones = terminated | truncated
+
+        obs = self._render()
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for index in np.flatnonzero(dones):
+                infos[index] = {
+                    "terminal_observation": obs[index].copy(),
+                    "TimeLimit.truncated": bool(truncated[index]),
+                    "episode": {"r": float(self.episode_returns[index]), "l": int(self.episode_steps[index])},
+                }
+            # Redraw only the reset agents; the other buffer still holds the previous step's observation
+            done_indices = np.flatnonzero(dones)
+            self._reset_envs(dones)
+            self._render(done_indices)
+        return obs, rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def _batch_indices(self, indices, operation):
+        indices = list(self._get_indices(indices))
+        if sorted(indices) != list(range(self.num_envs)):
+            raise ValueError(f"{operation} acts on the whole batch and cannot be applied to envs {indices}.")
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        """
+        Returns an attribute per env: each env's row of a per-agent state array, or the batch's value.
+        """
+        value = getattr(self, attr_name)
+        if attr_name in self.PER_ENV_ATTRIBUTES:
+            return [value[index] for index in self._get_indices(indices)]
+        return [value] * len(list(self._get_indices(indices)))
+
+    def set_attr(self, attr_name, value, indices=None):
+        """
+        Sets the rows of a per-agent state array, or a batch attribute for all envs.
+        """
+        if attr_name in self.PER_ENV_ATTRIBUTES:
+            getattr(self, attr_name)[list(self._get_indices(indices))] = value
+            return
+        self._batch_indices(indices, f"Setting '{attr_name}'")
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """
+        Calls a method once for the whole batch and returns its result for each env.
+        """
+        indices = self._batch_indices(indices, f"'{method_name}'")
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result] * len(indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
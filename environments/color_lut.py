@@ -0,0 +1,135 @@
+# environments/color_lut.py
+
+import hashlib
+import json
+import logging
+import os
+
+import cv2
+import numpy as np
+
+# Pixel classes
+BACKGROUND = 0
+BAR_FILL = 1
+BAR_EMPTY = 2
+
+# HSV ranges use OpenCV conventions (H: 0-179, S and V: 0-255), bounds inclusive.
+# Classes are applied in order, so later classes win where ranges overlap.
+DEFAULT_COLOR_PROFILE = {
+    "name": "default",
+    "bits": 5,
+    "classes": [
+        ["bar_empty", [[[0, 0, 0], [179, 90, 128]]]],  # Dark, unsaturated bar background
+        ["bar_fill", [
+            [[0, 0, 129], [179, 255, 255]],  # Bright fill
+            [[0, 80, 70], [25, 255, 255]],  # Red/orange low-health fill
+            [[160, 80, 70], [179, 255, 255]],  # Red hue wrap-around
+        ]],
+    ],
+}
+
+CLASS_CODES = {"background": BACKGROUND, "bar_fill": BAR_FILL, "bar_empty": BAR_EMPTY}
+
+
+class ColorLUT:
+    """
+    Quantised BGR lookup table that classifies HUD pixels into bar-fill,
+    bar-empty and background classes with a single indexed gather.
+    """
+
+    def __init__(self, table, bits):
+        """
+        Initializes the ColorLUT.
+
+        Args:
+            table (np.ndarray): Class code for each quantised colour, of length 2 ** (3 * bits).
+            bits (int): Bits kept per colour channel.
+        """
+        self.table = table
+        self.bits = bits
+        self.shift = 8 - bits
+
+    @staticmethod
+    def profile_key(profile):
+        """
+        Returns a stable hash identifying a colour profile.
+        """
+        encoded = json.dumps(profile, sort_keys=True).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    @classmethod
+    def build(cls, profile=DEFAULT_COLOR_PROFILE):
+        """
+        Builds the lookup table for a colour profile.
+
+        Args:
+            profile (dict): Colour profile with 'bits' and ordered HSV 'classes'.
+
+        Returns:
+            ColorLUT: The built lookup table.
+        """
+        bits = profile["bits"]
+        levels = (np.arange(2 ** bits) << (8 - bits)) + (1 << (7 - bits))  # Bin centres
+        b, g, r = np.meshgrid(levels, levels, levels, indexing="ij")
+        bgr = np.stack([b, g, r], axis=-1).reshape(-1, 1, 3).astype(np.uint8)
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV).reshape(-1, 3)
+
+        table = np.full(len(hsv), BACKGROUND, dtype=np.uint8)
+        for class_name, ranges in profile["classes"]:
+            for lower, upper in ranges:
+                mask = np.all((hsv >= lower) & (hsv <= upper), axis=1)
+                table[mask] = CLASS_CODES[class_name]
+        return cls(table, bits)
+
+    @classmethod
+    def load_or_build(cls, profile=DEFAULT_COLOR_PROFILE, cache_dir=None):
+        """
+        Loads the lookup table for a colour profile from disk, building and caching it if needed.
+
+        Args:
+            profile (dict): Colour profile.
+            cache_dir (str or None): Directory holding cached tables. If None, nothing is cached.
+
+        Returns:
+            ColorLUT: The lookup table.
+        """
+        if cache_dir is None:
+            return cls.build(profile)
+
+        path = os.path.join(cache_dir, f"color_lut_{profile.get('name', 'profile')}_{cls.profile_key(profile)}.npy")
+        if os.path.exists(path):
+            try:
+                table = np.load(path)
+                if table.shape == (2 ** (3 * profile["bits"]),):
+                    logging.debug(f"Loaded color LUT from {path}")
+                    return cls(table, profile["bits"])
+            except Exception as e:
+                logging.warning(f"Error loading color LUT from {path}: {e}")
+
+        lut = cls.build(profile)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, lut.table)
+            logging.info(f"Saved color LUT to {path}")
+        except Exception as e:
+            logging.warning(f"Error saving color LUT to {path}: {e}")
+        return lut
+
+    def classify(self, image):
+        """
+        Classifies every pixel of an image.
+
+        Args:
+            image (np.ndarray): Grayscale, BGR or BGRA image.
+
+        Returns:
+            np.ndarray: Class code of each pixel, with the image's height and width.
+        """
+        if image.ndim == 2:
+            level = (image >> self.shift).astype(np.intp)
+            index = (level << (2 * self.bits)) | (level << self.bits) | level
+        else:
+            index = (image[..., 0] >> self.shift).astype(np.intp) << (2 * self.bits)
+            index |= (image[..., 1] >> self.shift).astype(np.intp) << self.bits
+            index |= image[..., 2] >> self.shift
+        return self.table[index]
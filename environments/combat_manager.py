@@ -1,5 +1,6 @@
 import time
 import logging
+from utilities.step_logging import COMBAT_LOG
 
 class CombatManager:
     """
@@ -19,35 +20,45 @@ class CombatManager:
         self.target_acquired_time = None
         self.target_killed = False
 
-    def target_acquired(self):
+    def target_acquired(self, now=None):
         """
         Mark the time a target was acquired.
+
+        Args:
+            now (float, optional): Capture time of the frame the target was seen in. Defaults to time.time().
         """
-        self.target_acquired_time = time.time()
+        self.target_acquired_time = time.time() if now is None else now
         self.target_killed = False
-        logging.info("Target acquired.")
+        COMBAT_LOG.info("Target acquired.")
 
-    def calculate_combat_reward(self, current_health):
+    def calculate_combat_reward(self, current_health, now=None):
         """
         Calculates the combat reward based on target health changes.
+
+        Args:
+            current_health (float): Target health read from the current frame.
+            now (float, optional): Capture time of the current frame. Defaults to time.time().
         """
+        if now is None:
+            now = time.time()
         combat_reward = 0
         kill_reward = 0
 
         if self.previous_target_health is not None:
             health_difference = self.previous_target_health - current_health
 
-            if current_health == 0.0:
+            if current_health == 0.0 and health_difference > 0:
                 self.target_killed = True
-                time_to_kill = time.time() - self.target_acquired_time
+                acquired_time = self.target_acquired_time if self.target_acquired_time is not None else now
+                time_to_kill = now - acquired_time
                 kill_reward = max(50 - time_to_kill * 2, 10)
                 logging.info(f"Target killed in {time_to_kill:.2f} seconds. Kill Reward: {kill_reward}")
             elif health_difference > 0:
                 combat_reward = health_difference * 20
-                logging.debug(f"Damage dealt: {health_difference}. Combat Reward: {combat_reward}")
+                COMBAT_LOG.debug("Damage dealt: %s. Combat Reward: %s", health_difference, combat_reward)
             elif current_health > 0 and not self.target_killed:
                 combat_reward = -10
-                logging.debug("Prolonged engagement without kill. Combat Penalty: -10")
+                COMBAT_LOG.debug("Prolonged engagement without kill. Combat Penalty: -10")
 
         self.previous_target_health = current_health
         return combat_reward, kill_reward
@@ -57,6 +68,6 @@ class CombatManager:
         Apply a penalty if a target is ignored or passed without killing.
         """
         if not self.target_killed and self.target_acquired_time is not None:
-            logging.info("Missed target penalty applied.")
+            COMBAT_LOG.info("Missed target penalty applied.")
             return -20
         return 0
@@ -0,0 +1,89 @@
+# environments/frame_pipeline.py
+
+import logging
+import time
+
+from environments.step_timer import NULL_STEP_TIMER
+from utilities.step_logging import FRAME_LOG
+
+
+class FramePipeline:
+    """
+    Captures one frame per environment step and shares it between HUD parsing
+    and the observation builder.
+    """
+
+    def __init__(self, hud_manager, clock=time.time):
+        """
+        Initializes the FramePipeline.
+
+        Args:
+            hud_manager (HUDManager): Instance used to capture, preprocess and parse frames.
+            clock (callable): Returns the capture time of a frame just grabbed, in seconds. A replay
+                uses the recorded capture times.
+        """
+        self.hud_manager = hud_manager
+        self.clock = clock
+        self.frame_id = 0
+        self.last_frame = None
+
+    def reset(self):
+        """
+        Reset the pipeline's state for a new episode.
+        """
+        self.last_frame = None
+
+    def next_frame(self, after=None, timer=NULL_STEP_TIMER):
+        """
+        Captures a single frame and derives both the observation and the HUD data from it.
+
+        Args:
+            after (float, optional): time.perf_counter() value the frame must be captured after,
+                e.g. the time the last action was sent.
+            timer (StepTimer): Timer marked with the 'capture', 'observation' and 'hud' spans.
+
+        Returns:
+            dict: Frame data containing:
+                - frame_id (int): Monotonic id of the captured frame.
+                - timestamp (float): Time the frame was captured.
+                - screen (np.ndarray): Preprocessed screen observation.
+                - hud_data (dict): HUD data parsed from the same frame.
+                - raw_screen (np.ndarray or None): The native-resolution frame. It may be a reused
+                  capture buffer; copy it if it must outlive the next capture.
+        """
+        raw_screen = self.hud_manager.capture_frame(after=after)
+        timestamp = self.clock()
+        self.frame_id += 1
+        timer.mark("capture")
+
+        # HUD bars are parsed on the native-resolution frame; only the observation is downscaled
+        observation = self.hud_manager.build_observation(raw_screen)
+        timer.mark("observation")
+        hud_data = dict(self.hud_manager.process_hud(screen=raw_screen))
+        timer.mark("hud")
+
+        # Tag the HUD data with the frame it was parsed from
+        hud_data["info"] = dict(hud_data.get("info", {}), frame_id=self.frame_id)
+        FRAME_LOG.debug("Processed frame %d", self.frame_id)
+
+        self.last_frame = {
+            "frame_id": self.frame_id,
+            "timestamp": timestamp,
+            "screen": observation,
+            "hud_data": hud_data,
+            "raw_screen": raw_screen,
+        }
+        return self.last_frame
+
+    @staticmethod
+    def is_consistent(state):
+        """
+        Checks that the HUD data and the observation in a state come from the same frame.
+
+        Args:
+            state (dict): State produced from a frame of this pipeline.
+
+        Returns:
+            bool: True if the HUD data was parsed from the observation's frame.
+        """
+        return state.get("info", {}).get("frame_id") == state.get("frame_id")
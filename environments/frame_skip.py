@@ -0,0 +1,132 @@
+# environments/frame_skip.py
+
+import gymnasium as gym
+import numpy as np
+from utilities.action_registry import ACTION_REGISTRY, IDLE_ACTION
+
+# Action class -> (frames per decision, "hold" or "tap")
+DEFAULT_FRAME_SKIP = {
+    "movement": (4, "hold"),  # Keep moving for the whole decision
+    "camera": (2, "hold"),
+    "combat": (2, "tap"),
+    "skill": (2, "tap"),  # Cast once, then watch the result
+    "utility": (1, "tap"),
+}
+
+
+class FrameSkipWrapper(gym.Wrapper):
+    """
+    Repeats each agent decision for several frames.
+
+    In "hold" mode the action is sent again on every frame, which keeps its keys
+    held with the InputDispatcher. In "tap" mode the action is sent once and the
+    remaining frames are only observed, by stepping with IDLE_ACTION so that
+    wrappers in between (Monitor, TrajectoryRecorder) see every frame. For a MultiDiscrete chord, the decision
+    lasts as long as its longest head and only held heads are re-sent. Rewards
+    are summed over the frames and the last two observations are max-pooled to
+    remove flicker.
+    """
+
+    def __init__(self, env, frame_skip=None, default_skip=(1, "tap"), registry=None):
+        """
+        Initializes the FrameSkipWrapper.
+
+        Args:
+            env (gym.Env): Environment to wrap. Its step() must accept IDLE_ACTION in tap mode.
+            frame_skip (dict, optional): Action class -> (frames, mode). Defaults to DEFAULT_FRAME_SKIP.
+            default_skip (tuple): (frames, mode) for action classes not in frame_skip.
+            registry (ActionRegistry, optional): Registry used to look up each action's class.
+                Defaults to the env's action_registry.
+        """
+        super().__init__(env)
+        frame_skip = DEFAULT_FRAME_SKIP if frame_skip is None else frame_skip
+        for frames, mode in list(frame_skip.values()) + [default_skip]:
+            if frames < 1 or mode not in ("hold", "tap"):
+                raise ValueError(f"Invalid frame skip ({frames}, {mode}).")
+
+        # Compile the per-class setting into a per-action table
+        if registry is None:
+            registry = getattr(env.unwrapped, "action_registry", ACTION_REGISTRY)
+        self.action_skips = [frame_skip.get(action.group, default_skip) for action in registry.actions]
+        self.default_skip = default_skip
+        self.decisions = 0
+        self.frames = 0
+
+    @property
+    def max_frames(self):
+        """
+        Most frames a single decision can last.
+        """
+        return max(frames for frames, _ in self.action_skips + [self.default_skip])
+
+    def _skip_for(self, action):
+        try:
+            return self.action_skips[int(action)]
+        except (IndexError, TypeError, ValueError):
+            return self.default_skip
+
+    def _plan(self, action):
+        """
+        Returns the number of frames for an action and the action re-sent on later frames.
+        """
+        if np.ndim(action) == 0:
+            frames, mode = self._skip_for(action)
+            return frames, action if mode == "hold" else None
+
+        # MultiDiscrete chord: play for the longest head and only re-send held heads
+        action_heads = self.env.unwrapped.action_heads
+        repeat_action = np.array(action, copy=True)
+        frames = 1
+        for head, choice in enumerate(action):
+            index = action_heads.index_of(head, choice)
+            if index is None:
+                continue
+            head_frames, mode = self._skip_for(index)
+            frames = max(frames, head_frames)
+            if mode == "tap":
+                repeat_action[head] = 0
+        return frames, repeat_action if repeat_action.any() else None
+
+    def step(self, action):
+        """
+        Runs one agent decision over several frames.
+
+        Args:
+            action (int or np.ndarray): Action index, or one choice per head for an env in
+                "multi_discrete" mode.
+
+        Returns:
+            tuple: (max-pooled observation, summed reward, terminated, truncated, info). info
+                holds the last frame's info plus 'frames', the number of frames played. Step
+                'timings' are summed over the frames.
+        """
+        frames, repeat_action = self._plan(action)
+        total_reward = 0.0
+        previous_observation = None
+        observation = None
+        terminated = truncated = False
+        info = {}
+        timings = {}
+
+        for frame in range(frames):
+            previous_observation = observation
+            if frame == 0:
+                observation, reward, terminated, truncated, info = self.env.step(action)
+            elif repeat_action is not None:
+                observation, reward, terminated, truncated, info = self.env.step(repeat_action)
+            else:
+                observation, reward, terminated, truncated, info = self.env.step(IDLE_ACTION)
+            total_reward += reward
+            for name, duration in info.get("timings", {}).items():
+                timings[name] = timings.get(name, 0.0) + duration
+            if terminated or truncated:
+                break
+
+        self.decisions += 1
+        self.frames += frame + 1
+        if previous_observation is not None:
+            observation = np.maximum(previous_observation, observation)
+        info = dict(info, frames=frame + 1)
+        if timings:
+            info["timings"] = timings
+        return observation, total_reward, terminated, truncated, info
@@ -0,0 +1,163 @@
+# environments/health_bar_estimator.py
+
+import numpy as np
+
+from environments.color_lut import BAR_FILL
+
+
+class HealthBarEstimator:
+    """
+    Estimates the fill level of horizontal HUD bars from column profiles.
+
+    Each bar is reduced to a 1-D profile: the per-channel mean of every column over
+    the bar's inner rows, keeping the brightest channel so red and orange fills
+    are treated like bright ones. The fill edge is the step position that
+    best separates filled columns on the left from empty columns on the right,
+    which is found for all registered bars at once with a cumulative sum.
+
+    When a ColorLUT is given, the profile is instead the share of bar-fill pixels
+    in each column (scaled to 0-255), so the fill colours are defined by the
+    LUT's colour profile rather than by brightness.
+    """
+
+    def __init__(self, threshold=128, row_margin=0.25, color_lut=None, region_cache=None):
+        """
+        Initializes the HealthBarEstimator.
+
+        Args:
+            threshold (int): Column brightness above which a column counts as filled.
+            row_margin (float): Fraction of rows trimmed from the top and bottom of each bar
+                to ignore borders.
+            color_lut (ColorLUT, optional): Lookup table used to classify bar pixels.
+            region_cache (RegionCache, optional): Cache used to skip bars whose pixels are unchanged.
+        """
+        self.threshold = threshold
+        self.row_margin = row_margin
+        self.color_lut = color_lut
+        self.region_cache = region_cache
+        self.bars = {}
+        self._names = []
+        self._profiles = np.zeros((0, 0), dtype=np.float32)
+        self._widths = np.zeros(0, dtype=np.int64)
+        self._columns = np.zeros(0, dtype=np.int64)
+        self._fills = np.zeros(0)
+        self._dirty = np.zeros(0, dtype=bool)
+        self._fingerprints = []
+
+    def register_bar(self, name, region):
+        """
+        Registers a bar to be estimated by estimate().
+
+        Args:
+            name (str): Name of the bar, e.g. "player_health".
+            region (dict): Absolute bar region with 'start', 'width' and 'height'.
+        """
+        self.bars[name] = dict(region)
+        self._names = list(self.bars)
+        max_width = max(bar["width"] for bar in self.bars.values())
+        self._profiles = np.zeros((len(self._names), max_width), dtype=np.float32)
+        self._widths = np.zeros(len(self._names), dtype=np.int64)
+        self._columns = np.arange(max_width)
+        self._fills = np.zeros(len(self._names))
+        self._dirty = np.ones(len(self._names), dtype=bool)
+        self._fingerprints = [None] * len(self._names)
+
+    def _inner_rows(self, height):
+        margin = int(height * self.row_margin)
+        if height - 2 * margin < 1:
+            return 0, height
+        return margin, height - margin
+
+    def column_profile(self, bar_image, out=None):
+        """
+        Reduces a bar image to its column brightness profile.
+
+        Args:
+            bar_image (np.ndarray): Grayscale, BGR or BGRA bar image.
+            out (np.ndarray, optional): Destination array of length bar width.
+
+        Returns:
+            np.ndarray: Mean brightness of each column.
+        """
+        top, bottom = self._inner_rows(bar_image.shape[0])
+        if self.color_lut is not None:
+            fill_pixels = self.color_lut.classify(bar_image[top:bottom]) == BAR_FILL
+            column_counts = np.add.reduce(fill_pixels, axis=0, dtype=np.float32)
+            return np.multiply(column_counts, 255.0 / (bottom - top), out=out)
+
+        column_sums = np.add.reduce(bar_image[top:bottom], axis=0, dtype=np.float32)
+        if column_sums.ndim == 2:
+            if column_sums.shape[1] >= 3:
+                column_sums = np.maximum(np.maximum(column_sums[:, 0], column_sums[:, 1]), column_sums[:, 2])
+            else:
+                column_sums = column_sums[:, 0]
+        return np.multiply(column_sums, 1.0 / (bottom - top), out=out)
+
+    def fill_fractions(self, profiles, widths):
+        """
+        Finds the fill edge of a batch of column profiles.
+
+        Args:
+            profiles (np.ndarray): Array of shape (n_bars, max_width) with one profile per row.
+            widths (np.ndarray): Valid width of each profile.
+
+        Returns:
+            np.ndarray: Fill fraction [0.0, 1.0] of each bar.
+        """
+        columns = self._columns if len(self._columns) == profiles.shape[1] else np.arange(profiles.shape[1])
+        # +1 for filled columns, -1 for empty or padded ones
+        steps = np.where((profiles > self.threshold) & (columns < widths[:, None]), 1, -1)
+        scores = np.cumsum(steps, axis=1)
+        edges = np.where(scores.max(axis=1) > 0, scores.argmax(axis=1) + 1, 0)
+        return np.divide(edges, widths, out=np.zeros(len(widths)), where=widths > 0)
+
+    def estimate(self, screen):
+        """
+        Estimates the fill level of every registered bar in a frame.
+
+        Args:
+            screen (np.ndarray): Native-resolution frame.
+
+        Returns:
+            dict: Fill fraction [0.0, 1.0] for each registered bar name.
+        """
+        for i, name in enumerate(self._names):
+            bar = self.bars[name]
+            start_x, start_y = bar["start"]
+            crop = screen[start_y:start_y + bar["height"], start_x:start_x + bar["width"]]
+
+            # Reuse the previous reading if the bar's pixels are unchanged
+            if self.region_cache is not None:
+                hit, fill, self._fingerprints[i] = self.region_cache.lookup(name, crop)
+                if hit:
+                    self._fills[i] = fill
+                    self._dirty[i] = False
+                    continue
+            self._dirty[i] = True
+
+            width = crop.shape[1] if crop.shape[0] > 0 else 0
+            self._widths[i] = width
+            if width:
+                self.column_profile(crop, out=self._profiles[i, :width])
+
+        if self._dirty.any():
+            fractions = self.fill_fractions(self._profiles, self._widths)
+            for i in np.flatnonzero(self._dirty):
+                self._fills[i] = fractions[i]
+                if self.region_cache is not None:
+                    self.region_cache.store(self._names[i], self._fingerprints[i], float(fractions[i]))
+        return {name: float(fill) for name, fill in zip(self._names, self._fills)}
+
+    def estimate_bar(self, bar_image):
+        """
+        Estimates the fill level of a single bar image.
+
+        Args:
+            bar_image (np.ndarray): Grayscale, BGR or BGRA bar image.
+
+        Returns:
+            float: Fill fraction [0.0, 1.0].
+        """
+        profile = self.column_profile(bar_image)
+        fractions = self.fill_fractions(profile[None, :], np.array([profile.shape[0]]))
+        return float(fractions[0])
@@ -0,0 +1,305 @@
+# environments/hud_calibration.py
+
+import json
+import logging
+import os
+
+import cv2
+import numpy as np
+
+# Luma weights used to sample grey values straight from BGR(A) pixels
+_GRAY_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def to_gray(image):
+    """
+    Converts a grayscale, BGR or BGRA image to grayscale.
+    """
+    if image.ndim == 2:
+        return image
+    code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(image, code)
+
+
+class HUDCalibrator:
+    """
+    Finds HUD anchors in a reference frame with a multi-scale template search and
+    caches the result per window resolution and UI scale.
+
+    Each template is a grayscale crop of a HUD taken at the reference resolution,
+    with `offset` giving the template's position inside the HUD region. The search
+    runs once over a downsampled pyramid level and is refined at full resolution.
+    Later frames are only checked against a handful of sampled template pixels,
+    taken from the static HUDs only and outside the regions that change during
+    play, such as bar fills.
+    """
+
+    def __init__(self, templates, scales=None, pyramid_levels=2, min_score=0.6,
+                 verify_points=16, verify_tolerance=40, verify_ratio=0.75, cache_dir=None,
+                 static_huds=None, verify_exclude=None):
+        """
+        Initializes the HUDCalibrator.
+
+        Args:
+            templates (dict): HUD name -> {"image": grayscale template, "offset": (dx, dy)}.
+            scales (iterable, optional): UI scales to search. Defaults to 0.5-2.0 in steps of 0.1.
+            pyramid_levels (int): Number of pyrDown levels used for the coarse search.
+            min_score (float): Minimum normalised correlation for a match to be accepted.
+            verify_points (int): Number of template pixels sampled by verify().
+            verify_tolerance (int): Maximum grey-level difference of a matching sample.
+            verify_ratio (float): Share of samples that must match for verify() to pass.
+            cache_dir (str or None): Directory for cached calibrations. If None, nothing is cached.
+            static_huds (iterable, optional): HUDs that are always on screen. Only these must be found
+                by calibrate() and are checked by verify(); the others are placed when visible.
+                Defaults to every template.
+            verify_exclude (dict, optional): HUD name -> regions relative to the HUD at the reference
+                resolution, with 'start', 'width' and 'height', that are never sampled by verify().
+        """
+        self.templates = templates
+        self.scales = np.round(np.arange(0.5, 2.01, 0.1), 2) if scales is None else np.asarray(scales)
+        self.pyramid_levels = pyramid_levels
+        self.min_score = min_score
+        self.verify_points = verify_points
+        self.verify_tolerance = verify_tolerance
+        self.verify_ratio = verify_ratio
+        self.cache_dir = cache_dir
+        self.static_huds = frozenset(templates if static_huds is None else static_huds)
+        self.verify_exclude = verify_exclude or {}
+
+    @classmethod
+    def from_reference_frame(cls, frame, hud_regions, template_height=None, **kwargs):
+        """
+        Builds templates by cropping each HUD region out of a reference-resolution frame.
+
+        Args:
+            frame (np.ndarray): Frame captured at the reference resolution.
+            hud_regions (dict): HUD name -> region with 'start', 'width' and 'height'.
+            template_height (int, optional): Only keep the top rows of each HUD as template.
+
+        Returns:
+            HUDCalibrator: Calibrator using the cropped templates.
+        """
+        gray = to_gray(frame)
+        templates = {}
+        for name, region in hud_regions.items():
+            start_x, start_y = region["start"]
+            height = region["height"] if template_height is None else min(template_height, region["height"])
+            templates[name] = {
+                "image": gray[start_y:start_y + height, start_x:start_x + region["width"]].copy(),
+                "offset": (0, 0),
+            }
+        return cls(templates, **kwargs)
+
+    @classmethod
+    def from_directory(cls, templates_dir, hud_names, **kwargs):
+        """
+        Loads `<hud name>.png` templates from a directory.
+
+        Args:
+            templates_dir (str): Directory containing template images.
+            hud_names (iterable): HUD names to load templates for.
+
+        Returns:
+            HUDCalibrator or None: Calibrator, or None if no templates were found.
+        """
+        templates = {}
+        for name in hud_names:
+            path = os.path.join(templates_dir, f"{name}.png")
+            if os.path.exists(path):
+                image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+                if image is not None:
+                    templates[name] = {"image": image, "offset": (0, 0)}
+        if not templates:
+            return None
+        logging.info(f"Loaded HUD templates for {sorted(templates)} from {templates_dir}")
+        return cls(templates, **kwargs)
+
+    def _match_template(self, gray, template):
+        factor = 2 ** self.pyramid_levels
+        small = gray
+        for _ in range(self.pyramid_levels):
+            small = cv2.pyrDown(small)
+
+        # Coarse search over all scales on the downsampled frame
+        best = None
+        for scale in self.scales:
+            resized = cv2.resize(template, None, fx=scale / factor, fy=scale / factor, interpolation=cv2.INTER_AREA)
+            if min(resized.shape) < 4 or resized.shape[0] > small.shape[0] or resized.shape[1] > small.shape[1]:
+                continue
+            result = cv2.matchTemplate(small, resized, cv2.TM_CCOEFF_NORMED)
+            _, score, _, location = cv2.minMaxLoc(result)
+            if best is None or score > best[0]:
+                best = (score, float(scale), location)
+        if best is None:
+            return None
+
+        # Refine position and score at full resolution around the coarse match
+        _, scale, (coarse_x, coarse_y) = best
+        resized = cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        height, width = resized.shape
+        x0 = max(coarse_x * factor - 2 * factor, 0)
+        y0 = max(coarse_y * factor - 2 * factor, 0)
+        x1 = min(coarse_x * factor + 2 * factor + width, gray.shape[1])
+        y1 = min(coarse_y * factor + 2 * factor + height, gray.shape[0])
+        window = gray[y0:y1, x0:x1]
+        if window.shape[0] < height or window.shape[1] < width:
+            return None
+        result = cv2.matchTemplate(window, resized, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        return {"position": (x0 + x, y0 + y), "scale": scale, "score": float(score), "template": resized}
+
+    def _sample_points(self, name, template, position, scale, offset):
+        height, width = template.shape
+        # Oversample the grid so enough points remain outside the excluded regions
+        grid = 2 * int(np.ceil(np.sqrt(self.verify_points)))
+        xs = np.linspace(0, width - 1, grid + 2)[1:-1].astype(int)
+        ys = np.linspace(0, height - 1, grid + 2)[1:-1].astype(int)
+        excluded = self.verify_exclude.get(name, ())
+        points = []
+        for y in ys:
+            for x in xs:
+                # Template pixel in HUD coordinates at the reference resolution
+                hud_x, hud_y = x / scale + offset[0], y / scale + offset[1]
+                if any(region["start"][0] <= hud_x < region["start"][0] + region["width"]
+                       and region["start"][1] <= hud_y < region["start"][1] + region["height"]
+                       for region in excluded):
+                    continue
+                points.append([int(position[0] + x), int(position[1] + y), int(template[y, x])])
+        if len(points) > self.verify_points:
+            keep = np.linspace(0, len(points) - 1, self.verify_points).astype(int)
+            points = [points[i] for i in keep]
+        return points
+
+    def calibrate(self, frame):
+        """
+        Searches a frame for every HUD template.
+
+        Args:
+            frame (np.ndarray): Native-resolution frame.
+
+        Returns:
+            dict or None: Calibration with 'resolution', 'ui_scale', 'hud_starts', 'scores' and
+                'verify_points', or None if a static HUD could not be found. HUDs that are not
+                static and not on screen keep their scaled default position.
+        """
+        gray = to_gray(frame)
+        hud_starts, scores, verify_points, scales = {}, {}, {}, []
+        for name, template in self.templates.items():
+            match = self._match_template(gray, template["image"])
+            if match is None or match["score"] < self.min_score:
+                if name in self.static_huds:
+                    logging.warning(f"HUD calibration failed to find '{name}'.")
+                    return None
+                logging.info(f"HUD '{name}' is not on screen. Keeping its default position.")
+                continue
+            offset_x, offset_y = template["offset"]
+            x, y = match["position"]
+            hud_starts[name] = (int(round(x - offset_x * match["scale"])), int(round(y - offset_y * match["scale"])))
+            scores[name] = match["score"]
+            if name in self.static_huds:
+                verify_points[name] = self._sample_points(name, match["template"], match["position"],
+                                                          match["scale"], template["offset"])
+            scales.append(match["scale"])
+        if not scales:
+            logging.warning("HUD calibration found no HUD.")
+            return None
+
+        calibration = {
+            "resolution": (frame.shape[1], frame.shape[0]),
+            "ui_scale": float(np.median(scales)),
+            "hud_starts": hud_starts,
+            "scores": scores,
+            "verify_points": verify_points,
+        }
+        logging.info(f"HUD calibrated at UI scale {calibration['ui_scale']:.2f}: {hud_starts}")
+        return calibration
+
+    def verify(self, frame, calibration):
+        """
+        Cheaply checks that the calibrated HUD anchors are still in place.
+
+        Args:
+            frame (np.ndarray): Native-resolution frame.
+            calibration (dict): Calibration returned by calibrate() or load().
+
+        Returns:
+            bool: True if enough sampled pixels match the templates.
+        """
+        points = calibration.get("_verify_array")
+        if points is None:
+            # Calibrations cached before a HUD was declared non-static may still hold its points
+            points = np.array(
+                [point for name, hud_points in calibration["verify_points"].items() if name in self.static_huds
+                 for point in hud_points],
+                dtype=np.int64
+            ).reshape(-1, 3)
+            calibration["_verify_array"] = points
+        if len(points) == 0:
+            return True
+
+        xs, ys, expected = points[:, 0], points[:, 1], points[:, 2]
+        if xs.max() >= frame.shape[1] or ys.max() >= frame.shape[0]:
+            return False
+        samples = frame[ys, xs]
+        if samples.ndim == 2:
+            samples = samples[:, :3].astype(np.float32) @ _GRAY_WEIGHTS
+        matches = np.abs(samples.astype(np.float32) - expected) <= self.verify_tolerance
+        return matches.mean() >= self.verify_ratio
+
+    def _cache_path(self, resolution):
+        return os.path.join(self.cache_dir, f"hud_calibration_{resolution[0]}x{resolution[1]}.json")
+
+    def save(self, calibration):
+        """
+        Persists a calibration, keyed by its resolution and UI scale.
+
+        Args:
+            calibration (dict): Calibration returned by calibrate().
+        """
+        if self.cache_dir is None:
+            return
+        path = self._cache_path(calibration["resolution"])
+        scale_key = f"{calibration['ui_scale']:.2f}"
+        try:
+            entries = {}
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    entries = json.load(f)
+            entries[scale_key] = {key: value for key, value in calibration.items() if not key.startswith("_")}
+            entries["latest"] = scale_key
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(entries, f)
+            logging.info(f"Saved HUD calibration to {path}")
+        except Exception as e:
+            logging.warning(f"Error saving HUD calibration to {path}: {e}")
+
+    def load(self, resolution, ui_scale=None):
+        """
+        Loads a cached calibration.
+
+        Args:
+            resolution (tuple): (width, height) of the game window.
+            ui_scale (float, optional): UI scale to load. Defaults to the latest calibration.
+
+        Returns:
+            dict or None: Cached calibration, or None if there is none.
+        """
+        if self.cache_dir is None:
+            return None
+        path = self._cache_path(resolution)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+            scale_key = entries.get("latest") if ui_scale is None else f"{ui_scale:.2f}"
+            calibration = entries.get(scale_key)
+            if calibration is None:
+                return None
+            calibration["resolution"] = tuple(calibration["resolution"])
+            calibration["hud_starts"] = {name: tuple(start) for name, start in calibration["hud_starts"].items()}
+            return calibration
+        except Exception as e:
+            logging.warning(f"Error loading HUD calibration from {path}: {e}")
+            return None
@@ -0,0 +1,189 @@
+# environments/hud_layout.py
+
+import hashlib
+import json
+import logging
+import os
+from collections import namedtuple
+from types import MappingProxyType
+
+# Resolution the base HUD coordinates were measured at
+REFERENCE_RESOLUTION = (1920, 1080)
+
+HUDLayout = namedtuple("HUDLayout", ["resolution", "hud_regions", "bar_regions"])
+HUDLayout.__doc__ = """
+Immutable HUD layout for one window resolution.
+
+Fields:
+    resolution (tuple): (width, height) the layout applies to.
+    hud_regions (Mapping): HUD name -> absolute region with 'start', 'width' and 'height'.
+    bar_regions (Mapping): Bar name -> absolute region with 'start', 'width' and 'height'.
+"""
+
+
+def _freeze_region(region):
+    return MappingProxyType({
+        "start": tuple(region["start"]),
+        "width": region["width"],
+        "height": region["height"],
+    })
+
+
+def _scale_region(region, scale_x, scale_y):
+    return {
+        "start": (int(round(region["start"][0] * scale_x)), int(round(region["start"][1] * scale_y))),
+        "width": max(int(round(region["width"] * scale_x)), 1),  # Ensure at least 1
+        "height": max(int(round(region["height"] * scale_y)), 1),  # Ensure at least 1
+    }
+
+
+class HUDLayoutCache:
+    """
+    Computes HUD layouts for window resolutions and caches them in memory and on disk.
+
+    The base layout is defined at REFERENCE_RESOLUTION: absolute HUD regions plus bar
+    regions relative to their HUD. Each resolution's layout is computed once.
+    """
+
+    def __init__(self, hud_regions, bar_definitions, reference_resolution=REFERENCE_RESOLUTION, cache_dir=None):
+        """
+        Initializes the HUDLayoutCache.
+
+        Args:
+            hud_regions (dict): HUD name -> region at the reference resolution.
+            bar_definitions (dict): Bar name -> {"hud": HUD name, "region": region relative to the HUD}.
+            reference_resolution (tuple): (width, height) the base regions were measured at.
+            cache_dir (str or None): Directory for cached layouts. If None, layouts are only kept in memory.
+        """
+        self.hud_regions = {name: dict(_freeze_region(region)) for name, region in hud_regions.items()}
+        self.bar_definitions = {
+            name: {"hud": definition["hud"], "region": dict(_freeze_region(definition["region"]))}
+            for name, definition in bar_definitions.items()
+        }
+        self.reference_resolution = tuple(reference_resolution)
+        self.cache_dir = cache_dir
+        self._layouts = {}
+
+    def base_key(self):
+        """
+        Returns a stable hash identifying the base layout.
+        """
+        encoded = json.dumps(
+            [self.reference_resolution, self.hud_regions, self.bar_definitions], sort_keys=True
+        ).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    def _cache_path(self, resolution):
+        return os.path.join(self.cache_dir, f"hud_layout_{self.base_key()}_{resolution[0]}x{resolution[1]}.json")
+
+    def compute(self, resolution, ui_scale=None, hud_starts=None):
+        """
+        Scales the base layout to a window resolution.
+
+        Args:
+            resolution (tuple): (width, height) of the game window.
+            ui_scale (float, optional): Calibrated UI scale applied to region sizes and bar offsets.
+                Defaults to scaling by resolution.
+            hud_starts (dict, optional): Calibrated absolute HUD positions that replace the scaled ones.
+
+        Returns:
+            dict: Plain 'hud_regions' and 'bar_regions' dicts of absolute regions.
+        """
+        if ui_scale is None:
+            scale_x = resolution[0] / self.reference_resolution[0]
+            scale_y = resolution[1] / self.reference_resolution[1]
+        else:
+            scale_x = scale_y = ui_scale
+        hud_starts = hud_starts or {}
+
+        hud_regions = {}
+        for name, region in self.hud_regions.items():
+            hud_regions[name] = _scale_region(region, scale_x, scale_y)
+            if name in hud_starts:
+                hud_regions[name]["start"] = tuple(hud_starts[name])
+
+        bar_regions = {}
+        for name, definition in self.bar_definitions.items():
+            hud_start = hud_regions[definition["hud"]]["start"]
+            offset = _scale_region(definition["region"], scale_x, scale_y)
+            bar_regions[name] = {
+                "start": (hud_start[0] + offset["start"][0], hud_start[1] + offset["start"][1]),
+                "width": offset["width"],
+                "height": offset["height"],
+            }
+        return {"hud_regions": hud_regions, "bar_regions": bar_regions}
+
+    def _freeze_layout(self, resolution, regions):
+        return HUDLayout(
+            resolution=resolution,
+            hud_regions=MappingProxyType({k: _freeze_region(v) for k, v in regions["hud_regions"].items()}),
+            bar_regions=MappingProxyType({k: _freeze_region(v) for k, v in regions["bar_regions"].items()}),
+        )
+
+    def set_calibration(self, calibration):
+        """
+        Replaces the layout of the calibration's resolution with the calibrated one.
+
+        Args:
+            calibration (dict): Calibration from HUDCalibrator with 'resolution', 'ui_scale'
+                and 'hud_starts'.
+
+        Returns:
+            HUDLayout: The calibrated layout.
+        """
+        resolution = (int(calibration["resolution"][0]), int(calibration["resolution"][1]))
+        regions = self.compute(resolution, ui_scale=calibration["ui_scale"], hud_starts=calibration["hud_starts"])
+        layout = self._freeze_layout(resolution, regions)
+        self._layouts[resolution] = layout
+        return layout
+
+    def get(self, resolution):
+        """
+        Returns the layout for a window resolution, computing and persisting it if needed.
+
+        Args:
+            resolution (tuple): (width, height) of the game window.
+
+        Returns:
+            HUDLayout: Immutable layout for the resolution.
+        """
+        resolution = (int(resolution[0]), int(resolution[1]))
+        layout = self._layouts.get(resolution)
+        if layout is not None:
+            return layout
+
+        regions = self._load(resolution)
+        if regions is None:
+            regions = self.compute(resolution)
+            self._save(resolution, regions)
+
+        layout = self._freeze_layout(resolution, regions)
+        self._layouts[resolution] = layout
+        return layout
+
+    def _load(self, resolution):
+        if self.cache_dir is None:
+            return None
+        path = self._cache_path(resolution)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                regions = json.load(f)
+            logging.debug(f"Loaded HUD layout from {path}")
+            return regions
+        except Exception as e:
+            logging.warning(f"Error loading HUD layout from {path}: {e}")
+            return None
+
+    def _save(self, resolution, regions):
+        if self.cache_dir is None:
+            return
+        path = self._cache_path(resolution)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(regions, f)
+            logging.info(f"Saved HUD layout for {resolution[0]}x{resolution[1]} to {path}")
+        except Exception as e:
+            logging.warning(f"Error saving HUD layout to {path}: {e}")
@@ -1,28 +1,62 @@
 # environments/hud_manager.py
 
-import cv2
-import numpy as np
 import logging
-from utilities.screen_capture import capture_screen
+import os
+from utilities.screen_capture import ScreenCapturer, BackgroundCapturer
+from environments.observation_builder import ObservationBuilder
+from environments.health_bar_estimator import HealthBarEstimator
+from environments.color_lut import ColorLUT, DEFAULT_COLOR_PROFILE
+from environments.hud_layout import HUDLayoutCache, REFERENCE_RESOLUTION
+from environments.hud_calibration import HUDCalibrator
+from environments.region_cache import RegionCache
 from utilities.get_window_size import get_game_window_size
+from utilities.step_logging import HUD_LOG
+
+# Repository data directories, independent of the working directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_CACHE_DIR = os.path.join(DATA_DIR, "cache")
+DEFAULT_TEMPLATES_DIR = os.path.join(DATA_DIR, "templates")
 
 class HUDManager:
-    def __init__(self, hud_regions=None, resized_size=(160, 90), window_title="TL 1.281.22.935"):
+    def __init__(self, hud_regions=None, resized_size=(160, 90), window_title="TL 1.281.22.935",
+                 capture_mode="sync", capture_fps=30, max_frame_staleness=0.1,
+                 color_profile=DEFAULT_COLOR_PROFILE, cache_dir=None, templates_dir=DEFAULT_TEMPLATES_DIR,
+                 recalibrate_after=30, capture_backend=None, static_huds=("player_hud",)):
         """
-        Initializes the HUDManager with specified regions and scaling factors.
+        Initializes the HUDManager with specified regions.
 
         Args:
-            hud_regions (dict, optional): Custom HUD regions. Defaults to None.
+            hud_regions (dict, optional): Custom HUD regions at the reference 1920x1080 resolution.
+                The dict is not modified. Defaults to None.
             resized_size (tuple, optional): Desired size for resized observations. Defaults to (160, 90).
             window_title (str, optional): Title of the game window to capture. Defaults to "TL 1.281.22.935".
+            capture_mode (str, optional): "sync" to grab a frame on demand, or "background" to grab
+                frames continuously on a daemon thread. Defaults to "sync".
+            capture_fps (float, optional): Target FPS of the background capture thread. Defaults to 30.
+            max_frame_staleness (float, optional): Maximum age in seconds of a background frame. Defaults to 0.1.
+            color_profile (dict, optional): Colour profile used to classify HUD bar pixels.
+                Defaults to DEFAULT_COLOR_PROFILE.
+            cache_dir (str, optional): Directory for cached HUD lookup tables, layouts and calibrations,
+                e.g. DEFAULT_CACHE_DIR. Nothing is cached if None. Defaults to None.
+            templates_dir (str, optional): Directory with `<hud name>.png` anchor templates used for
+                HUD calibration. Defaults to DEFAULT_TEMPLATES_DIR.
+            recalibrate_after (int, optional): Consecutive failed calibration checks before
+                `recalibration_pending` is set. Recalibration itself only runs on an explicit
+                calibrate_hud() call, e.g. from the env's reset(). Defaults to 30.
+            static_huds (iterable, optional): HUDs that are always on screen. Only they must be found by
+                calibration and are checked every frame. Defaults to ("player_hud",), since the target HUD
+                is only shown while a target is selected.
+            capture_backend (optional): Capture backend used instead of a ScreenCapturer of the game
+                window, e.g. a SyntheticCapture. It provides grab(), size, add_geometry_listener(),
+                get_timing_stats() and close(). Defaults to None.
         """
         if hud_regions is None:
-            self.hud_regions = {
+            hud_regions = {
                 "player_hud": {"start": (28, 60), "width": 309, "height": 116},
                 "target_hud": {"start": (339, 59), "width": 232, "height": 119},
             }
-        else:
-            self.hud_regions = hud_regions
+        # Copy so the caller's regions are never rescaled in place
+        self.base_hud_regions = {name: dict(region) for name, region in hud_regions.items()}
 
         # Define health bar regions relative to each HUD
         self.health_bar_regions = {
@@ -31,57 +65,183 @@ class HUDManager:
         }
 
         # Retrieve the original game window size
-        original_size = get_game_window_size(window_title=window_title)
+        if capture_backend is not None:
+            original_size = capture_backend.size
+        else:
+            original_size = get_game_window_size(window_title=window_title)
         if original_size is None:
             logging.error("Failed to retrieve game window size. Using default original_size=(1920, 1080).")
-            original_size = (1920, 1080)  # Fallback to a default size
+            original_size = REFERENCE_RESOLUTION  # Fallback to a default size
 
-        self.original_size = original_size
+        self.original_size = tuple(original_size)
         self.resized_size = resized_size
         self.window_title = window_title  # Store window_title for use in perform_action
+        self.cache_dir = cache_dir
+        self.capturer = capture_backend if capture_backend is not None else ScreenCapturer(window_title=window_title)
+        self.capturer.add_geometry_listener(self.on_geometry_change)
+        self.observation_builder = ObservationBuilder(resized_size=resized_size)
+
+        # Register every HUD bar with the batched estimator
+        self.color_lut = ColorLUT.load_or_build(color_profile, cache_dir=cache_dir)
+        self.region_cache = RegionCache()  # Skips re-parsing unchanged HUD regions
+        self.bar_definitions = {
+            "player_health": {"hud": "player_hud", "field": "health", "region": self.health_bar_regions["player_health"]},
+            "target_health": {"hud": "target_hud", "field": "health", "region": self.health_bar_regions["target_health"]},
+        }
+        self._hud_state = None  # (layout, bar_estimator), swapped as a single reference
+
+        # Optional HUD calibration from anchor templates
+        self.calibrator = HUDCalibrator.from_directory(templates_dir, self.base_hud_regions, cache_dir=cache_dir,
+                                                       static_huds=static_huds)
+        self.calibration = None
+        self.recalibrate_after = recalibrate_after
+        self.verify_failures = 0
+        self.recalibration_pending = False
+        self._rebuild_layouts()
+
+        if capture_mode not in ("sync", "background"):
+            raise ValueError(f"Unknown capture_mode '{capture_mode}'")
+        self.capture_mode = capture_mode
+        self.background_capturer = None
+        if capture_mode == "background":
+            self.background_capturer = BackgroundCapturer(
+                window_title=window_title,
+                target_fps=capture_fps,
+                max_staleness=max_frame_staleness,
+                capturer_factory=(lambda: capture_backend) if capture_backend is not None else None
+            )
+            self.background_capturer.add_geometry_listener(self.on_geometry_change)
+            self.background_capturer.start()
 
-        # Calculate scaling factors
-        self.scale_x = self.resized_size[0] / self.original_size[0]
-        self.scale_y = self.resized_size[1] / self.original_size[1]
+        # HUD regions are parsed on the native-resolution frame; only the observation is downscaled
+        logging.info(f"Parsing HUD regions at native resolution {self.original_size[0]}x{self.original_size[1]}")
 
-        logging.info(f"Scaling factors - X: {self.scale_x:.4f}, Y: {self.scale_y:.4f}")
+    @property
+    def layout(self):
+        """
+        HUDLayout for the current window resolution.
+        """
+        return self._hud_state[0]
 
-        # Scale HUD regions with minimum width and height of 1
-        for hud in self.hud_regions.values():
-            original_start = hud["start"]
-            original_width = hud["width"]
-            original_height = hud["height"]
+    @property
+    def bar_estimator(self):
+        """
+        HealthBarEstimator registered with the current layout's bars.
+        """
+        return self._hud_state[1]
 
-            scaled_start = (
-                int(original_start[0] * self.scale_x),
-                int(original_start[1] * self.scale_y)
-            )
-            scaled_width = max(int(original_width * self.scale_x), 1)  # Ensure at least 1
-            scaled_height = max(int(original_height * self.scale_y), 1)  # Ensure at least 1
+    @property
+    def hud_regions(self):
+        """
+        HUD regions scaled to the current window resolution.
+        """
+        return self._hud_state[0].hud_regions
 
-            hud["start"] = scaled_start
-            hud["width"] = scaled_width
-            hud["height"] = scaled_height
+    def register_bar(self, name, hud, field, region):
+        """
+        Registers a HUD bar to be read by process_hud.
 
-            logging.debug(f"Scaled HUD Region: Start={scaled_start}, Width={scaled_width}, Height={scaled_height}")
+        Args:
+            name (str): Name of the bar, e.g. "player_mana".
+            hud (str): HUD the bar belongs to, e.g. "player_hud".
+            field (str): Key the fill level is reported under in the HUD data, e.g. "mana".
+            region (dict): Bar region relative to the HUD at the reference resolution,
+                with 'start', 'width' and 'height'.
+        """
+        self.bar_definitions[name] = {"hud": hud, "field": field, "region": dict(region)}
+        self._rebuild_layouts()
+
+    def _rebuild_layouts(self):
+        if self.calibrator is not None:
+            # Bar fills change during play, so calibration checks never sample them
+            verify_exclude = {}
+            for definition in self.bar_definitions.values():
+                verify_exclude.setdefault(definition["hud"], []).append(definition["region"])
+            self.calibrator.verify_exclude = verify_exclude
+        self.layout_cache = HUDLayoutCache(self.base_hud_regions, self.bar_definitions, cache_dir=self.cache_dir)
+        if self.calibration is not None:
+            self.layout_cache.set_calibration(self.calibration)
+        self.apply_layout(self.original_size)
+
+    def apply_layout(self, resolution):
+        """
+        Switches HUD parsing to the layout for a window resolution.
 
-        # Scale health bar regions relative to each HUD with minimum width and height of 1
-        self.scaled_health_bar_regions = {}
-        for key, region in self.health_bar_regions.items():
-            scaled_start = (
-                int(region["start"][0] * self.scale_x),
-                int(region["start"][1] * self.scale_y)
-            )
-            scaled_width = max(int(region["width"] * self.scale_x), 1)  # Ensure at least 1
-            scaled_height = max(int(region["height"] * self.scale_y), 1)  # Ensure at least 1
+        The layout and its bar estimator are built first and then swapped in with a
+        single assignment, so a concurrent process_hud call sees either the old or
+        the new layout, never a mix.
 
-            self.scaled_health_bar_regions[key] = {
-                "start": scaled_start,
-                "width": scaled_width,
-                "height": scaled_height
-            }
+        Args:
+            resolution (tuple): (width, height) of the game window.
+        """
+        resolution = (int(resolution[0]), int(resolution[1]))
+        if self.calibrator is not None and (self.calibration is None or self.calibration["resolution"] != resolution):
+            calibration = self.calibrator.load(resolution)
+            if calibration is not None:
+                self.calibration = calibration
+                self.layout_cache.set_calibration(calibration)
+
+        layout = self.layout_cache.get(resolution)
+        bar_estimator = HealthBarEstimator(color_lut=self.color_lut, region_cache=self.region_cache)
+        for name, region in layout.bar_regions.items():
+            bar_estimator.register_bar(name, region)
+        self._hud_state = (layout, bar_estimator)
+        self.original_size = layout.resolution
+
+    def on_geometry_change(self, size):
+        """
+        Handles a game window resize reported by the capture layer.
+
+        Args:
+            size (tuple): New (width, height) of the captured window.
+        """
+        if self._hud_state is not None and tuple(size) == self.layout.resolution:
+            return
+        logging.info(f"Game window resized to {size[0]}x{size[1]}. Switching HUD layout.")
+        self.apply_layout(size)
+
+    def calibrate_hud(self, screen=None):
+        """
+        Locates the HUDs in a frame with the anchor templates and switches to the calibrated layout.
+
+        The template search takes tens of milliseconds, so it is never run from process_hud().
+
+        Args:
+            screen (np.ndarray, optional): Native-resolution frame. If None, a new frame is captured.
 
-            logging.debug(f"Scaled Health Bar Region for {key}: Start={scaled_start}, Width={scaled_width}, Height={scaled_height}")
+        Returns:
+            bool: True if the HUD was calibrated.
+        """
+        if self.calibrator is None:
+            logging.warning("No HUD templates available for calibration.")
+            return False
+        if screen is None:
+            screen = self.capture_frame()
+        if screen is None:
+            return False
+
+        self.verify_failures = 0
+        calibration = self.calibrator.calibrate(screen)
+        if calibration is None:
+            return False
+        self.calibrator.save(calibration)
+        self.calibration = calibration
+        self.recalibration_pending = False
+        self.layout_cache.set_calibration(calibration)
+        self.apply_layout(calibration["resolution"])
+        return True
+
+    def _verify_calibration(self, screen):
+        calibration = self.calibration
+        if calibration is None or self.calibrator.verify(screen, calibration):
+            self.verify_failures = 0
+            return True
+
+        self.verify_failures += 1
+        if self.verify_failures >= self.recalibrate_after and not self.recalibration_pending:
+            logging.warning("HUD calibration check failed repeatedly. Recalibration is pending.")
+            self.recalibration_pending = True
+        return False
 
     def extract_hud(self, screen, region):
         """
@@ -98,8 +258,8 @@ class HUDManager:
         end_x = start_x + region["width"]
         end_y = start_y + region["height"]
 
-        logging.debug(f"Extracting HUD: Start=({start_x}, {start_y}), End=({end_x}, {end_y})")
-        logging.debug(f"Screen size: {screen.shape[1]}x{screen.shape[0]}")
+        HUD_LOG.debug("Extracting HUD: Start=(%d, %d), End=(%d, %d)", start_x, start_y, end_x, end_y)
+        HUD_LOG.debug("Screen size: %dx%d", screen.shape[1], screen.shape[0])
 
         # Adjust end coordinates if they exceed screen boundaries
         end_x = min(end_x, screen.shape[1])
@@ -122,87 +282,92 @@ class HUDManager:
             float: Health percentage [0.0, 1.0].
         """
         if bar_image is None or bar_image.size == 0:
-            logging.info("Health bar image not found. Setting health to 0.0")
+            HUD_LOG.info("Health bar image not found. Setting health to 0.0")
             return 0.0
 
-        # Convert to grayscale if needed
-        if len(bar_image.shape) == 3:
-            bar_image = cv2.cvtColor(bar_image, cv2.COLOR_BGR2GRAY)
-
-        # Threshold to isolate the filled portion of the bar
-        _, thresholded = cv2.threshold(bar_image, 128, 255, cv2.THRESH_BINARY)
-
-        filled_pixels = np.sum(thresholded == 255)
-        total_pixels = thresholded.size
+        return self.bar_estimator.estimate_bar(bar_image)
 
-        return filled_pixels / total_pixels if total_pixels > 0 else 0.0
-
-    def process_player_hud(self, screen):
+    def process_hud(self, screen=None):
         """
-        Processes the player's HUD to extract health data.
+        Processes the HUD data for the player and the target.
 
         Args:
-            screen (np.ndarray): The captured screen image.
+            screen (np.ndarray, optional): Native-resolution raw frame to parse. If None, a new
+                frame is captured.
 
         Returns:
-            dict: Player health data.
+            dict: Combined HUD data.
         """
-        player_hud = self.extract_hud(screen, self.hud_regions["player_hud"])
-        if player_hud is None:
-            return {"health": 0.0}
+        try:
+            if screen is None:
+                screen = self.capture_frame()
+            if screen is None:
+                logging.error("No frame available for HUD processing.")
+                return {"player_hud": {"health": 0.0}, "target_hud": {"health": 0.0}, "info": {}}
+
+            hud_verified = self._verify_calibration(screen)
+
+            # Estimate all registered bars in one batched pass
+            _, bar_estimator = self._hud_state
+            hud_data = {"player_hud": {}, "target_hud": {}, "info": {"hud_verified": hud_verified}}
+            for name, fill in bar_estimator.estimate(screen).items():
+                definition = self.bar_definitions[name]
+                hud_data.setdefault(definition["hud"], {})[definition["field"]] = fill
+            HUD_LOG.debug("HUD Data: %s", hud_data)
+            return hud_data
+        except Exception as e:
+            logging.error(f"Error processing HUD: {e}")
+            return {"player_hud": {}, "target_hud": {}, "info": {}}
 
-        health_bar_region = self.scaled_health_bar_regions["player_health"]
-        health_bar = self.extract_hud(player_hud, health_bar_region)
+    def get_cache_stats(self):
+        """
+        Returns hit and miss counters of the HUD region cache.
 
-        health_percentage = self.process_health_bar(health_bar)
-        logging.debug(f"Player Health: {health_percentage:.2f}")
-        return {"health": health_percentage}
+        Returns:
+            dict: Hits, misses and hit rate.
+        """
+        return self.region_cache.get_stats()
 
-    def process_target_hud(self, screen):
+    def capture_frame(self, after=None):
         """
-        Processes the target's HUD to extract health data.
+        Captures the raw game window frame.
+
+        In background mode the newest frame captured after `after` is taken from the
+        capture thread; a synchronous grab is only made if none arrives in time.
 
         Args:
-            screen (np.ndarray): The captured screen image.
+            after (float, optional): time.perf_counter() value the frame must be captured after.
 
         Returns:
-            dict: Target health data.
+            np.ndarray or None: Raw BGRA frame, or None if the capture failed.
         """
-        target_hud = self.extract_hud(screen, self.hud_regions["target_hud"])
-        if target_hud is None:
-            return {"health": 0.0}
-
-        health_bar_region = self.scaled_health_bar_regions["target_health"]
-        health_bar = self.extract_hud(target_hud, health_bar_region)
-
-        health_percentage = self.process_health_bar(health_bar)
-        logging.debug(f"Target Health: {health_percentage:.2f}")
-        return {"health": health_percentage}
+        if self.background_capturer is not None:
+            screen, _ = self.background_capturer.latest_frame(after=after)
+            if screen is not None:
+                return screen
+            logging.debug("No fresh background frame available. Falling back to a synchronous grab.")
+        return self.capturer.grab()
 
-    def process_hud(self):
+    def close(self):
         """
-        Processes the HUD data for the player and the target.
-
-        Returns:
-            dict: Combined HUD data.
+        Stops background capture and releases capture handles.
         """
-        try:
-            screen = self.get_screen_observation()
+        if self.background_capturer is not None:
+            self.background_capturer.stop()
+        self.capturer.close()
 
-            # Extract and process player HUD
-            player_hud_data = self.process_player_hud(screen)
+    def build_observation(self, screen):
+        """
+        Preprocesses a raw captured frame into an observation.
 
-            # Extract and process target HUD
-            target_hud_data = self.process_target_hud(screen)
+        Args:
+            screen (np.ndarray or None): Raw BGRA frame from capture_frame.
 
-            return {
-                "player_hud": player_hud_data,
-                "target_hud": target_hud_data,
-                "info": {},  # Add additional info if needed
-            }
-        except Exception as e:
-            logging.error(f"Error processing HUD: {e}")
-            return {"player_hud": {}, "target_hud": {}, "info": {}}
+        Returns:
+            np.ndarray: Preprocessed screen observation of shape (resized_height, resized_width, 3).
+                The array is a reused buffer; copy it if it must outlive the next observations.
+        """
+        return self.observation_builder.build(screen)
 
     def get_screen_observation(self):
         """
@@ -211,18 +376,4 @@ class HUDManager:
         Returns:
             np.ndarray: Preprocessed screen observation.
         """
-        try:
-            screen = capture_screen(window_title=self.window_title)
-            if screen is not None:
-                # Convert the image to BGR and resize
-                color_screen = cv2.cvtColor(screen, cv2.COLOR_BGRA2BGR)
-                resized_screen = cv2.resize(color_screen, self.resized_size)
-                observation = resized_screen  # Shape: (resized_height, resized_width, 3)
-                logging.debug(f"Resized screen shape: {observation.shape}")
-                return observation
-            else:
-                logging.error("Failed to capture screen.")
-                return np.zeros((*self.resized_size, 3), dtype=np.uint8)
-        except Exception as e:
-            logging.error(f"Error capturing screen observation: {e}")
-            return np.zeros((*self.resized_size, 3), dtype=np.uint8)
+        return self.build_observation(self.capture_frame())
@@ -1,5 +1,6 @@
 import numpy as np
 import logging
+from utilities.step_logging import REWARD_LOG
 
 class MovementManager:
     """
@@ -41,13 +42,13 @@ class MovementManager:
             previous_position = self.position_history[-2]
             distance_moved = np.linalg.norm(np.array(previous_position) - np.array(last_position))
             if distance_moved > 15:
-                logging.debug(f"Meaningful movement detected. Distance moved: {distance_moved}")
+                REWARD_LOG.debug("Meaningful movement detected. Distance moved: %s", distance_moved)
                 return 10  # Reward for significant movement
             elif 5 < distance_moved <= 15:
-                logging.debug(f"Moderate movement detected. Distance moved: {distance_moved}")
+                REWARD_LOG.debug("Moderate movement detected. Distance moved: %s", distance_moved)
                 return 5  # Smaller reward for moderate movement
             elif distance_moved < 2:
-                logging.debug(f"Inefficient movement detected. Distance moved: {distance_moved}")
+                REWARD_LOG.debug("Inefficient movement detected. Distance moved: %s", distance_moved)
                 return -20  # Penalize being stuck or moving inefficiently
         return 0
 
@@ -61,7 +62,7 @@ class MovementManager:
         """
         current_position = state.get("player_position", (0, 0))
         if current_position not in self.visited_positions:
-            logging.debug(f"New area explored: {current_position}")
+            REWARD_LOG.debug("New area explored: %s", current_position)
             self.visited_positions.add(current_position)
             return 15  # Reward for exploring a new area
         return 0
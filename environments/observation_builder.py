@@ -0,0 +1,71 @@
+# environments/observation_builder.py
+
+import cv2
+import numpy as np
+import logging
+
+
+class ObservationBuilder:
+    """
+    Builds observations from raw captured frames into preallocated buffers.
+
+    Raw BGRA frames are downsampled first and colour-converted afterwards, so the
+    BGRA->BGR conversion only touches observation-sized pixels and no per-step
+    arrays are allocated.
+    """
+
+    def __init__(self, resized_size=(160, 90), num_buffers=2, interpolation=cv2.INTER_LINEAR):
+        """
+        Initializes the ObservationBuilder.
+
+        Args:
+            resized_size (tuple): Observation size as (width, height).
+            num_buffers (int): Number of output buffers to rotate through. An observation stays
+                valid until num_buffers further observations have been built.
+            interpolation (int): OpenCV interpolation flag used for the resize.
+        """
+        if num_buffers < 1:
+            raise ValueError("num_buffers must be at least 1")
+
+        self.resized_size = resized_size
+        self.interpolation = interpolation
+        width, height = resized_size
+        self.shape = (height, width, 3)
+
+        self._resized_bgra = np.zeros((height, width, 4), dtype=np.uint8)
+        self._buffers = [np.zeros(self.shape, dtype=np.uint8) for _ in range(num_buffers)]
+        self._index = 0
+
+    def _next_buffer(self):
+        buffer = self._buffers[self._index]
+        self._index = (self._index + 1) % len(self._buffers)
+        return buffer
+
+    def build(self, screen):
+        """
+        Preprocesses a raw captured frame into an observation.
+
+        Args:
+            screen (np.ndarray or None): Raw BGRA (or BGR) frame.
+
+        Returns:
+            np.ndarray: Observation of shape (height, width, 3), written into a reused buffer.
+        """
+        observation = self._next_buffer()
+        try:
+            if screen is None:
+                logging.error("Failed to capture screen.")
+                observation.fill(0)
+                return observation
+
+            if screen.ndim == 3 and screen.shape[2] == 4:
+                # Downsample straight from BGRA, then drop alpha on the small image
+                cv2.resize(screen, self.resized_size, dst=self._resized_bgra, interpolation=self.interpolation)
+                cv2.cvtColor(self._resized_bgra, cv2.COLOR_BGRA2BGR, dst=observation)
+            else:
+                cv2.resize(screen, self.resized_size, dst=observation, interpolation=self.interpolation)
+            return observation
+        except Exception as e:
+            logging.error(f"Error building screen observation: {e}")
+            observation.fill(0)
+            return observation
@@ -0,0 +1,112 @@
+# environments/region_cache.py
+
+import numpy as np
+
+
+class RegionCache:
+    """
+    Skips re-parsing HUD regions whose pixels have not changed.
+
+    Each region is fingerprinted by hashing a few full-width rows sampled across
+    its height. Sampling whole rows keeps every column in the fingerprint, so a
+    bar's fill edge moving by a single column is always detected.
+    """
+
+    def __init__(self, row_samples=3):
+        """
+        Initializes the RegionCache.
+
+        Args:
+            row_samples (int): Number of rows sampled for each fingerprint.
+        """
+        self.row_samples = row_samples
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, roi):
+        """
+        Computes a cheap fingerprint of a region.
+
+        Args:
+            roi (np.ndarray): Region image.
+
+        Returns:
+            int: Fingerprint of the sampled rows.
+        """
+        height = roi.shape[0]
+        if height == 0:
+            return hash((roi.shape, b""))
+        rows = np.linspace(0, height - 1, min(self.row_samples, height)).astype(np.intp)
+        return hash((roi.shape, roi[rows].tobytes()))
+
+    def lookup(self, key, roi):
+        """
+        Returns the cached result for a region if its pixels are unchanged.
+
+        Args:
+            key (str): Region name.
+            roi (np.ndarray): Region image of the current frame.
+
+        Returns:
+            tuple: (hit, result, fingerprint). On a miss, result is None and the fingerprint
+                should be passed to store() with the new result.
+        """
+        fingerprint = self.fingerprint(roi)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            return True, entry[1], fingerprint
+        self.misses += 1
+        return False, None, fingerprint
+
+    def store(self, key, fingerprint, result):
+        """
+        Caches the parse result of a region.
+
+        Args:
+            key (str): Region name.
+            fingerprint (int): Fingerprint returned by lookup().
+            result: Parse result to reuse while the region is unchanged.
+        """
+        self.entries[key] = (fingerprint, result)
+
+    def get_or_compute(self, key, roi, compute):
+        """
+        Returns the cached result for an unchanged region, or computes and caches it.
+
+        Args:
+            key (str): Region name.
+            roi (np.ndarray): Region image of the current frame.
+            compute (callable): Parser called with the region on a miss.
+
+        Returns:
+            The parse result.
+        """
+        hit, result, fingerprint = self.lookup(key, roi)
+        if not hit:
+            result = compute(roi)
+            self.store(key, fingerprint, result)
+        return result
+
+    def invalidate(self, key=None):
+        """
+        Drops cached results.
+
+        Args:
+            key (str, optional): Region to drop. Drops every region if None.
+        """
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def get_stats(self):
+        """
+        Returns hit and miss counters.
+
+        Returns:
+            dict: Hits, misses and hit rate.
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
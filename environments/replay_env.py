@@ -0,0 +1,233 @@
+# environments/replay_env.py
+
+import time
+
+import numpy as np
+from environments.throne_env import ThroneAndLibertyEnv
+from environments.trajectory_recorder import TrajectoryReader
+from utilities.action_registry import DEFAULT_ACTION_HEADS
+
+REPLAY_POLICIES = ("open_loop", "nearest_action")
+
+
+class ReplayCapture:
+    """
+    Capture backend that serves raw frames of a TrajectoryRecorder recording.
+
+    Each grab() returns the frame at the position set with seek(), or otherwise the
+    frame after the previous one, without going past the current episode's end.
+    Frames are read-only views of the memory-mapped chunk files.
+    """
+
+    def __init__(self, reader):
+        """
+        Initializes the ReplayCapture.
+
+        Args:
+            reader (TrajectoryReader): Recording made with frames="raw".
+        """
+        if reader.index["frames"] != "raw" or reader.index["frame_shape"] is None:
+            raise ValueError(f"Recording at {reader.path} has no raw frames to replay.")
+        self.reader = reader
+        height, width = reader.index["frame_shape"][:2]
+        self.size = (width, height)
+        self.cursor = -1
+        self.stop = len(reader)
+        self._next = None
+
+        # Counters
+        self.grab_count = 0
+        self.total_grab_time = 0.0
+        self.max_grab_time = 0.0
+
+    def add_geometry_listener(self, listener):
+        pass  # Recorded frames all have the same size
+
+    def seek(self, index):
+        """
+        Sets the step whose frame the next grab() returns.
+        """
+        self._next = index
+
+    def grab(self):
+        """
+        Returns the next recorded frame.
+
+        Returns:
+            np.ndarray: Read-only BGRA frame of shape (height, width, 4).
+        """
+        start = time.perf_counter()
+        if self._next is not None:
+            self.cursor, self._next = self._next, None
+        else:
+            self.cursor = min(self.cursor + 1, self.stop - 1)
+        frame = self.reader.frames(self.cursor, self.cursor + 1)[0]
+
+        duration = time.perf_counter() - start
+        self.grab_count += 1
+        self.total_grab_time += duration
+        self.max_grab_time = max(self.max_grab_time, duration)
+        return frame
+
+    def get_timing_stats(self):
+        """
+        Returns read timing statistics.
+
+        Returns:
+            dict: Grab counts and timings in milliseconds.
+        """
+        mean_grab_time = self.total_grab_time / self.grab_count if self.grab_count else 0.0
+        return {
+            "grabs": self.grab_count,
+            "failures": 0,
+            "mean_ms": mean_grab_time * 1000,
+            "max_ms": self.max_grab_time * 1000,
+        }
+
+    def close(self):
+        pass
+
+
+class ReplayInput:
+    """
+    Input backend that discards input. ReplayThroneEnv picks the next recorded step itself.
+    """
+
+    realtime = False  # Nothing is played, so macros need no wait
+
+    def __init__(self):
+        self.dispatched_count = 0
+
+    def dispatch(self, action, hold_duration=None, delay=0.0):
+        self.dispatched_count += 1
+        return True
+
+    def dispatch_chord(self, actions, hold_duration=None, delay=0.0):
+        self.dispatched_count += 1
+        return True
+
+    def stop(self, timeout=1.0):
+        pass
+
+    def get_stats(self):
+        return {"dispatched": self.dispatched_count}
+
+
+class ReplayThroneEnv(ThroneAndLibertyEnv):
+    """
+    ThroneAndLibertyEnv driven by a recorded session instead of the game.
+
+    Recorded raw frames go through the real HUDManager parsing, observation builder
+    and RewardManager, so perception and reward changes can be tested and
+    benchmarked deterministically at disk speed. Frames carry their recorded capture
+    times, so time-dependent rewards match the recording. The agent's action selects the
+    next recorded step:
+
+    - "open_loop": the next recorded step, whatever the action.
+    - "nearest_action": within the next `search_window` recorded steps of the episode,
+      the nearest step whose recorded action differs least from the agent's action.
+
+    Episodes are the recorded episodes, in turn. An episode is truncated when its
+    recorded steps run out. info holds the served step ('replay_index') and its
+    recorded action and reward.
+    """
+
+    def __init__(self, path, policy="open_loop", search_window=10, resized_size=(160, 90), action_mode="discrete",
+                 action_heads=DEFAULT_ACTION_HEADS, macros_path=None, control_hz=None, timing=False,
+                 copy_observations=True):
+        """
+        Initializes the ReplayThroneEnv.
+
+        Args:
+            path (str): Directory of a recording made with TrajectoryRecorder(frames="raw").
+            policy (str): "open_loop" or "nearest_action".
+            search_window (int): Recorded steps searched for the agent's action by "nearest_action".
+            resized_size (tuple): Desired size for resized observations.
+            action_mode (str): Action mode the session was recorded with (see ThroneAndLibertyEnv).
+            action_heads (sequence): Action heads used in "multi_discrete" mode.
+            macros_path (str, optional): Macros file the session was recorded with.
+            control_hz (float, optional): Paces replayed steps to this fixed rate.
+            timing (bool): Adds step timing spans to info (see ThroneAndLibertyEnv).
+            copy_observations (bool): Returns copies of the observations (see ThroneAndLibertyEnv).
+        """
+        if policy not in REPLAY_POLICIES:
+            raise ValueError(f"Unknown replay policy '{policy}'")
+        self.reader = TrajectoryReader(path)
+        self.replay_capture = ReplayCapture(self.reader)
+        super().__init__(resized_size=resized_size, action_mode=action_mode, action_heads=action_heads,
+                         macros_path=macros_path, control_hz=control_hz, timing=timing,
+                         copy_observations=copy_observations,
+                         capture_backend=self.replay_capture, input_backend=ReplayInput())
+        self.backend = "replay"
+        self.policy = policy
+        self.search_window = search_window
+
+        steps = self.reader.steps()
+        self.recorded_actions = np.array(steps["action"])
+        self.recorded_rewards = np.array(steps["reward"])
+        self.recorded_timestamps = np.array(steps["timestamp"])
+        # Time-dependent rewards (e.g. the kill reward) use the recorded capture times
+        self.frame_pipeline.clock = self._recorded_timestamp
+        self.episodes = self.reader.episodes()
+        if not self.episodes:
+            raise ValueError(f"Recording at {path} is empty.")
+        self.episode_number = -1
+        self.episode_start = 0
+        self.episode_stop = 0
+
+    def reset(self, *, seed=None, options=None):
+        """
+        Starts replaying the next recorded episode.
+
+        Args:
+            options (dict, optional): {"episode": n} replays the n-th recorded episode instead.
+
+        Returns:
+            tuple: (observation, info) of the episode's first recorded frame.
+        """
+        if options is not None and "episode" in options:
+            self.episode_number = options["episode"]
+        else:
+            self.episode_number = (self.episode_number + 1) % len(self.episodes)
+        _, self.episode_start, self.episode_stop = self.episodes[self.episode_number]
+        self.replay_capture.stop = self.episode_stop
+        self.replay_capture.seek(self.episode_start)
+        observation, info = super().reset(seed=seed)
+        return observation, dict(info, replay_index=self.replay_capture.cursor)
+
+    def _recorded_timestamp(self):
+        return float(self.recorded_timestamps[self.replay_capture.cursor])
+
+    def _select_step(self, action):
+        """
+        Returns the recorded step served for an action.
+        """
+        current = self.replay_capture.cursor
+        first, last = current + 1, min(current + 1 + self.search_window, self.episode_stop)
+        if first >= self.episode_stop:
+            return self.episode_stop - 1
+        if self.policy == "open_loop" or action is None:
+            return first
+        distances = (self.recorded_actions[first:last] != np.ravel(action)).sum(axis=1)
+        return first + int(np.argmin(distances))  # First minimum, so the nearest in time
+
+    def _replayed(self, transition):
+        observation, reward, terminated, truncated, info = transition
+        index = self.replay_capture.cursor
+        truncated = truncated or (not terminated and index >= self.episode_stop - 1)
+        info = dict(info, replay_index=index, recorded_action=self.recorded_actions[index],
+                    recorded_reward=float(self.recorded_rewards[index]))
+        return observation, reward, terminated, truncated, info
+
+    def step(self, action):
+        """
+        Serves the recorded step selected by the action. See ThroneAndLibertyEnv.step().
+        """
+        self.replay_capture.seek(self._select_step(action))
+        return self._replayed(super().step(action))
+
+    def step_idle(self):
+        """
+        Serves the next recorded step.
+        """
+        return self._replayed(super().step_idle())
@@ -1,10 +1,31 @@
 # environments/reward_manager.py
 
 import numpy as np
-import logging
+from environments.reward_telemetry import RewardTelemetry
+
+# Names of the reward components, in a stable order for recording
+REWARD_COMPONENTS = (
+    "survival_reward",
+    "low_health_penalty",
+    "death_penalty",
+    "combat_reward",
+    "kill_reward",
+    "movement_penalty",
+    "movement_reward",
+    "effective_spells_reward",
+    "wasted_spells_penalty",
+    "missed_target_penalty",
+    "goal_reward",
+    "exploration_reward",
+    "time_penalty",
+    "normalized_reward",
+)
+(SURVIVAL_REWARD, LOW_HEALTH_PENALTY, DEATH_PENALTY, COMBAT_REWARD, KILL_REWARD, MOVEMENT_PENALTY, MOVEMENT_REWARD,
+ EFFECTIVE_SPELLS_REWARD, WASTED_SPELLS_PENALTY, MISSED_TARGET_PENALTY, GOAL_REWARD, EXPLORATION_REWARD, TIME_PENALTY,
+ NORMALIZED_REWARD) = range(len(REWARD_COMPONENTS))
 
 class RewardManager:
-    def __init__(self, hud_manager, movement_manager, combat_manager):
+    def __init__(self, hud_manager, movement_manager, combat_manager, telemetry_capacity=4096):
         """
         Initializes the RewardManager with necessary components.
 
@@ -12,10 +33,14 @@ class RewardManager:
             hud_manager (HUDManager): Instance managing HUD data extraction.
             movement_manager (MovementManager): Instance managing movement tracking and rewards.
             combat_manager (CombatManager): Instance managing combat-related rewards.
+            telemetry_capacity (int): Steps of reward components kept in the telemetry ring buffer.
         """
         self.hud_manager = hud_manager
         self.movement_manager = movement_manager
         self.combat_manager = combat_manager
+        self.telemetry = RewardTelemetry(REWARD_COMPONENTS, capacity=telemetry_capacity)
+        # Components of the last calculated reward, in REWARD_COMPONENTS order; overwritten every step
+        self.last_components = np.zeros(len(REWARD_COMPONENTS))
 
     def calculate_reward(self, state):
         """
@@ -28,41 +53,43 @@ class RewardManager:
             float: Calculated and normalized reward.
         """
         total_reward = 0
-        component_rewards = {}
+        component_rewards = self.last_components
+        component_rewards.fill(0.0)
 
         # 1. Survival Rewards
         if "player_hud_data" in state:
             health = state["player_hud_data"].get("health", 0)
             survival_reward = health * 10  # Encourage maintaining high health
             total_reward += survival_reward
-            component_rewards["survival_reward"] = survival_reward
+            component_rewards[SURVIVAL_REWARD] = survival_reward
 
             if health <= 0.3 and health > 0:
                 low_health_penalty = (0.3 - health) * 50  # Heavily penalize low health
                 total_reward -= low_health_penalty
-                component_rewards["low_health_penalty"] = -low_health_penalty
+                component_rewards[LOW_HEALTH_PENALTY] = -low_health_penalty
             elif health == 0:
                 death_penalty = -500  # Massive penalty for death
                 total_reward += death_penalty
-                component_rewards["death_penalty"] = death_penalty
+                component_rewards[DEATH_PENALTY] = death_penalty
 
         # 2. Combat Efficiency Rewards
         if "target_hud_data" in state:
             current_health = state["target_hud_data"].get("health", 1.0)
-            combat_reward, kill_reward = self.combat_manager.calculate_combat_reward(current_health)
+            combat_reward, kill_reward = self.combat_manager.calculate_combat_reward(current_health,
+                                                                                     now=state.get("timestamp"))
             total_reward += combat_reward + kill_reward
-            component_rewards["combat_reward"] = combat_reward
-            component_rewards["kill_reward"] = kill_reward
+            component_rewards[COMBAT_REWARD] = combat_reward
+            component_rewards[KILL_REWARD] = kill_reward
 
         # 3. Movement Rewards
         if "message_hud_data" in state and state["message_hud_data"] == "Cannot move":
             movement_penalty = -100  # Heavily penalize inability to move
             total_reward += movement_penalty
-            component_rewards["movement_penalty"] = movement_penalty
+            component_rewards[MOVEMENT_PENALTY] = movement_penalty
         else:
             movement_reward = self.movement_manager.calculate_movement_reward()
             total_reward += movement_reward
-            component_rewards["movement_reward"] = movement_reward
+            component_rewards[MOVEMENT_REWARD] = movement_reward
 
         # 4. Spell Usage Rewards
         if "spell_usage_data" in state:
@@ -76,36 +103,35 @@ class RewardManager:
             total_reward += effective_spells_reward
             total_reward -= wasted_spells_penalty
 
-            component_rewards["effective_spells_reward"] = effective_spells_reward
-            component_rewards["wasted_spells_penalty"] = -wasted_spells_penalty
+            component_rewards[EFFECTIVE_SPELLS_REWARD] = effective_spells_reward
+            component_rewards[WASTED_SPELLS_PENALTY] = -wasted_spells_penalty
 
         # 5. Penalty for Missed Targets
         missed_target_penalty = self.combat_manager.missed_target_penalty()
         total_reward += missed_target_penalty  # Typically negative
-        component_rewards["missed_target_penalty"] = missed_target_penalty
+        component_rewards[MISSED_TARGET_PENALTY] = missed_target_penalty
 
         # 6. Goal Achievement Rewards
         if "info" in state and state["info"].get("goal_reached"):
             goal_reward = 200  # Substantial reward for achieving goals
             total_reward += goal_reward
-            component_rewards["goal_reward"] = goal_reward
+            component_rewards[GOAL_REWARD] = goal_reward
 
         # 7. Encourage Exploration and Obstacle Navigation
         exploration_reward = self.movement_manager.calculate_exploration_reward(state)
         total_reward += exploration_reward
-        component_rewards["exploration_reward"] = exploration_reward
+        component_rewards[EXPLORATION_REWARD] = exploration_reward
 
         # 8. Time-based Rewards/Penalties
         if "info" in state and state["info"].get("episode_length"):
             episode_length = state["info"]["episode_length"]
             time_penalty = episode_length * 0.1  # Slight penalty for taking too long
             total_reward -= time_penalty
-            component_rewards["time_penalty"] = -time_penalty
+            component_rewards[TIME_PENALTY] = -time_penalty
 
         # Normalize total_reward to prevent extreme values
         normalized_reward = np.clip(total_reward, -100, 200)  # Adjust bounds as needed
-        component_rewards["normalized_reward"] = normalized_reward
+        component_rewards[NORMALIZED_REWARD] = normalized_reward
 
-        # Log all components for debugging
-        logging.debug(f"Reward Components: {component_rewards}")
+        self.telemetry.record(component_rewards)
         return normalized_reward
@@ -0,0 +1,108 @@
+# environments/reward_telemetry.py
+
+import numpy as np
+
+
+class RewardTelemetry:
+    """
+    Fixed-size ring buffer of per-step reward components.
+
+    Storage is column-oriented: one contiguous row of `capacity` steps per component,
+    allocated once. record() writes one step into the current column; drain() returns
+    the steps recorded since the previous drain(), oldest first, and summarize()
+    reduces them into per-component statistics. If more than `capacity` steps are
+    recorded between drains, only the most recent `capacity` are kept and the rest
+    are counted in `dropped`.
+    """
+
+    def __init__(self, components, capacity=4096):
+        """
+        Initializes the RewardTelemetry.
+
+        Args:
+            components (sequence): Component names, one buffer row each.
+            capacity (int): Steps kept.
+        """
+        self.components = tuple(components)
+        self.capacity = capacity
+        self.values = np.zeros((len(self.components), capacity))
+        self.position = 0  # Column written by the next record()
+        self.pending = 0  # Steps recorded since the last drain, at most capacity
+        self.dropped = 0  # Steps overwritten before they were drained
+        self.total = 0
+
+    def reserve(self, capacity):
+        """
+        Grows the buffer to hold at least `capacity` steps. Steps not yet drained are discarded.
+
+        Args:
+            capacity (int): Steps to keep.
+        """
+        if capacity <= self.capacity:
+            return
+        self.capacity = capacity
+        self.values = np.zeros((len(self.components), capacity))
+        self.position = 0
+        self.pending = 0
+
+    def record(self, values):
+        """
+        Records one step.
+
+        Args:
+            values (np.ndarray): Value of each component, in the order of `components`.
+        """
+        self.values[:, self.position] = values
+        self.position = (self.position + 1) % self.capacity
+        if self.pending == self.capacity:
+            self.dropped += 1
+        else:
+            self.pending += 1
+        self.total += 1
+
+    def drain(self):
+        """
+        Returns the steps recorded since the previous drain and starts a new window.
+
+        Returns:
+            np.ndarray: Array of shape (components, steps), oldest step first.
+        """
+        start = self.position - self.pending
+        if start >= 0:
+            window = self.values[:, start:self.position].copy()
+        else:
+            window = np.concatenate((self.values[:, start:], self.values[:, :self.position]), axis=1)
+        self.pending = 0
+        return window
+
+    def summarize(self):
+        """
+        Drains the buffer and reduces the window per component.
+
+        Returns:
+            dict: Component name -> {"mean", "var", "rate"}, where rate is the fraction of steps in
+                which the component was non-zero. Empty if no step was recorded.
+        """
+        return summarize_components(self.drain(), self.components)
+
+
+def summarize_components(window, components):
+    """
+    Reduces a window of reward components into per-component statistics.
+
+    Args:
+        window (np.ndarray): Array of shape (components, steps), e.g. from RewardTelemetry.drain().
+        components (sequence): Component names, in the order of the window's rows.
+
+    Returns:
+        dict: Component name -> {"mean", "var", "rate"}. Empty if the window has no steps.
+    """
+    if window.shape[1] == 0:
+        return {}
+    means = window.mean(axis=1)
+    variances = window.var(axis=1)
+    rates = np.count_nonzero(window, axis=1) / window.shape[1]
+    return {
+        name: {"mean": float(mean), "var": float(variance), "rate": float(rate)}
+        for name, mean, variance, rate in zip(components, means, variances, rates)
+    }
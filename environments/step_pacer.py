@@ -0,0 +1,149 @@
+# environments/step_pacer.py
+
+import logging
+import time
+
+import numpy as np
+
+# Histogram bin edges in milliseconds for wake-up jitter and overruns
+JITTER_BINS_MS = (0.0, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, np.inf)
+OVERRUN_BINS_MS = (0.0, 1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0, np.inf)
+
+
+class StepPacer:
+    """
+    Paces environment steps to a fixed control rate.
+
+    Each call to wait() blocks until the current tick's deadline and then moves the
+    deadline one period ahead. A call that arrives after its deadline is an overrun:
+    it returns at once and the schedule restarts from now instead of bursting to
+    catch up. Idle time before a deadline is offered to registered idle hooks.
+    """
+
+    def __init__(self, rate_hz=10.0, spin_threshold=0.002, idle_min=0.005):
+        """
+        Initializes the StepPacer.
+
+        Args:
+            rate_hz (float): Target steps per second.
+            spin_threshold (float): Remaining time below which wait() busy-waits for the deadline.
+            idle_min (float): Minimum remaining time in seconds for an idle hook to be run.
+        """
+        if rate_hz <= 0:
+            raise ValueError(f"rate_hz must be positive, got {rate_hz}.")
+        self.period = 1.0 / rate_hz
+        self.spin_threshold = spin_threshold
+        self.idle_min = idle_min
+        self.idle_hooks = []
+        self._next_hook = 0
+
+        self.jitter_counts = np.zeros(len(JITTER_BINS_MS) - 1, dtype=np.int64)
+        self.overrun_counts = np.zeros(len(OVERRUN_BINS_MS) - 1, dtype=np.int64)
+        self.reset_stats()
+        self.reset()
+
+    def reset(self):
+        """
+        Restarts the schedule so the next wait() returns immediately. Statistics are kept.
+        """
+        self.deadline = None
+
+    def reset_stats(self):
+        """
+        Clears all counters and histograms.
+        """
+        self.ticks = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.max_jitter = 0.0
+        self.max_overrun = 0.0
+        self.jitter_sum = 0.0
+        self.idle_time = 0.0
+        self.jitter_counts[:] = 0
+        self.overrun_counts[:] = 0
+
+    def add_idle_hook(self, hook):
+        """
+        Registers a callable run with spare time before a deadline, e.g. a log flush.
+        Hooks are run one at a time in turn and should return quickly.
+
+        Args:
+            hook (callable): Function called without arguments.
+        """
+        self.idle_hooks.append(hook)
+
+    def _run_idle_hooks(self):
+        attempts = len(self.idle_hooks)
+        while attempts and self.deadline - time.perf_counter() > self.idle_min:
+            hook = self.idle_hooks[self._next_hook % len(self.idle_hooks)]
+            self._next_hook += 1
+            attempts -= 1
+            try:
+                hook()
+            except Exception as e:
+                logging.error(f"Error in idle hook {hook}: {e}")
+
+    def wait(self):
+        """
+        Blocks until the current tick's deadline.
+
+        Returns:
+            float: Seconds the call was late: the overrun if it arrived after the
+                deadline, otherwise the wake-up jitter.
+        """
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.period
+            return 0.0
+
+        self.ticks += 1
+        if now > self.deadline:
+            # The previous tick's work did not fit in the period
+            overrun = now - self.deadline
+            self.overruns += 1
+            self.missed_ticks += int(overrun // self.period)
+            self.max_overrun = max(self.max_overrun, overrun)
+            self.overrun_counts[np.searchsorted(OVERRUN_BINS_MS, overrun * 1000, side="right") - 1] += 1
+            self.deadline = now + self.period
+            return overrun
+
+        idle_start = now
+        if self.idle_hooks:
+            self._run_idle_hooks()
+        remaining = self.deadline - time.perf_counter()
+        if remaining > self.spin_threshold:
+            time.sleep(remaining - self.spin_threshold)
+        while time.perf_counter() < self.deadline:
+            pass  # Busy-wait the last moment for precise timing
+
+        woke = time.perf_counter()
+        jitter = woke - self.deadline
+        self.idle_time += woke - idle_start
+        self.jitter_sum += jitter
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.jitter_counts[np.searchsorted(JITTER_BINS_MS, jitter * 1000, side="right") - 1] += 1
+        self.deadline += self.period
+        return jitter
+
+    def get_stats(self):
+        """
+        Returns pacing statistics.
+
+        Returns:
+            dict: Target rate, tick and overrun counts, jitter and overrun summaries in
+                milliseconds, idle seconds and histograms as {"edges_ms", "counts"}.
+        """
+        on_time = self.ticks - self.overruns
+        return {
+            "rate_hz": 1.0 / self.period,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "overrun_rate": self.overruns / self.ticks if self.ticks else 0.0,
+            "missed_ticks": self.missed_ticks,
+            "mean_jitter_ms": self.jitter_sum / on_time * 1000 if on_time else 0.0,
+            "max_jitter_ms": self.max_jitter * 1000,
+            "max_overrun_ms": self.max_overrun * 1000,
+            "idle_time": self.idle_time,
+            "jitter_histogram": {"edges_ms": list(JITTER_BINS_MS), "counts": self.jitter_counts.tolist()},
+            "overrun_histogram": {"edges_ms": list(OVERRUN_BINS_MS), "counts": self.overrun_counts.tolist()},
+        }
@@ -0,0 +1,52 @@
+# environments/step_timer.py
+
+import time
+
+
+class StepTimer:
+    """
+    Splits one environment step into consecutive monotonic-clock spans.
+
+    start() begins a step; each mark(name) closes the span since the previous mark
+    (or start) under that name, adding to it if the name repeats; finish() adds the
+    'total' span and returns the spans in seconds.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.spans = {}
+        self._start = self._last = time.perf_counter()
+
+    def start(self):
+        self.spans = {}  # New dict per step, since it is handed out in info
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.spans[name] = self.spans.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self):
+        self.spans["total"] = time.perf_counter() - self._start
+        return self.spans
+
+
+class NullStepTimer:
+    """
+    Disabled StepTimer: every call is a no-op and finish() returns None.
+    """
+
+    enabled = False
+
+    def start(self):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def finish(self):
+        return None
+
+
+NULL_STEP_TIMER = NullStepTimer()
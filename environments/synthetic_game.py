@@ -0,0 +1,331 @@
+# environments/synthetic_game.py
+
+import logging
+import time
+
+import cv2
+import numpy as np
+from environments.hud_layout import REFERENCE_RESOLUTION
+from utilities.action_registry import ACTION_REGISTRY
+
+# Absolute bar regions of HUDManager's default layout at REFERENCE_RESOLUTION
+DEFAULT_BAR_REGIONS = {
+    "player_health": {"start": (109, 96), "width": 207, "height": 18},
+    "target_health": {"start": (371, 92), "width": 161, "height": 20},
+}
+
+# BGRA colours classified as bar fill and bar background by the default colour profile
+BAR_FILL_COLOR = (40, 40, 200, 255)
+BAR_EMPTY_COLOR = (30, 30, 30, 255)
+
+# Target damage dealt by each combat action, by action name
+DEFAULT_ACTION_DAMAGE = {
+    "attack": 0.05,
+    "use_skill_1": 0.08,
+    "use_skill_2": 0.10,
+    "use_skill_3": 0.12,
+    "use_skill_4": 0.15,
+}
+
+
+class SyntheticGame:
+    """
+    Minimal in-process stand-in for the game.
+
+    Input changes the game state immediately: movement and camera actions move the
+    view, find_target spawns a target and combat actions damage it (skills go on
+    cooldown). The game advances one tick per rendered frame, during which a live
+    target hits the player and the player regenerates out of combat.
+    """
+
+    def __init__(self, registry=ACTION_REGISTRY, action_damage=None, skill_cooldown=5, target_damage=0.01,
+                 regeneration=0.005, seed=None):
+        """
+        Initializes the SyntheticGame.
+
+        Args:
+            registry (ActionRegistry): Registry used to resolve action indices.
+            action_damage (dict, optional): Action name -> target damage. Defaults to DEFAULT_ACTION_DAMAGE.
+            skill_cooldown (int): Ticks before a skill can damage the target again.
+            target_damage (float): Player health lost per tick while a target is alive.
+            regeneration (float): Player health regained per tick without a target.
+            seed (int, optional): Seed for the spawn positions of targets.
+        """
+        self.registry = registry
+        action_damage = DEFAULT_ACTION_DAMAGE if action_damage is None else action_damage
+        self.damage = {registry.index(name): damage for name, damage in action_damage.items() if name in registry.indices}
+        self.cooldown_actions = {index for index in self.damage if registry.get(index).group == "skill"}
+        self.skill_cooldown = skill_cooldown
+        self.target_damage = target_damage
+        self.regeneration = regeneration
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        """
+        Starts a new episode with full player health and no target.
+        """
+        self.tick_count = 0
+        self.player_health = 1.0
+        self.target_health = 0.0
+        self.target_position = 0
+        self.position = np.zeros(2, dtype=np.int64)
+        self.yaw = 0
+        self.pitch = 0
+        self.cooldowns = {}
+
+    def apply(self, action):
+        """
+        Applies a single action.
+
+        Args:
+            action (int or str): Action index or name.
+        """
+        compiled = self.registry.get(action)
+        if compiled is None:
+            return
+        if compiled.sequence is not None:
+            for _, index, _ in compiled.sequence:
+                self.apply(index)
+            return
+
+        name = compiled.name
+        if name == "move_forward":
+            self.position[1] += 1
+        elif name == "move_backward":
+            self.position[1] -= 1
+        elif name == "move_left":
+            self.position[0] -= 1
+        elif name == "move_right":
+            self.position[0] += 1
+        elif name == "camera_left":
+            self.yaw -= 8
+        elif name == "camera_right":
+            self.yaw += 8
+        elif name == "camera_up":
+            self.pitch = min(self.pitch + 4, 40)
+        elif name == "camera_down":
+            self.pitch = max(self.pitch - 4, -40)
+        elif name == "find_target":
+            if self.target_health <= 0:
+                self.target_health = 1.0
+                self.target_position = int(self.rng.integers(-200, 200))
+        elif compiled.index in self.damage and self.target_health > 0:
+            if self.cooldowns.get(compiled.index, 0) <= self.tick_count:
+                self.target_health = max(self.target_health - self.damage[compiled.index], 0.0)
+                if compiled.index in self.cooldown_actions:
+                    self.cooldowns[compiled.index] = self.tick_count + self.skill_cooldown
+
+    def tick(self):
+        """
+        Advances the game by one frame.
+        """
+        self.tick_count += 1
+        if self.player_health <= 0:
+            return
+        if self.target_health > 0:
+            self.player_health = max(self.player_health - self.target_damage, 0.0)
+        else:
+            self.player_health = min(self.player_health + self.regeneration, 1.0)
+
+
+class SyntheticCapture:
+    """
+    Capture backend that renders SyntheticGame frames in process.
+
+    Frames are BGRA like the screen capturer's, with the health bars drawn at the
+    real HUD coordinates and a simple scene that moves with the camera, position
+    and target. Only the scene and bars are redrawn per frame; the returned array is
+    reused and stays valid until the next grab().
+    """
+
+    def __init__(self, game, resolution=REFERENCE_RESOLUTION, bar_regions=None, seed=0):
+        """
+        Initializes the SyntheticCapture.
+
+        Args:
+            game (SyntheticGame): Game to render.
+            resolution (tuple): (width, height) of the rendered frames.
+            bar_regions (dict, optional): Absolute bar regions at `resolution`. Defaults to
+                DEFAULT_BAR_REGIONS scaled from the reference resolution.
+            seed (int): Seed for the static background texture.
+        """
+        self.game = game
+        self.size = (int(resolution[0]), int(resolution[1]))
+        width, height = self.size
+        if bar_regions is None:
+            scale_x = width / REFERENCE_RESOLUTION[0]
+            scale_y = height / REFERENCE_RESOLUTION[1]
+            bar_regions = {
+                name: {
+                    "start": (int(round(region["start"][0] * scale_x)), int(round(region["start"][1] * scale_y))),
+                    "width": max(int(round(region["width"] * scale_x)), 1),
+                    "height": max(int(round(region["height"] * scale_y)), 1),
+                }
+                for name, region in DEFAULT_BAR_REGIONS.items()
+            }
+        self.bar_regions = bar_regions
+        self.geometry_listeners = []
+
+        # Static background: coarse noise upscaled to the frame size
+        rng = np.random.default_rng(seed)
+        coarse = rng.integers(20, 90, (height // 16 + 1, width // 16 + 1, 1), dtype=np.uint8)
+        texture = np.repeat(np.repeat(coarse, 16, axis=0), 16, axis=1)[:height, :width]
+        self.background = np.empty((height, width, 4), dtype=np.uint8)
+        self.background[:, :, :3] = texture
+        self.background[:, :, 3] = 255
+        self.frame = self.background.copy()
+
+        # Scene band in the middle of the screen, redrawn every frame
+        self.scene_rows = slice(height // 3, 2 * height // 3)
+        self.scene_texture = np.ascontiguousarray(np.tile(self.background[self.scene_rows], (1, 2, 1)))
+        self._scene_key = None
+
+        # Counters
+        self.grab_count = 0
+        self.total_grab_time = 0.0
+        self.max_grab_time = 0.0
+
+    def add_geometry_listener(self, listener):
+        """
+        Registers a callback invoked with (width, height) when the size changes.
+        """
+        self.geometry_listeners.append(listener)
+
+    def _draw_bar(self, region, fraction):
+        x, y = region["start"]
+        width, height = region["width"], region["height"]
+        filled = int(round(width * min(max(fraction, 0.0), 1.0)))
+        self.frame[y:y + height, x:x + filled] = BAR_FILL_COLOR
+        self.frame[y:y + height, x + filled:x + width] = BAR_EMPTY_COLOR
+
+    def _draw_scene(self):
+        game = self.game
+        width = self.size[0]
+        shift = int(game.yaw + game.position[0] * 4) % width
+        brightness = int(game.position[1] * 3 + game.pitch) % 64  # Follows forward position and camera pitch
+        center = (width // 2 + game.target_position - game.yaw) % width if game.target_health > 0 else None
+        key = (shift, brightness, center)
+        if key == self._scene_key:
+            return  # Nothing in the scene moved
+        self._scene_key = key
+
+        rows = self.frame[self.scene_rows]
+        cv2.add(self.scene_texture[:, shift:shift + width], (brightness, 0, 0, 0), dst=rows)
+        if center is not None:
+            x0, x1 = max(center - 20, 0), min(center + 20, width)
+            middle, half_height = rows.shape[0] // 2, max(rows.shape[0] // 8, 1)
+            rows[middle - half_height:middle + half_height, x0:x1] = (30, 30, 160, 255)
+
+    def grab(self):
+        """
+        Advances the game one tick and renders a frame.
+
+        Returns:
+            np.ndarray: BGRA frame of shape (height, width, 4).
+        """
+        start = time.perf_counter()
+        self.game.tick()
+        self._draw_scene()
+        self._draw_bar(self.bar_regions["player_health"], self.game.player_health)
+        self._draw_bar(self.bar_regions["target_health"], self.game.target_health)
+
+        duration = time.perf_counter() - start
+        self.grab_count += 1
+        self.total_grab_time += duration
+        self.max_grab_time = max(self.max_grab_time, duration)
+        return self.frame
+
+    def get_timing_stats(self):
+        """
+        Returns render timing statistics.
+
+        Returns:
+            dict: Grab counts and timings in milliseconds.
+        """
+        mean_grab_time = self.total_grab_time / self.grab_count if self.grab_count else 0.0
+        return {
+            "grabs": self.grab_count,
+            "failures": 0,
+            "mean_ms": mean_grab_time * 1000,
+            "max_ms": self.max_grab_time * 1000,
+        }
+
+    def close(self):
+        pass
+
+
+class SyntheticInput:
+    """
+    Input backend that applies actions to a SyntheticGame immediately.
+
+    It has the InputDispatcher interface, so the env can use it in place of the
+    real dispatcher.
+    """
+
+    realtime = False  # Macros are applied at once, so there is nothing to wait for
+
+    def __init__(self, game, registry=None):
+        """
+        Initializes the SyntheticInput.
+
+        Args:
+            game (SyntheticGame): Game receiving the input.
+            registry (ActionRegistry, optional): Registry actions are looked up in. Defaults to the game's.
+        """
+        self.game = game
+        self.registry = game.registry if registry is None else registry
+        self.dispatched_count = 0
+
+    def dispatch(self, action, hold_duration=None, delay=0.0):
+        """
+        Applies an action.
+
+        Returns:
+            bool: True if the action is registered.
+        """
+        return self.dispatch_chord((action,))
+
+    def dispatch_chord(self, actions, hold_duration=None, delay=0.0):
+        """
+        Applies several actions together.
+
+        Returns:
+            bool: True if every action is registered.
+        """
+        compiled = [self.registry.get(action) for action in actions]
+        if None in compiled:
+            logging.warning(f"Unknown action in {list(actions)}.")
+            return False
+        for action in compiled:
+            self.game.apply(action.index)
+            self.dispatched_count += 1
+        return True
+
+    def reset(self):
+        """
+        Starts a new game episode.
+        """
+        self.game.reset()
+
+    def stop(self, timeout=1.0):
+        pass
+
+    def get_stats(self):
+        return {"dispatched": self.dispatched_count}
+
+
+def make_synthetic_backends(resolution=REFERENCE_RESOLUTION, registry=ACTION_REGISTRY, seed=None):
+    """
+    Creates a synthetic game with matching capture and input backends.
+
+    Args:
+        resolution (tuple): (width, height) of the rendered frames.
+        registry (ActionRegistry): Registry used to resolve actions.
+        seed (int, optional): Seed for the game.
+
+    Returns:
+        tuple: (SyntheticCapture, SyntheticInput).
+    """
+    game = SyntheticGame(registry=registry, seed=seed)
+    return SyntheticCapture(game, resolution=resolution), SyntheticInput(game, registry=registry)
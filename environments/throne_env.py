@@ -5,13 +5,19 @@ import time
 
 import gymnasium as gym
 import numpy as np
-import pyautogui
 from gymnasium import spaces
-from utilities.input_handler import perform_action
-from environments.hud_manager import HUDManager
+from utilities.input_handler import perform_action, send_action, send_sequence, InputDispatcher
+from utilities.action_registry import ACTION_REGISTRY, ActionHeads, DEFAULT_ACTION_HEADS, IDLE_ACTION
+from utilities.macros import load_macros, register_macros
+from environments.hud_manager import HUDManager, DEFAULT_CACHE_DIR
+from environments.frame_pipeline import FramePipeline
+from environments.step_pacer import StepPacer
+from environments.step_timer import StepTimer, NULL_STEP_TIMER
+from utilities.step_logging import ACTION_LOG, StepEventStream
 from environments.movement_manager import MovementManager
 from environments.combat_manager import CombatManager
 from environments.reward_manager import RewardManager
+from environments.synthetic_game import make_synthetic_backends
 
 class ThroneAndLibertyEnv(gym.Env):
     """
@@ -20,15 +26,61 @@ class ThroneAndLibertyEnv(gym.Env):
 
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, window_title="TL 1.281.22.935", resized_size=(160, 90)):
+    def __init__(self, window_title="TL 1.281.22.935", resized_size=(160, 90), capture_mode="sync", input_mode="async",
+                 action_mode="discrete", action_heads=DEFAULT_ACTION_HEADS, macros_path=None,
+                 control_hz=None, backend="live", capture_backend=None, input_backend=None, timing=False,
+                 step_events_path=None, copy_observations=True, cache_dir=None):
         """
         Initializes the ThroneAndLiberty Environment.
 
         Args:
             window_title (str): Title of the game window to capture.
             resized_size (tuple): Desired size for resized observations.
+            capture_mode (str): "sync" or "background" frame capture (see HUDManager).
+            input_mode (str): "async" to send input from a background InputDispatcher, waiting only
+                until the action's keys are down, or "blocking" to use perform_action.
+            action_mode (str): "discrete" for one action per step (Discrete), or "multi_discrete"
+                to choose one action per head and send them together (MultiDiscrete).
+            action_heads (sequence): (head name, action names) pairs used in "multi_discrete" mode.
+            macros_path (str, optional): JSON file of macros (see utilities.macros) added as extra
+                discrete actions.
+            control_hz (float, optional): Paces steps to this fixed rate with a StepPacer.
+                Steps run as fast as possible if None.
+            backend (str): "live" to capture and control the game window, or "synthetic" to run
+                against an in-process SyntheticGame without a display.
+            capture_backend (optional): Custom capture backend passed to HUDManager. Overrides `backend`.
+            input_backend (optional): Custom input backend with the InputDispatcher interface
+                (dispatch, dispatch_chord, stop). Overrides `backend` and `input_mode`.
+            timing (bool): Times the stages of each step and adds their durations in seconds to
+                info['timings'] ('wait', 'input', 'capture', 'observation', 'hud', 'reward', 'total').
+            step_events_path (str, optional): JSONL file a compact event is appended to for every step
+                (see StepEventStream). No events are written if None.
+            cache_dir (str, optional): Directory for HUD caches and calibrations (see HUDManager).
+                Defaults to DEFAULT_CACHE_DIR when capturing the live game; other capture backends
+                cache nothing.
+            copy_observations (bool): Returns a copy of each observation. If False, observations are
+                the ObservationBuilder's rotating buffers, which are overwritten two steps later; only
+                disable this under a consumer that copies every observation at once, such as an SB3 VecEnv
+                (create_wrapped_env does). Copying is the default because a caller keeping observations,
+                e.g. for a frame stack or a replay buffer, would otherwise see them change silently. The
+                copy is of the downscaled observation, not the captured frame: about 1.5 us at 160x90.
         """
         super().__init__()
+        self.action_registry = ACTION_REGISTRY
+        if macros_path is not None:
+            self.action_registry = ACTION_REGISTRY.copy()
+            register_macros(self.action_registry, load_macros(macros_path))
+
+        if backend == "synthetic":
+            synthetic_capture, synthetic_input = make_synthetic_backends(registry=self.action_registry)
+            capture_backend = synthetic_capture if capture_backend is None else capture_backend
+            input_backend = synthetic_input if input_backend is None else input_backend
+        elif backend != "live":
+            raise ValueError(f"Unknown backend '{backend}'")
+        self.backend = backend
+        if cache_dir is None and capture_backend is None:
+            cache_dir = DEFAULT_CACHE_DIR  # Keep the live game's calibration across runs
+
         # Initialize managers with correct parameters
         self.hud_manager = HUDManager(
             hud_regions={
@@ -36,8 +88,34 @@ class ThroneAndLibertyEnv(gym.Env):
                 "target_hud": {"start": (339, 59), "width": 232, "height": 119},
             },
             resized_size=resized_size,
-            window_title=window_title
+            window_title=window_title,
+            capture_mode=capture_mode,
+            capture_backend=capture_backend,
+            cache_dir=cache_dir
         )
+        if self.hud_manager.calibrator is not None and self.hud_manager.calibration is None:
+            self.hud_manager.calibrate_hud()  # Once; a cached calibration is used when available
+        self.frame_pipeline = FramePipeline(self.hud_manager)
+        self.input_mode = input_mode
+        self.pacer = StepPacer(control_hz) if control_hz else None
+        self.step_timer = StepTimer() if timing else NULL_STEP_TIMER
+        self.step_events = None
+        if step_events_path is not None:
+            if self.pacer is not None:
+                # Events are written in the pacer's idle time; the thread only catches up after overruns
+                self.step_events = StepEventStream(step_events_path, flush_interval=5.0)
+                self.pacer.add_idle_hook(self.step_events.flush)
+            else:
+                self.step_events = StepEventStream(step_events_path)
+        self._last_action = None
+        self._macro_end = None  # time.perf_counter() value until which a dispatched macro plays
+        self.copy_observations = copy_observations
+        if input_backend is not None:
+            self.input_dispatcher = input_backend
+        elif input_mode == "async":
+            self.input_dispatcher = InputDispatcher(window_title=window_title, registry=self.action_registry)
+        else:
+            self.input_dispatcher = None
         self.movement_manager = MovementManager()
         self.combat_manager = CombatManager()
         self.reward_manager = RewardManager(self.hud_manager, self.movement_manager, self.combat_manager)
@@ -50,7 +128,13 @@ class ThroneAndLibertyEnv(gym.Env):
             shape=(resized_size[1], resized_size[0], 3),
             dtype=np.uint8
         )
-        self.action_space = spaces.Discrete(16)
+        self.action_mode = action_mode
+        self.action_heads = None
+        if action_mode == "multi_discrete":
+            self.action_heads = ActionHeads(action_heads)
+            self.action_space = spaces.MultiDiscrete(self.action_heads.nvec)
+        else:
+            self.action_space = spaces.Discrete(len(self.action_registry))
 
         # Initialize other necessary variables
         self.current_step = 0
@@ -69,16 +153,28 @@ class ThroneAndLibertyEnv(gym.Env):
         # Reset managers
         self.movement_manager.reset()
         self.combat_manager.reset()
+        self.frame_pipeline.reset()
+        if hasattr(self.input_dispatcher, "reset"):
+            self.input_dispatcher.reset()  # Restarts a synthetic game
+        if self.pacer is not None:
+            self.pacer.reset()
+        self._macro_end = None
         # Clear any recurrent states if necessary
         state = self._get_state()
-        return state["screen"], {}
+        if self.hud_manager.recalibration_pending:
+            # The HUD moved; search for it between episodes rather than inside a step
+            self.hud_manager.calibrate_hud((self.frame_pipeline.last_frame or {}).get("raw_screen"))
+        return self._observation(state), {}
 
     def step(self, action):
         """
         Executes one time step within the environment.
 
         Args:
-            action (int): An action provided by the agent.
+            action (int or np.ndarray): An action index, or one choice per head in
+                "multi_discrete" mode. IDLE_ACTION advances one frame without input (see step_idle()).
+                While a macro dispatched by an earlier step is still playing, the action is skipped,
+                the step is an idle step and info['macro_playing'] is True.
 
         Returns:
             tuple: A tuple containing:
@@ -88,35 +184,188 @@ class ThroneAndLibertyEnv(gym.Env):
                 - truncated (bool): Whether the episode was truncated.
                 - info (dict): Contains auxiliary diagnostic information.
         """
+        if np.ndim(action) == 0 and action is not None and action == IDLE_ACTION:
+            return self.step_idle()
+        if self._macro_end is not None:
+            if time.perf_counter() < self._macro_end:
+                # Input would interleave with the macro's remaining steps, so only observe
+                ACTION_LOG.debug("Macro playing, skipping action: %s", action)
+                observation, reward, terminated, truncated, info = self.step_idle()
+                info["macro_playing"] = True
+                return observation, reward, terminated, truncated, info
+            self._macro_end = None
+        timer = self.step_timer
+        timer.start()
+        self._last_action = action
         try:
             # Map and execute the action
             if action is None:
                 current_position = self._get_player_position()
                 movement_action = self.movement_manager.move_toward(current_position)
                 action = self._map_action_name_to_index(movement_action)
-            action_name = self._map_action(action)
-            logging.info(f"Performing action: {action_name}")
-            perform_action(action_name, window_title=self.hud_manager.window_title)  # Use window_title from HUDManager
-
-            # Get the current state
-            state = self._get_state()
-
-            # Check if a new target is acquired
-            if state["target_hud_data"].get("health", 1.0) > 0 and not self.combat_manager.target_killed:
-                self.combat_manager.target_acquired()
+            if self.pacer is not None:
+                self.pacer.wait()  # Send the action on the next control tick
+            timer.mark("wait")
+            if self.action_heads is not None and np.ndim(action) > 0:
+                # Send every head's action together as one chord
+                chord = self.action_heads.chord(action)
+                action_name = "+".join(self._map_action(index) for index in chord) or "noop"
+                ACTION_LOG.info("Performing action: %s", action_name)
+                if self.input_dispatcher is not None:
+                    self.input_dispatcher.dispatch_chord(chord)
+                    self._wait_until_pressed()
+                elif chord:
+                    perform_action(list(chord), window_title=self.hud_manager.window_title)
+            else:
+                action_name = self._map_action(action)
+                ACTION_LOG.info("Performing action: %s", action_name)
+                if self.input_dispatcher is not None:
+                    self.input_dispatcher.dispatch(action)
+                    self._wait_until_pressed()
+                else:
+                    perform_action(action, window_title=self.hud_manager.window_title,
+                                   registry=self.action_registry)  # Use window_title from HUDManager
 
-            # Calculate reward and check if the episode is done
-            reward = self.reward_manager.calculate_reward(state)
-            terminated = self._check_done(state)
-            truncated = False  # You can set conditions for truncation if needed
+                macro = self.action_registry.get(action)
+                if (macro is not None and macro.sequence is not None and self.input_dispatcher is not None
+                        and getattr(self.input_dispatcher, "realtime", True)):
+                    # The dispatcher plays the sequence; later steps observe until it has finished
+                    self._macro_end = time.perf_counter() + macro.hold
+            action_time = time.perf_counter()
+            timer.mark("input")
 
-            return state["screen"], reward, terminated, truncated, {}
+            # Get the current state from a frame captured after the action was sent
+            return self._transition(after=action_time)
 
         except Exception as e:
             logging.error(f"Error during step execution: {e}")
             # Return a random observation, negative reward, and end the episode
             return self.observation_space.sample(), -10, True, False, {}
 
+    def _wait_until_pressed(self):
+        """
+        Waits until the dispatcher has sent the action's keys, so the next capture shows its effect.
+        """
+        wait = getattr(self.input_dispatcher, "wait_until_pressed", None)
+        if wait is not None and not wait():
+            logging.warning("Action keys were not sent before the observation was captured.")
+
+    def step_idle(self):
+        """
+        Advances one frame without sending input, e.g. while a previous action is still in effect.
+
+        Returns:
+            tuple: Same as step().
+        """
+        self.step_timer.start()
+        self._last_action = None
+        try:
+            if self.pacer is not None:
+                self.pacer.wait()
+            self.step_timer.mark("wait")
+            return self._transition(after=time.perf_counter())
+        except Exception as e:
+            logging.error(f"Error during idle step execution: {e}")
+            return self.observation_space.sample(), -10, True, False, {}
+
+    def _transition(self, after=None):
+        """
+        Observes a new frame and computes its reward and termination.
+
+        Args:
+            after (float, optional): time.perf_counter() value the frame must be captured after.
+
+        Returns:
+            tuple: (observation, reward, terminated, truncated, info).
+        """
+        timer = self.step_timer
+        state = self._get_state(after=after, timer=timer)
+
+        # Check if a new target is acquired
+        if state["target_hud_data"].get("health", 1.0) > 0 and not self.combat_manager.target_killed:
+            self.combat_manager.target_acquired(now=state["timestamp"])
+
+        # Calculate reward and check if the episode is done
+        reward = self.reward_manager.calculate_reward(state)
+        terminated = self._check_done(state)
+        truncated = False  # You can set conditions for truncation if needed
+        timer.mark("reward")
+
+        info = {"frame_id": state["frame_id"]}
+        if timer.enabled:
+            info["timings"] = timer.finish()
+        if self.step_events is not None:
+            self._emit_step_event(state, reward, terminated, info)
+        return self._observation(state), reward, terminated, truncated, info
+
+    def _observation(self, state):
+        """
+        Returns the state's observation, copied out of the reused buffer unless copy_observations is False.
+        """
+        return state["screen"].copy() if self.copy_observations else state["screen"]
+
+    def _emit_step_event(self, state, reward, terminated, info):
+        """
+        Queues the step's event on the step event stream.
+        """
+        action = self._last_action
+        self.step_events.emit({
+            "time": time.time(),
+            "frame_id": state["frame_id"],
+            "action": np.asarray(action).tolist() if action is not None else None,
+            "reward": float(reward),
+            "terminated": bool(terminated),
+            "player_health": state["player_hud_data"].get("health"),
+            "target_health": state["target_hud_data"].get("health"),
+            "timings": info.get("timings"),
+        })
+
+    def get_pacing_stats(self, reset=False):
+        """
+        Returns the step pacing statistics (see StepPacer.get_stats()).
+
+        Args:
+            reset (bool): Clears the statistics after reading them.
+
+        Returns:
+            dict or None: Pacing statistics, or None if steps are not paced (no control_hz).
+        """
+        if self.pacer is None:
+            return None
+        stats = self.pacer.get_stats()
+        if reset:
+            self.pacer.reset_stats()
+        return stats
+
+    def drain_reward_components(self):
+        """
+        Returns the reward components recorded since the previous call (see RewardTelemetry.drain()).
+
+        Returns:
+            np.ndarray: Array of shape (len(REWARD_COMPONENTS), steps).
+        """
+        return self.reward_manager.telemetry.drain()
+
+    def reserve_reward_telemetry(self, steps):
+        """
+        Grows the reward telemetry buffer to hold `steps` steps between drains (see RewardTelemetry.reserve()).
+
+        Args:
+            steps (int): Steps recorded between two drain_reward_components() calls, e.g. per rollout.
+        """
+        self.reward_manager.telemetry.reserve(steps)
+
+    def close(self):
+        """
+        Stops frame capture and input dispatch and releases capture handles.
+        """
+        if self.input_dispatcher is not None:
+            self.input_dispatcher.stop()
+        if self.step_events is not None:
+            self.step_events.close()
+        self.hud_manager.close()
+        super().close()
+
     def _get_player_position(self):
         """
         Placeholder to retrieve the player's current position.
@@ -127,45 +376,42 @@ class ThroneAndLibertyEnv(gym.Env):
         """
         return (0, 0)  # Example position
 
-    def _get_state(self):
+    def _get_state(self, after=None, timer=NULL_STEP_TIMER):
         """
-        Retrieve the current state by processing the HUD.
+        Retrieve the current state from a single captured frame.
+
+        Args:
+            after (float, optional): time.perf_counter() value the frame must be captured after.
+            timer (StepTimer): Timer marked with the frame pipeline's spans.
 
         Returns:
             dict: Current state containing screen observation and HUD data.
         """
-        hud_data = self.hud_manager.process_hud()
+        frame = self.frame_pipeline.next_frame(after=after, timer=timer)
+        hud_data = frame["hud_data"]
         player_hud_data = hud_data.get("player_hud", {})
         target_hud_data = hud_data.get("target_hud", {})
-        screen_observation = self.hud_manager.get_screen_observation()
 
         return {
-            "screen": screen_observation,
+            "frame_id": frame["frame_id"],
+            "timestamp": frame["timestamp"],
+            "screen": frame["screen"],
             "player_hud_data": player_hud_data,
             "target_hud_data": target_hud_data,
             "info": hud_data.get("info", {})
         }
 
     def _map_action(self, action):
-        action_mapping = {
-            0: "move_forward",
-            1: "move_backward",
-            2: "move_left",
-            3: "move_right",
-            4: "jump",
-            5: "camera_up",
-            6: "camera_down",
-            7: "attack",
-            8: "use_skill_1",
-            9: "use_skill_2",
-            10: "use_skill_3",
-            11: "use_skill_4",
-            12: "find_target",
-            13: "camera_left",
-            14: "camera_right",
-            15: "interact",
-        }
-        return action_mapping.get(action, "unknown_action")
+        """
+        Map an action index to its name.
+
+        Args:
+            action (int): The action index.
+
+        Returns:
+            str: The action name, or "unknown_action".
+        """
+        return self.action_registry.name(action)
 
     def _map_action_name_to_index(self, action_name):
         """
@@ -177,25 +423,7 @@ class ThroneAndLibertyEnv(gym.Env):
         Returns:
             int: The corresponding action index.
         """
-        action_mappings = {
-            "move_forward": 'w',
-            "move_backward": 's',
-            "move_left": 'a',
-            "move_right": 'd',
-            "jump": 'space',
-            "camera_up": 'up',  # Move camera angle up
-            "camera_down": 'down',  # Move camera angle down
-            "camera_left": 'left',  # Move camera angle left
-            "camera_right": 'right',  # Move camera angle right
-            "attack": 'leftclick',  # Perform attack
-            "use_skill_1": '1',  # Cast skill 1
-            "use_skill_2": '2',  # Cast skill 2
-            "use_skill_3": '3',  # Cast skill 3
-            "use_skill_4": '4',  # Cast skill 4
-            "find_target": 'tab',  # Tab to find a target
-            "interact": 'f'  # Interact with objects
-        }
-        return action_mappings.get(action_name, 0)  # Default to 0 if not found
+        return self.action_registry.index(action_name, default=0)  # Default to 0 if not found
 
     def _check_done(self, state):
         """
@@ -214,7 +442,7 @@ class ThroneAndLibertyEnv(gym.Env):
         Executes the specified action in the game window.
 
         Args:
-            action_name (str): The action to perform.
+            action_name (str or int): The action name or index to perform.
         """
         try:
             # Bring the game window to the foreground
@@ -228,48 +456,14 @@ class ThroneAndLibertyEnv(gym.Env):
             window.activate()
             time.sleep(0.1)  # Allow some time for the window to activate
 
-            # Define action mappings
-            action_mappings = {
-                "move_forward": 'w',
-                "move_backward": 's',
-                "move_left": 'a',
-                "move_right": 'd',
-                "jump": 'space',
-                "camera_up": 'up',  # Move camera angle up
-                "camera_down": 'down',  # Move camera angle down
-                "camera_left": 'left',  # Move camera angle left
-                "camera_right": 'right',  # Move camera angle right
-                "attack": 'leftclick',  # Perform attack
-                "use_skill_1": '1',  # Cast skill 1
-                "use_skill_2": '2',  # Cast skill 2
-                "use_skill_3": '3',  # Cast skill 3
-                "use_skill_4": '4',  # Cast skill 4
-                "find_target": 'tab',  # Tab to find a target
-                "interact": 'f'  # Interact with objects
-            }
-
-            keys = action_mappings.get(action_name, None)
-            if keys is None:
+            action = self.action_registry.get(action_name)
+            if action is None:
                 logging.warning(f"Unknown action '{action_name}'.")
                 return
-
-            if isinstance(keys, list):
-                for key in keys:
-                    if key == 'leftclick':
-                        pyautogui.click(button='left')
-                    else:
-                        pyautogui.keyDown(key)
-                time.sleep(0.1)  # Duration to hold the keys
-                for key in keys:
-                    if key != 'leftclick':
-                        pyautogui.keyUp(key)
+            if action.sequence is not None:
+                send_sequence(action, self.action_registry)
             else:
-                if keys == 'leftclick':
-                    pyautogui.click(button='left')
-                else:
-                    pyautogui.keyDown(keys)
-                    time.sleep(0.1)
-                    pyautogui.keyUp(keys)
+                send_action(action)
 
         except Exception as e:
             logging.error(f"Error executing action '{action_name}': {e}")
@@ -0,0 +1,389 @@
+# environments/trajectory_recorder.py
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import gymnasium as gym
+import numpy as np
+from environments.reward_manager import REWARD_COMPONENTS
+
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+
+
+def step_dtype(action_size, reward_components=REWARD_COMPONENTS):
+    """
+    Returns the structured dtype of one recorded step.
+
+    Args:
+        action_size (int): Number of action values per step, 1 for a Discrete action space.
+        reward_components (sequence): Names of the recorded reward components.
+
+    Returns:
+        np.dtype: Fields episode, step, frame_id, timestamp (capture wall time), step_time
+            (seconds spent in env.step), action (-1 on reset rows and idle frames), player_health,
+            target_health (NaN if not read), reward, terminated, truncated and components.
+    """
+    return np.dtype([
+        ("episode", np.int32),
+        ("step", np.int32),
+        ("frame_id", np.int64),
+        ("timestamp", np.float64),
+        ("step_time", np.float32),
+        ("action", np.int64, (action_size,)),
+        ("player_health", np.float32),
+        ("target_health", np.float32),
+        ("reward", np.float32),
+        ("terminated", np.bool_),
+        ("truncated", np.bool_),
+        ("components", np.float32, (len(reward_components),)),
+    ])
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """
+    Records frames, actions, HUD readings, reward components and timestamps.
+
+    Steps are staged in preallocated in-memory chunks. A full chunk is handed to a
+    background thread that writes it as a pair of .npy files (frames and steps) and
+    adds it to the directory's index, so step() only copies the frame. Only the
+    writer thread updates the index once recording has started. At most
+    `max_pending_chunks` full chunks wait for the writer; beyond that, step() blocks
+    until one is written, so memory stays bounded when the disk is slow. A reset is
+    recorded as a row with action -1 and the reset observation. Idle frames played by
+    FrameSkipWrapper are stepped with IDLE_ACTION and recorded with action -1 as well.
+    """
+
+    def __init__(self, env, path, frames="observation", chunk_size=1000, chunk_bytes=128 * 2 ** 20,
+                 max_pending_chunks=4):
+        """
+        Initializes the TrajectoryRecorder.
+
+        Args:
+            env (gym.Env): ThroneAndLibertyEnv to record, or a wrapper around it.
+            path (str): Directory the recording is written to. Appends to an existing recording.
+            frames (str): "observation" to record observations, "raw" for native-resolution
+                capture frames, or "none" to record no frames.
+            chunk_size (int): Maximum steps per chunk file.
+            chunk_bytes (int): Maximum frame bytes per chunk, which limits the steps per chunk for
+                large (e.g. raw) frames.
+            max_pending_chunks (int): Full chunks that may wait for the writer thread before
+                step() blocks, and chunk buffers kept for reuse.
+        """
+        super().__init__(env)
+        if frames not in ("observation", "raw", "none"):
+            raise ValueError(f"Unknown frames mode '{frames}'")
+        self.path = path
+        self.frames = frames
+        self.chunk_size = chunk_size
+        self.chunk_bytes = chunk_bytes
+        self.max_pending_chunks = max_pending_chunks
+        self.action_size = int(np.prod(env.action_space.shape)) if env.action_space.shape else 1
+        self.dtype = step_dtype(self.action_size)
+        self.frame_shape = tuple(env.observation_space.shape) if frames == "observation" else None
+        self.frame_dtype = np.uint8
+
+        os.makedirs(path, exist_ok=True)
+        self.index = self._load_index()
+        self.episode = max((chunk["last_episode"] for chunk in self.index["chunks"]), default=-1)
+        self.episode_step = 0
+        self.dropped_frames = 0
+        self.writer_stalls = 0  # Flushes that waited for the writer thread
+
+        self._free_chunks = queue.Queue()
+        self._chunk = None
+        self._row = 0
+        self._write_queue = queue.Queue(maxsize=max_pending_chunks)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _load_index(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                index = json.load(f)
+            if index.get("version") != FORMAT_VERSION or index.get("frames") != self.frames:
+                raise ValueError(f"Recording at {self.path} does not match this recorder's format.")
+            if index["frame_shape"] is not None:
+                self._set_frame_shape(index["frame_shape"])
+            return index
+        if self.frame_shape is not None:
+            self._set_frame_shape(self.frame_shape)
+        return {
+            "version": FORMAT_VERSION,
+            "frames": self.frames,
+            "frame_shape": list(self.frame_shape) if self.frame_shape is not None else None,
+            "frame_dtype": np.dtype(self.frame_dtype).str,
+            "step_dtype": np.lib.format.dtype_to_descr(self.dtype),
+            "reward_components": list(REWARD_COMPONENTS),
+            "length": 0,
+            "chunks": [],
+        }
+
+    def _set_frame_shape(self, frame_shape):
+        self.frame_shape = tuple(frame_shape)
+        frame_bytes = int(np.prod(self.frame_shape)) * np.dtype(self.frame_dtype).itemsize
+        self.chunk_size = max(min(self.chunk_size, self.chunk_bytes // frame_bytes), 1)
+
+    def _new_chunk(self):
+        try:
+            chunk = self._free_chunks.get_nowait()
+        except queue.Empty:
+            chunk = {"frames": None, "steps": np.zeros(self.chunk_size, dtype=self.dtype)}
+        if self.frame_shape is not None and (chunk["frames"] is None or len(chunk["frames"]) < self.chunk_size):
+            # New, or recycled from before the raw frame shape was known
+            chunk["frames"] = np.zeros((self.chunk_size,) + self.frame_shape, dtype=self.frame_dtype)
+        return chunk
+
+    def _frame_source(self, observation):
+        if self.frames == "observation":
+            return observation
+        if self.frames == "raw":
+            last_frame = self.env.unwrapped.frame_pipeline.last_frame
+            return None if last_frame is None else last_frame.get("raw_screen")
+        return None
+
+    def _record(self, observation, action, reward, terminated, truncated, step_time, components):
+        frame = self._frame_source(observation)
+        if self._chunk is None:
+            self._chunk = self._new_chunk()
+            self._row = 0
+        if self.frames == "raw" and self.frame_shape is None and frame is not None:
+            # Raw frames take the first capture's size; steps already staged stay in this chunk
+            self._set_frame_shape(frame.shape)
+            self.chunk_size = max(self.chunk_size, self._row + 1)
+            self._chunk["frames"] = np.zeros((self.chunk_size,) + self.frame_shape, dtype=self.frame_dtype)
+
+        row = self._chunk["steps"][self._row]
+        unwrapped = self.env.unwrapped
+        last_frame = unwrapped.frame_pipeline.last_frame or {}
+        hud_data = last_frame.get("hud_data", {})
+        row["episode"] = self.episode
+        row["step"] = self.episode_step
+        row["frame_id"] = last_frame.get("frame_id", -1)
+        row["timestamp"] = last_frame.get("timestamp", time.time())
+        row["step_time"] = step_time
+        row["action"] = action
+        row["player_health"] = hud_data.get("player_hud", {}).get("health", np.nan)
+        row["target_health"] = hud_data.get("target_hud", {}).get("health", np.nan)
+        row["reward"] = reward
+        row["terminated"] = terminated
+        row["truncated"] = truncated
+        row["components"] = components if components is not None else 0.0
+
+        if self._chunk["frames"] is not None:
+            if frame is not None and frame.shape == self.frame_shape:
+                self._chunk["frames"][self._row] = frame
+            else:
+                self._chunk["frames"][self._row] = 0
+                self.dropped_frames += 1
+
+        self._row += 1
+        if self._row == self.chunk_size:
+            self.flush()
+
+    def reset(self, **kwargs):
+        """
+        Resets the environment and records the initial observation.
+        """
+        observation, info = self.env.reset(**kwargs)
+        self.episode += 1
+        self.episode_step = 0
+        self._record(observation, -1, 0.0, False, False, 0.0, None)
+        return observation, info
+
+    def step(self, action):
+        """
+        Steps the environment and records the transition.
+        """
+        start = time.perf_counter()
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        step_time = time.perf_counter() - start
+        self.episode_step += 1
+        self._record(observation, action, reward, terminated, truncated, step_time,
+                     self.env.unwrapped.reward_manager.last_components)
+        return observation, reward, terminated, truncated, info
+
+    def flush(self):
+        """
+        Hands the current partial chunk to the writer thread. Returns immediately.
+        """
+        if self._chunk is None or self._row == 0:
+            return
+        try:
+            self._write_queue.put_nowait((self._chunk, self._row))
+        except queue.Full:
+            self.writer_stalls += 1
+            logging.debug(f"Trajectory writer is behind; waiting to queue a chunk for {self.path}")
+            self._write_queue.put((self._chunk, self._row))
+        self._chunk = None
+        self._row = 0
+
+    def _write_chunk(self, chunk, length):
+        if chunk["frames"] is not None and self.index["frame_shape"] is None:
+            # First chunk with raw frames
+            self.index["frame_shape"] = list(chunk["frames"].shape[1:])
+        number = len(self.index["chunks"])
+        names = {"steps": f"chunk_{number:05d}_steps.npy"}
+        if chunk["frames"] is not None:
+            names["frames"] = f"chunk_{number:05d}_frames.npy"
+        for field, name in names.items():
+            data = chunk[field][:length]
+            temporary_path = os.path.join(self.path, name + ".tmp")
+            output = np.lib.format.open_memmap(temporary_path, mode="w+", dtype=data.dtype, shape=data.shape)
+            output[:] = data
+            output.flush()
+            del output
+            os.replace(temporary_path, os.path.join(self.path, name))
+
+        steps = chunk["steps"][:length]
+        self.index["chunks"].append(dict(
+            names,
+            start=self.index["length"],
+            length=length,
+            first_episode=int(steps["episode"][0]),
+            last_episode=int(steps["episode"][-1]),
+        ))
+        self.index["length"] += length
+        temporary_path = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(temporary_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(temporary_path, os.path.join(self.path, INDEX_FILE))
+
+    def _write_loop(self):
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            chunk, length = item
+            try:
+                self._write_chunk(chunk, length)
+            except Exception as e:
+                logging.error(f"Error writing trajectory chunk to {self.path}: {e}")
+            if self._free_chunks.qsize() < self.max_pending_chunks:
+                self._free_chunks.put(chunk)
+
+    def close(self):
+        """
+        Writes the remaining steps, waits for the writer thread and closes the environment.
+        """
+        if self._writer.is_alive():
+            self.flush()
+            self._write_queue.put(None)
+            self._writer.join()
+        super().close()
+
+
+class TrajectoryReader:
+    """
+    Reads a recording written by TrajectoryRecorder.
+
+    Chunk files are memory-mapped read-only. Slices within one chunk are views of the
+    mapped files; slices spanning chunks are concatenated, or can be read per chunk
+    without copies through iter_slices().
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the TrajectoryReader.
+
+        Args:
+            path (str): Directory of the recording.
+        """
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), "r") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version {self.index.get('version')}")
+        self.reward_components = tuple(self.index["reward_components"])
+        self.chunks = self.index["chunks"]
+        self.starts = np.array([chunk["start"] for chunk in self.chunks], dtype=np.int64)
+        self._steps = [None] * len(self.chunks)
+        self._frames = [None] * len(self.chunks)
+
+    def __len__(self):
+        return self.index["length"]
+
+    @property
+    def has_frames(self):
+        return self.index["frame_shape"] is not None
+
+    def _chunk_steps(self, number):
+        if self._steps[number] is None:
+            self._steps[number] = np.load(os.path.join(self.path, self.chunks[number]["steps"]), mmap_mode="r")
+        return self._steps[number]
+
+    def _chunk_frames(self, number):
+        if self._frames[number] is None:
+            chunk = self.chunks[number]
+            if "frames" in chunk:
+                self._frames[number] = np.load(os.path.join(self.path, chunk["frames"]), mmap_mode="r")
+            else:
+                # Raw recording whose first chunk was written before a frame was captured
+                shape = (chunk["length"],) + tuple(self.index["frame_shape"])
+                self._frames[number] = np.broadcast_to(np.zeros(1, dtype=self.index["frame_dtype"]), shape)
+        return self._frames[number]
+
+    def iter_slices(self, start=0, stop=None):
+        """
+        Yields zero-copy views covering steps [start, stop).
+
+        Args:
+            start (int): First step.
+            stop (int, optional): End step. Defaults to the end of the recording.
+
+        Yields:
+            tuple: (first step, steps view, frames view or None), one per chunk touched.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        while start < stop:
+            number = int(np.searchsorted(self.starts, start, side="right")) - 1
+            chunk = self.chunks[number]
+            offset = start - chunk["start"]
+            end = min(stop - chunk["start"], chunk["length"])
+            frames = self._chunk_frames(number)[offset:end] if self.has_frames else None
+            yield start, self._chunk_steps(number)[offset:end], frames
+            start = chunk["start"] + end
+
+    def _read(self, start, stop, frames):
+        parts = [part[2] if frames else part[1] for part in self.iter_slices(start, stop)]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            if frames:
+                return np.empty((0,) + tuple(self.index["frame_shape"]), dtype=self.index["frame_dtype"])
+            return np.empty(0, dtype=np.lib.format.descr_to_dtype(self.index["step_dtype"]))
+        return np.concatenate(parts)
+
+    def steps(self, start=0, stop=None):
+        """
+        Returns the step records [start, stop) as a structured array.
+        """
+        return self._read(start, stop, frames=False)
+
+    def frames(self, start=0, stop=None):
+        """
+        Returns the frames [start, stop).
+        """
+        if not self.has_frames:
+            raise ValueError(f"Recording at {self.path} has no frames.")
+        return self._read(start, stop, frames=True)
+
+    def episodes(self):
+        """
+        Returns the step ranges of the recorded episodes.
+
+        Returns:
+            list: (episode, start, stop) tuples in recording order.
+        """
+        if len(self) == 0:
+            return []
+        episode = np.concatenate([steps["episode"] for _, steps, _ in self.iter_slices()])
+        boundaries = np.flatnonzero(np.diff(episode)) + 1
+        starts = np.concatenate(([0], boundaries))
+        stops = np.concatenate((boundaries, [len(episode)]))
+        return [(int(episode[start]), int(start), int(stop)) for start, stop in zip(starts, stops)]
@@ -1,26 +1,83 @@
 # main.py
 
+import argparse
 import logging
-import sys
+import os
+import time
 
+MODEL_PATH = "data/models/ppo_throne_liberty"
 
-def main():
-    # Configure logging at the very start
-    logging.basicConfig(
-        level=logging.DEBUG,  # Set to DEBUG to capture all levels of logs
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("training.log"),  # Log to 'training.log' file
-            logging.StreamHandler(sys.stdout)  # Also log to console
-        ]
-    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train and test the Throne and Liberty PPO agent.")
+    parser.add_argument("--backend", choices=("live", "synthetic"), default="live",
+                        help="Play the game window, or the in-process synthetic game.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile --profile-steps env steps, or one training iteration if 0, then exit.")
+    parser.add_argument("--profile-steps", type=int, default=0, help="Env steps to profile with the current model.")
+    parser.add_argument("--profile-dir", default="data/profiles", help="Directory for profile results.")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="Seconds between stack samples.")
+    parser.add_argument("--no-profile-allocations", action="store_true", help="Do not trace allocations.")
+    parser.add_argument("--log-level", default="INFO", help="Root log level. Per-step messages are sampled.")
+    parser.add_argument("--step-events", help="JSONL file to write a compact event for every env step to.")
+    return parser.parse_args(argv)
+
+
+def run_profile(args):
+    """
+    Runs env steps or one training iteration under the sampling profiler.
+
+    Collapsed stacks, a per-module summary and the top allocation sites are written to a
+    timestamped directory in args.profile_dir.
+    """
+    import numpy as np
+    from agents.ppo_agent import create_wrapped_env, load_model_if_exists, train_ppo
+    from utilities.profiler import ProfileSession
+
+    output_dir = os.path.join(args.profile_dir, time.strftime("%Y%m%d-%H%M%S"))
+    session = ProfileSession(output_dir, interval=args.profile_interval, allocations=not args.no_profile_allocations)
+    if args.profile_steps > 0:
+        env = create_wrapped_env(backend=args.backend)
+        model = load_model_if_exists(MODEL_PATH, env)
+        try:
+            logging.info(f"Profiling {args.profile_steps} env steps...")
+            with session:
+                observation = env.reset()
+                lstm_states = None
+                episode_starts = np.ones((env.num_envs,), dtype=bool)
+                for _ in range(args.profile_steps):
+                    action, lstm_states = model.predict(observation, state=lstm_states, episode_start=episode_starts,
+                                                        deterministic=True)
+                    observation, _, episode_starts, _ = env.step(action)
+        finally:
+            env.close()
+    else:
+        logging.info("Profiling one training iteration...")
+        with session:
+            # One rollout and update of the current model, which is left unchanged on disk
+            train_ppo(total_timesteps=1, model_path=MODEL_PATH, backend=args.backend, save=False)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Configure logging at the very start; records are written by a background thread
+    from utilities.step_logging import configure_logging
+    listener = configure_logging(level=args.log_level, log_file="training.log")
 
     logging.info("Logging is configured successfully.")
 
+    if args.profile:
+        try:
+            run_profile(args)
+        finally:
+            listener.stop()
+        return
+
     # Import training and testing functions
     from agents.ppo_agent import train_ppo, test_ppo
 
-    model_path = "data/models/ppo_throne_liberty"
+    model_path = MODEL_PATH
     total_timesteps_per_iteration = 5000  # Adjust as needed
     max_iterations = None  # Set to None for infinite training
 
@@ -33,13 +90,15 @@ def main():
             # Train the PPO agent
             model = train_ppo(
                 total_timesteps=total_timesteps_per_iteration,
-                model_path=model_path
+                model_path=model_path,
+                backend=args.backend,
+                step_events_path=args.step_events
             )
 
             # Optionally, perform testing every N iterations
             if iteration % 10 == 0:
                 logging.info(f"=== Testing Iteration {iteration} ===")
-                test_ppo(model_path=model_path)
+                test_ppo(model_path=model_path, backend=args.backend)
 
             # Check if maximum iterations are reached
             if max_iterations and iteration >= max_iterations:
@@ -52,6 +111,7 @@ def main():
         logging.error(f"An unexpected error occurred: {e}")
     finally:
         logging.info("Training process has ended.")
+        listener.stop()
 
 
 if __name__ == "__main__":
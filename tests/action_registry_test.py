@@ -0,0 +1,48 @@
+import unittest
+
+from utilities.action_registry import ActionRegistry, ActionHeads, ACTION_REGISTRY, DEFAULT_ACTION_HEADS
+
+
+class TestActionRegistry(unittest.TestCase):
+    def test_default_actions(self):
+        self.assertEqual(len(ACTION_REGISTRY), 16)
+        self.assertEqual(ACTION_REGISTRY.name(10), "use_skill_3")
+        self.assertEqual(ACTION_REGISTRY.index("find_target"), 12)
+        attack = ACTION_REGISTRY.get(7)
+        self.assertEqual(attack.click, "left")
+        self.assertEqual(attack.keys, ())
+        self.assertEqual(ACTION_REGISTRY.get("move_forward").keys, ("w",))
+
+    def test_unknown_actions(self):
+        self.assertIsNone(ACTION_REGISTRY.get(16))
+        self.assertIsNone(ACTION_REGISTRY.get(-1))
+        self.assertIsNone(ACTION_REGISTRY.get("dance"))
+        self.assertEqual(ACTION_REGISTRY.name(99), "unknown_action")
+        self.assertEqual(ACTION_REGISTRY.index("explore", default=0), 0)
+
+    def test_register(self):
+        registry = ActionRegistry(default_hold=0.2)
+        self.assertEqual(registry.register("strafe_jump", ["a", "space"]), 0)
+        self.assertEqual(registry.register("dodge", "shift", hold=0.05), 1)
+        self.assertEqual(registry.get(0).keys, ("a", "space"))
+        self.assertEqual(registry.get(0).hold, 0.2)
+        self.assertEqual(registry.get("dodge").hold, 0.05)
+        with self.assertRaises(ValueError):
+            registry.register("dodge", "ctrl")
+
+
+class TestActionHeads(unittest.TestCase):
+    def test_default_heads(self):
+        heads = ActionHeads(DEFAULT_ACTION_HEADS)
+        self.assertEqual(heads.nvec, [6, 5, 8])
+        self.assertEqual(heads.chord([1, 3, 1]), (0, 13, 7))  # move_forward + camera_left + attack
+        self.assertEqual(heads.chord([0, 0, 0]), ())
+        self.assertIsNone(heads.index_of(1, 9))
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            ActionHeads([("movement", ("move_forward", "fly"))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import logging
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from environments.batched_synthetic_env import BatchedSyntheticVecEnv
+from environments.synthetic_game import SyntheticGame
+from environments.throne_env import ThroneAndLibertyEnv
+from utilities.action_registry import ACTION_REGISTRY
+
+
+class TestBatchedSyntheticVecEnv(unittest.TestCase):
+    def setUp(self):
+        self.env = BatchedSyntheticVecEnv(num_envs=4, seed=0)
+
+    def test_observation_buffer(self):
+        obs = self.env.reset()
+        self.assertEqual(obs.shape, (4, 3, 90, 160))
+        self.assertEqual(obs.dtype, np.uint8)
+        self.assertTrue(obs.flags["C_CONTIGUOUS"])
+        self.assertTrue(self.env.observation_space.contains(obs[0]))
+
+        self.env.step_async(np.zeros(4, dtype=np.int64))
+        next_obs, rewards, dones, infos = self.env.step_wait()
+        self.assertEqual(rewards.shape, (4,))
+        self.assertEqual(len(infos), 4)
+        self.assertFalse(np.shares_memory(obs, next_obs))
+
+    def test_matches_synthetic_game(self):
+        self.env.reset()
+        games = [SyntheticGame(seed=0) for _ in range(4)]
+        rng = np.random.default_rng(1)
+        find_target = ACTION_REGISTRY.index("find_target")
+        for step in range(100):
+            actions = rng.integers(0, len(ACTION_REGISTRY), size=4)
+            if step == 0:
+                actions[:] = find_target
+            for game, action in zip(games, actions):
+                game.apply(int(action))
+                game.tick()
+            self.env.step_async(actions)
+            self.env.step_wait()
+            np.testing.assert_allclose(self.env.player_health, [game.player_health for game in games])
+            np.testing.assert_allclose(self.env.target_health > 0, [game.target_health > 0 for game in games])
+            np.testing.assert_array_equal(self.env.position, [game.position for game in games])
+            np.testing.assert_array_equal(self.env.yaw, [game.yaw for game in games])
+
+    def test_rewards_match_env(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        env = ThroneAndLibertyEnv(backend="synthetic")
+        self.addCleanup(env.close)
+        batched = BatchedSyntheticVecEnv(num_envs=1, seed=0)
+        env.reset()
+        batched.reset()
+
+        rng = np.random.default_rng(1)
+        actions = [ACTION_REGISTRY.index("find_target")] + list(rng.choice([0, 3, 7, 8, 9, 10, 11, 14], size=60))
+        for action in actions:
+            _, reward, _, _, _ = env.step(int(action))
+            batched.step_async([action])
+            _, rewards, _, _ = batched.step_wait()
+            self.assertAlmostEqual(rewards[0], reward, delta=1.0)
+
+    def test_auto_reset(self):
+        env = BatchedSyntheticVecEnv(num_envs=2, max_episode_steps=3, seed=0)
+        env.reset()
+        for _ in range(3):
+            env.step_async(np.zeros(2, dtype=np.int64))
+            obs, _, dones, infos = env.step_wait()
+        self.assertTrue(dones.all())
+        self.assertTrue(infos[0]["TimeLimit.truncated"])
+        self.assertEqual(infos[0]["episode"]["l"], 3)
+        self.assertEqual(infos[0]["terminal_observation"].shape, (3, 90, 160))
+        self.assertFalse(np.array_equal(infos[0]["terminal_observation"], obs[0]))
+        np.testing.assert_array_equal(env.episode_steps, [0, 0])
+
+    def test_reset_keeps_previous_observation(self):
+        self.env.reset()
+        self.env.step_async(np.full(4, ACTION_REGISTRY.index("move_forward")))
+        previous_obs, _, _, _ = self.env.step_wait()
+        previous_copy = previous_obs.copy()
+        self.env.player_health[1] = 0.005
+        self.env.target_health[1] = 1.0
+        self.env.step_async(np.full(4, ACTION_REGISTRY.index("move_forward")))
+        obs, _, dones, _ = self.env.step_wait()
+        self.assertTrue(dones[1])
+        np.testing.assert_array_equal(previous_obs, previous_copy)
+        np.testing.assert_array_equal(obs[1], BatchedSyntheticVecEnv(num_envs=4).reset()[1])
+        self.assertFalse(np.array_equal(obs[0], obs[1]))
+
+    def test_player_death_terminates(self):
+        self.env.reset()
+        self.env.player_health[1] = 0.005
+        self.env.target_health[1] = 1.0
+        self.env.step_async(np.zeros(4, dtype=np.int64))
+        _, rewards, dones, infos = self.env.step_wait()
+        np.testing.assert_array_equal(dones, [False, True, False, False])
+        self.assertFalse(infos[1]["TimeLimit.truncated"])
+        self.assertEqual(rewards[1], -100)
+        self.assertEqual(self.env.player_health[1], 1.0)
+
+    def test_vec_env_interface(self):
+        self.assertEqual(self.env.get_attr("num_envs"), [4] * 4)
+        self.assertEqual(self.env.env_is_wrapped(object), [False] * 4)
+        self.env.seed(3)
+        first = self.env.reset().copy()
+        self.env.seed(3)
+        np.testing.assert_array_equal(self.env.reset(), first)
+
+    def test_per_env_attributes_and_batch_methods(self):
+        self.env.reset()
+        self.env.set_attr("player_health", 0.5, indices=[1, 2])
+        self.assertEqual(self.env.get_attr("player_health"), [1.0, 0.5, 0.5, 1.0])
+        self.assertEqual(self.env.get_attr("player_health", indices=2), [0.5])
+
+        self.env.set_attr("regeneration", 0.0)
+        self.assertEqual(self.env.get_attr("regeneration", indices=[0, 3]), [0.0, 0.0])
+        with self.assertRaises(ValueError):
+            self.env.set_attr("regeneration", 0.1, indices=[0])
+
+        with patch.object(self.env, "reset", wraps=self.env.reset) as reset:
+            observations = self.env.env_method("reset")
+        reset.assert_called_once_with()
+        self.assertEqual(len(observations), 4)
+        with self.assertRaises(ValueError):
+            self.env.env_method("reset", indices=[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from environments.color_lut import ColorLUT, DEFAULT_COLOR_PROFILE, BACKGROUND, BAR_FILL, BAR_EMPTY
+from environments.health_bar_estimator import HealthBarEstimator
+
+
+class TestColorLUT(unittest.TestCase):
+    def setUp(self):
+        self.lut = ColorLUT.build()
+
+    def test_classify_bgra(self):
+        pixels = np.array([[
+            [255, 255, 255, 255],  # White fill
+            [20, 20, 20, 255],  # Dark empty bar
+            [0, 0, 100, 255],  # Dark red low-health fill
+            [0, 90, 180, 255],  # Orange fill
+            [120, 40, 20, 255],  # Dark blue background
+        ]], dtype=np.uint8)
+        classes = self.lut.classify(pixels)
+        self.assertEqual(classes.tolist(), [[BAR_FILL, BAR_EMPTY, BAR_FILL, BAR_FILL, BACKGROUND]])
+
+    def test_classify_grayscale(self):
+        pixels = np.array([[0, 100, 200]], dtype=np.uint8)
+        self.assertEqual(self.lut.classify(pixels).tolist(), [[BAR_EMPTY, BAR_EMPTY, BAR_FILL]])
+
+    def test_load_or_build_caches_to_disk(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            lut = ColorLUT.load_or_build(DEFAULT_COLOR_PROFILE, cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            cached = ColorLUT.load_or_build(DEFAULT_COLOR_PROFILE, cache_dir=cache_dir)
+            self.assertTrue(np.array_equal(lut.table, cached.table))
+
+    def test_profile_key_changes_with_profile(self):
+        profile = dict(DEFAULT_COLOR_PROFILE, bits=4)
+        self.assertNotEqual(ColorLUT.profile_key(profile), ColorLUT.profile_key(DEFAULT_COLOR_PROFILE))
+
+    def test_estimator_reads_low_health_red(self):
+        estimator = HealthBarEstimator(color_lut=self.lut)
+        estimator.register_bar("target_health", {"start": (0, 0), "width": 100, "height": 20})
+        screen = np.zeros((20, 100, 4), dtype=np.uint8)
+        screen[:, :20, 2] = 100  # Dark red, below the brightness threshold
+        fills = estimator.estimate(screen)
+        self.assertAlmostEqual(fills["target_health"], 0.2, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,22 @@ class TestCombatManager(unittest.TestCase):
             msg=f"Reward should be {expected_reward} for dealing damage."
         )
 
+    def test_no_kill_without_a_target(self):
+        # Two frames without a target HUD read as health 0.0 and are not a kill
+        self.combat_manager.previous_target_health = 0.0
+        self.assertEqual(self.combat_manager.calculate_combat_reward(0.0), (0, 0))
+        self.assertFalse(self.combat_manager.target_killed)
+
+    def test_kill_reward_from_acquisition_time(self):
+        self.combat_manager.target_acquired(now=100.0)
+        self.combat_manager.previous_target_health = 0.5
+        self.assertEqual(self.combat_manager.calculate_combat_reward(0.0, now=105.0), (0, 40.0))
+        self.assertTrue(self.combat_manager.target_killed)
+
+    def test_kill_without_acquisition_time(self):
+        self.combat_manager.previous_target_health = 0.5
+        self.assertEqual(self.combat_manager.calculate_combat_reward(0.0, now=105.0), (0, 50))
+
 
 if __name__ == '__main__':
     unittest.main()
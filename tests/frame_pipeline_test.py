@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from environments.frame_pipeline import FramePipeline
+
+
+class TestFramePipeline(unittest.TestCase):
+    def setUp(self):
+        self.hud_manager = Mock()
+        self.raw_frame = np.zeros((1080, 1920, 4), dtype=np.uint8)
+        self.observation = np.zeros((90, 160, 3), dtype=np.uint8)
+        self.hud_manager.capture_frame.return_value = self.raw_frame
+        self.hud_manager.build_observation.return_value = self.observation
+        self.hud_manager.process_hud.return_value = {
+            "player_hud": {"health": 1.0},
+            "target_hud": {"health": 0.5},
+            "info": {}
+        }
+        self.pipeline = FramePipeline(self.hud_manager)
+
+    def test_next_frame_captures_once(self):
+        frame = self.pipeline.next_frame()
+        self.hud_manager.capture_frame.assert_called_once()
+        self.hud_manager.build_observation.assert_called_once_with(self.raw_frame)
+        self.hud_manager.process_hud.assert_called_once_with(screen=self.raw_frame)
+        self.assertIs(frame["screen"], self.observation)
+        self.assertEqual(frame["hud_data"]["target_hud"]["health"], 0.5)
+
+    def test_frame_ids_increase(self):
+        first = self.pipeline.next_frame()
+        second = self.pipeline.next_frame()
+        self.assertEqual(first["frame_id"], 1)
+        self.assertEqual(second["frame_id"], 2)
+        self.assertEqual(second["hud_data"]["info"]["frame_id"], 2)
+
+    def test_is_consistent(self):
+        self.assertTrue(FramePipeline.is_consistent({"frame_id": 3, "info": {"frame_id": 3}}))
+        self.assertFalse(FramePipeline.is_consistent({"frame_id": 3, "info": {"frame_id": 2}}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.monitor import Monitor
+from environments.frame_skip import FrameSkipWrapper
+from environments.synthetic_game import SyntheticGame, SyntheticCapture, SyntheticInput
+from environments.throne_env import ThroneAndLibertyEnv
+from utilities.action_registry import ActionHeads, DEFAULT_ACTION_HEADS, IDLE_ACTION
+
+
+class CountingEnv(gym.Env):
+    """
+    Minimal env whose observation is filled with the frame number.
+    """
+
+    def __init__(self, terminate_at=None):
+        self.observation_space = spaces.Box(low=0, high=255, shape=(2, 2, 3), dtype=np.uint8)
+        self.action_space = spaces.Discrete(16)
+        self.terminate_at = terminate_at
+        self.frame = 0
+        self.sent_actions = []
+
+    def _transition(self):
+        self.frame += 1
+        observation = np.full((2, 2, 3), self.frame * 10, dtype=np.uint8)
+        observation[0, 0] = 255 - self.frame  # Flickering pixel, brightest on early frames
+        terminated = self.terminate_at is not None and self.frame >= self.terminate_at
+        return observation, 1.0, terminated, False, {"frame_id": self.frame}
+
+    def reset(self, *, seed=None, options=None):
+        self.frame = 0
+        return np.zeros((2, 2, 3), dtype=np.uint8), {}
+
+    def step(self, action):
+        if np.ndim(action) == 0 and action == IDLE_ACTION:
+            return self._transition()
+        self.sent_actions.append(action)
+        return self._transition()
+
+    def step_idle(self):
+        return self._transition()
+
+
+class TestFrameSkipWrapper(unittest.TestCase):
+    def test_hold_resends_action(self):
+        env = CountingEnv()
+        wrapper = FrameSkipWrapper(env, frame_skip={"movement": (4, "hold")})
+        observation, reward, terminated, _, info = wrapper.step(0)  # move_forward
+        self.assertEqual(env.sent_actions, [0, 0, 0, 0])
+        self.assertEqual(reward, 4.0)
+        self.assertFalse(terminated)
+        self.assertEqual(info["frames"], 4)
+        self.assertEqual(info["frame_id"], 4)
+        # Max of frames 3 and 4
+        self.assertEqual(observation[1, 1, 0], 40)
+        self.assertEqual(observation[0, 0, 0], 252)
+
+    def test_tap_sends_once(self):
+        env = CountingEnv()
+        wrapper = FrameSkipWrapper(env, frame_skip={"skill": (3, "tap")})
+        _, reward, _, _, info = wrapper.step(8)  # use_skill_1
+        self.assertEqual(env.sent_actions, [8])
+        self.assertEqual(reward, 3.0)
+        self.assertEqual(info["frames"], 3)
+
+    def test_default_skip_and_single_frame(self):
+        env = CountingEnv()
+        wrapper = FrameSkipWrapper(env, frame_skip={"movement": (4, "hold")})
+        observation, reward, _, _, info = wrapper.step(15)  # interact
+        self.assertEqual(info["frames"], 1)
+        self.assertEqual(reward, 1.0)
+        self.assertEqual(observation[1, 1, 0], 10)
+
+    def test_stops_on_termination(self):
+        env = CountingEnv(terminate_at=2)
+        wrapper = FrameSkipWrapper(env, frame_skip={"movement": (4, "hold")})
+        _, reward, terminated, _, info = wrapper.step(0)
+        self.assertTrue(terminated)
+        self.assertEqual(reward, 2.0)
+        self.assertEqual(info["frames"], 2)
+
+    def test_chord_repeats_only_held_heads(self):
+        env = CountingEnv()
+        env.action_heads = ActionHeads(DEFAULT_ACTION_HEADS)
+        wrapper = FrameSkipWrapper(env, frame_skip={"movement": (3, "hold"), "skill": (2, "tap")})
+        _, reward, _, _, info = wrapper.step(np.array([1, 0, 2]))  # move_forward + use_skill_1
+        self.assertEqual(info["frames"], 3)
+        self.assertEqual(reward, 3.0)
+        self.assertEqual([list(action) for action in env.sent_actions], [[1, 0, 2], [1, 0, 0], [1, 0, 0]])
+
+    def test_idle_frames_pass_through_monitor(self):
+        game = SyntheticGame(seed=0)
+        env = ThroneAndLibertyEnv(capture_backend=SyntheticCapture(game), input_backend=SyntheticInput(game))
+        monitor = Monitor(env)
+        wrapper = FrameSkipWrapper(monitor, frame_skip={"utility": (3, "tap")})
+        wrapper.reset()
+        frames, total_reward = 0, 0.0
+        for _ in range(200):
+            _, reward, terminated, truncated, info = wrapper.step(12)  # find_target; the player dies in combat
+            frames += info["frames"]
+            total_reward += reward
+            if terminated or truncated:
+                break
+        env.close()
+        self.assertTrue(terminated)
+        self.assertGreater(frames, 3)
+        self.assertEqual(info["episode"]["l"], frames)
+        self.assertAlmostEqual(info["episode"]["r"], total_reward, places=4)
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            FrameSkipWrapper(CountingEnv(), frame_skip={"movement": (0, "hold")})
+        with self.assertRaises(ValueError):
+            FrameSkipWrapper(CountingEnv(), frame_skip={"movement": (2, "spam")})
+
+
+if __name__ == "__main__":
+    unittest.main()
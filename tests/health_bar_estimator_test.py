@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+from environments.health_bar_estimator import HealthBarEstimator
+
+
+class TestHealthBarEstimator(unittest.TestCase):
+    def setUp(self):
+        self.estimator = HealthBarEstimator()
+        self.estimator.register_bar("player_health", {"start": (109, 96), "width": 207, "height": 18})
+        self.estimator.register_bar("target_health", {"start": (371, 92), "width": 161, "height": 20})
+        self.screen = np.zeros((1080, 1920, 4), dtype=np.uint8)
+
+    def test_estimate_batched(self):
+        self.screen[96:114, 109:212] = 255  # Player bar 50% filled
+        self.screen[92:112, 371:532] = 255  # Target bar full
+        fills = self.estimator.estimate(self.screen)
+        self.assertAlmostEqual(fills["player_health"], 0.5, places=2)
+        self.assertAlmostEqual(fills["target_health"], 1.0, places=2)
+
+    def test_red_fill(self):
+        self.screen[92:112, 371:452, 2] = 200  # Red target bar 50% filled
+        fills = self.estimator.estimate(self.screen)
+        self.assertAlmostEqual(fills["target_health"], 0.5, places=2)
+        self.assertEqual(fills["player_health"], 0.0)
+
+    def test_border_and_text_are_ignored(self):
+        self.screen[96:114, 109:212] = 255
+        self.screen[96, 109:316] = 255  # Bright top border
+        self.screen[96:114, 314:316] = 255  # Bright right edge
+        self.screen[100:110, 150:160] = 0  # Dark text over the filled part
+        fills = self.estimator.estimate(self.screen)
+        self.assertAlmostEqual(fills["player_health"], 0.5, places=2)
+
+    def test_bar_outside_screen(self):
+        fills = self.estimator.estimate(np.zeros((50, 50, 4), dtype=np.uint8))
+        self.assertEqual(fills, {"player_health": 0.0, "target_health": 0.0})
+
+    def test_estimate_bar_grayscale(self):
+        bar = np.zeros((18, 207), dtype=np.uint8)
+        bar[:, :62] = 255
+        self.assertAlmostEqual(self.estimator.estimate_bar(bar), 0.3, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+from environments.hud_calibration import HUDCalibrator
+
+
+class TestHUDCalibrator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.hud_regions = {
+            "player_hud": {"start": (28, 60), "width": 309, "height": 116},
+            "target_hud": {"start": (339, 59), "width": 232, "height": 119},
+        }
+        # Blocky textures survive rescaling, like real HUD artwork
+        self.textures = {
+            name: cv2.resize(
+                rng.integers(0, 256, (region["height"] // 8 + 1, region["width"] // 8 + 1), dtype=np.uint8),
+                None, fx=8, fy=8, interpolation=cv2.INTER_NEAREST
+            )[:region["height"], :region["width"]]
+            for name, region in self.hud_regions.items()
+        }
+        self.reference = self._render((1920, 1080), scale=1.0, shift=(0, 0))
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.calibrator = HUDCalibrator.from_reference_frame(
+            self.reference, self.hud_regions, cache_dir=self.temp_dir.name
+        )
+
+    def _render(self, resolution, scale, shift):
+        frame = np.full((resolution[1], resolution[0], 4), 40, dtype=np.uint8)
+        for name, region in self.hud_regions.items():
+            texture = cv2.resize(self.textures[name], None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+            x = int(region["start"][0] * scale) + shift[0]
+            y = int(region["start"][1] * scale) + shift[1]
+            frame[y:y + texture.shape[0], x:x + texture.shape[1], :3] = texture[:, :, None]
+        return frame
+
+    def test_calibrate_reference_frame(self):
+        calibration = self.calibrator.calibrate(self.reference)
+        self.assertIsNotNone(calibration)
+        self.assertAlmostEqual(calibration["ui_scale"], 1.0, places=2)
+        self.assertEqual(calibration["hud_starts"]["player_hud"], (28, 60))
+        self.assertEqual(calibration["hud_starts"]["target_hud"], (339, 59))
+
+    def test_calibrate_scaled_and_shifted_layout(self):
+        frame = self._render((2560, 1440), scale=1.3, shift=(17, 9))
+        calibration = self.calibrator.calibrate(frame)
+        self.assertIsNotNone(calibration)
+        self.assertAlmostEqual(calibration["ui_scale"], 1.3, places=2)
+        start_x, start_y = calibration["hud_starts"]["player_hud"]
+        self.assertLessEqual(abs(start_x - (int(28 * 1.3) + 17)), 2)
+        self.assertLessEqual(abs(start_y - (int(60 * 1.3) + 9)), 2)
+
+    def test_missing_hud_fails(self):
+        blank = np.full((1080, 1920, 4), 40, dtype=np.uint8)
+        self.assertIsNone(self.calibrator.calibrate(blank))
+
+    def test_verify(self):
+        calibration = self.calibrator.calibrate(self.reference)
+        self.assertTrue(self.calibrator.verify(self.reference, calibration))
+        blank = np.full((1080, 1920, 4), 40, dtype=np.uint8)
+        self.assertFalse(self.calibrator.verify(blank, calibration))
+
+    def test_static_huds_only(self):
+        calibrator = HUDCalibrator.from_reference_frame(
+            self.reference, self.hud_regions, cache_dir=None, static_huds=("player_hud",),
+            verify_exclude={"player_hud": [{"start": (81, 36), "width": 207, "height": 18}]}
+        )
+        # No target selected: the target HUD is missing but calibration still succeeds
+        frame = self.reference.copy()
+        frame[59:178, 339:571] = 40
+        calibration = calibrator.calibrate(frame)
+        self.assertIsNotNone(calibration)
+        self.assertNotIn("target_hud", calibration["hud_starts"])
+        self.assertEqual(list(calibration["verify_points"]), ["player_hud"])
+        for x, y, _ in calibration["verify_points"]["player_hud"]:
+            self.assertFalse(109 <= x < 316 and 96 <= y < 114)
+
+        # A changing bar fill and a reappearing target HUD do not fail the check
+        frame[96:114, 109:316] = 255
+        self.assertTrue(calibrator.verify(frame, calibration))
+        self.assertTrue(calibrator.verify(self.reference, calibration))
+
+        blank = np.full((1080, 1920, 4), 40, dtype=np.uint8)
+        self.assertIsNone(calibrator.calibrate(blank))
+
+    def test_save_and_load(self):
+        calibration = self.calibrator.calibrate(self.reference)
+        self.calibrator.save(calibration)
+        loaded = self.calibrator.load((1920, 1080))
+        self.assertEqual(loaded["hud_starts"], calibration["hud_starts"])
+        self.assertEqual(loaded["ui_scale"], calibration["ui_scale"])
+        self.assertTrue(self.calibrator.verify(self.reference, loaded))
+        self.assertIsNone(self.calibrator.load((1280, 720)))
+
+
+if __name__ == "__main__":
+    unittest.main()
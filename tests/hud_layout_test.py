@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from environments.hud_layout import HUDLayoutCache
+
+
+class TestHUDLayoutCache(unittest.TestCase):
+    def setUp(self):
+        self.hud_regions = {
+            "player_hud": {"start": (28, 60), "width": 309, "height": 116},
+        }
+        self.bar_definitions = {
+            "player_health": {"hud": "player_hud", "region": {"start": (81, 36), "width": 207, "height": 18}},
+        }
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache = HUDLayoutCache(self.hud_regions, self.bar_definitions, cache_dir=self.temp_dir.name)
+
+    def test_reference_resolution_is_unscaled(self):
+        layout = self.cache.get((1920, 1080))
+        self.assertEqual(layout.hud_regions["player_hud"]["start"], (28, 60))
+        self.assertEqual(layout.bar_regions["player_health"]["start"], (109, 96))
+        self.assertEqual(layout.bar_regions["player_health"]["width"], 207)
+
+    def test_scaled_resolution(self):
+        layout = self.cache.get((3840, 2160))
+        self.assertEqual(layout.bar_regions["player_health"]["start"], (218, 192))
+        self.assertEqual(layout.bar_regions["player_health"]["height"], 36)
+
+    def test_layout_is_immutable(self):
+        layout = self.cache.get((1920, 1080))
+        with self.assertRaises(TypeError):
+            layout.bar_regions["player_health"]["width"] = 1
+        with self.assertRaises(TypeError):
+            layout.hud_regions["other"] = {}
+
+    def test_layouts_are_computed_once_and_persisted(self):
+        first = self.cache.get((1280, 720))
+        self.assertIs(self.cache.get((1280, 720)), first)
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), 1)
+
+        reloaded = HUDLayoutCache(self.hud_regions, self.bar_definitions, cache_dir=self.temp_dir.name)
+        reloaded.compute = None  # Must load from disk instead of recomputing
+        self.assertEqual(reloaded.get((1280, 720)), first)
+
+    def test_base_regions_are_not_mutated(self):
+        self.cache.get((1280, 720))
+        self.assertEqual(self.hud_regions["player_hud"]["start"], (28, 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+import cv2
 import numpy as np
 from unittest.mock import MagicMock
 from environments.hud_manager import HUDManager
@@ -25,19 +28,96 @@ class TestHUDManager(unittest.TestCase):
         self.assertAlmostEqual(health, 0.5, places=2)
 
     def test_process_player_hud(self):
-        # Mock extract_hud to return the player health bar
-        self.hud_manager.extract_hud = MagicMock(return_value=self.mock_player_health_bar)
+        # Native frame with the player health bar at its default position
+        screen = np.zeros((1080, 1920, 4), dtype=np.uint8)
+        screen[96:114, 109:316] = self.mock_player_health_bar[..., None]
 
-        player_data = self.hud_manager.process_player_hud(self.mock_screen)
+        player_data = self.hud_manager.process_hud(screen)["player_hud"]
         self.assertAlmostEqual(player_data["health"], 0.5, places=2)
 
     def test_process_target_hud(self):
-        # Mock extract_hud to return the target health bar
-        self.hud_manager.extract_hud = MagicMock(return_value=self.mock_target_health_bar)
+        # Native frame with the target health bar at its default position
+        screen = np.zeros((1080, 1920, 4), dtype=np.uint8)
+        screen[92:112, 371:532] = self.mock_target_health_bar[..., None]
 
-        target_data = self.hud_manager.process_target_hud(self.mock_screen)
+        target_data = self.hud_manager.process_hud(screen)["target_hud"]
         self.assertAlmostEqual(target_data["health"], 0.5, places=2)
 
+    def test_process_hud_native_frame(self):
+        # Native-resolution BGRA frame with a half-full player bar and a full target bar
+        screen = np.zeros((1080, 1920, 4), dtype=np.uint8)
+        screen[96:114, 109:212] = 255
+        screen[92:112, 371:532] = 255
+
+        hud_data = self.hud_manager.process_hud(screen)
+        self.assertAlmostEqual(hud_data["player_hud"]["health"], 0.5, places=2)
+        self.assertAlmostEqual(hud_data["target_hud"]["health"], 1.0, places=2)
+
+    def test_hud_regions_not_rescaled_in_place(self):
+        hud_regions = {
+            "player_hud": {"start": (28, 60), "width": 309, "height": 116},
+            "target_hud": {"start": (339, 59), "width": 232, "height": 119},
+        }
+        HUDManager(hud_regions=hud_regions)
+        HUDManager(hud_regions=hud_regions)
+        self.assertEqual(hud_regions["player_hud"], {"start": (28, 60), "width": 309, "height": 116})
+
+    def test_layout_switches_on_resize(self):
+        self.hud_manager.on_geometry_change((960, 540))
+        self.assertEqual(self.hud_manager.layout.resolution, (960, 540))
+
+        # Half-resolution frame with a half-full player bar
+        screen = np.zeros((540, 960, 4), dtype=np.uint8)
+        screen[48:57, 54:106] = 255
+        hud_data = self.hud_manager.process_hud(screen)
+        self.assertAlmostEqual(hud_data["player_hud"]["health"], 0.5, places=1)
+
+    def test_calibrate_hud_and_reload(self):
+        rng = np.random.default_rng(0)
+        screen = np.full((1080, 1920, 4), 40, dtype=np.uint8)
+        # Textured HUDs shifted 12px right and 8px down from the default layout
+        screen[68:184, 40:349, :3] = np.kron(rng.integers(0, 256, (15, 39, 1), dtype=np.uint8), np.ones((8, 8, 3), dtype=np.uint8))[:116, :309]
+        screen[67:186, 351:583, :3] = np.kron(rng.integers(0, 256, (15, 29, 1), dtype=np.uint8), np.ones((8, 8, 3), dtype=np.uint8))[:119, :232]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cv2.imwrite(os.path.join(temp_dir, "player_hud.png"), screen[68:184, 40:349, 0])
+            cv2.imwrite(os.path.join(temp_dir, "target_hud.png"), screen[67:186, 351:583, 0])
+
+            hud_manager = HUDManager(cache_dir=temp_dir, templates_dir=temp_dir)
+            self.assertTrue(hud_manager.calibrate_hud(screen))
+            self.assertEqual(hud_manager.layout.hud_regions["player_hud"]["start"], (40, 68))
+            self.assertEqual(hud_manager.layout.bar_regions["player_health"]["start"], (121, 104))
+            self.assertTrue(hud_manager.process_hud(screen)["info"]["hud_verified"])
+
+            # A new manager loads the cached calibration instead of searching again
+            reloaded = HUDManager(cache_dir=temp_dir, templates_dir=temp_dir)
+            self.assertEqual(reloaded.layout.hud_regions["player_hud"]["start"], (40, 68))
+
+    def test_default_manager_writes_no_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                HUDManager()
+            finally:
+                os.chdir(cwd)
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_failed_checks_defer_recalibration(self):
+        hud_manager = HUDManager(recalibrate_after=3)
+        hud_manager.calibrator = MagicMock()
+        hud_manager.calibrator.verify.return_value = False
+        hud_manager.calibration = {"resolution": (1920, 1080)}
+        for _ in range(5):
+            self.assertFalse(hud_manager.process_hud(self.mock_screen)["info"]["hud_verified"])
+        self.assertTrue(hud_manager.recalibration_pending)
+        hud_manager.calibrator.calibrate.assert_not_called()
+
+        hud_manager.calibrator.calibrate.return_value = {"resolution": (1920, 1080), "ui_scale": 1.0,
+                                                         "hud_starts": {"player_hud": (28, 60)}}
+        self.assertTrue(hud_manager.calibrate_hud(self.mock_screen))
+        self.assertFalse(hud_manager.recalibration_pending)
+
 
 if __name__ == "__main__":
     unittest.main()
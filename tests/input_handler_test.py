@@ -0,0 +1,131 @@
+import time
+import unittest
+from unittest.mock import patch, Mock
+
+from utilities.input_handler import InputDispatcher
+
+
+def _wait_for(condition, timeout=1.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@patch('utilities.input_handler.gw')
+@patch('utilities.input_handler.pyautogui')
+class TestInputDispatcher(unittest.TestCase):
+    def _focused(self, mock_gw):
+        mock_gw.getActiveWindow.return_value = Mock(title="TL 1.281.22.935")
+
+    def test_dispatch_returns_immediately(self, mock_pyautogui, mock_gw):
+        self._focused(mock_gw)
+        dispatcher = InputDispatcher(hold_duration=0.2)
+        self.addCleanup(dispatcher.stop)
+
+        start = time.perf_counter()
+        self.assertTrue(dispatcher.dispatch("move_forward"))
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyDown.called))
+        mock_pyautogui.keyUp.assert_not_called()
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyUp.called))
+        mock_pyautogui.keyDown.assert_called_once_with('w')
+        mock_pyautogui.keyUp.assert_called_once_with('w')
+        mock_gw.getWindowsWithTitle.assert_not_called()
+
+    def test_repeated_action_extends_hold(self, mock_pyautogui, mock_gw):
+        self._focused(mock_gw)
+        dispatcher = InputDispatcher(hold_duration=0.1)
+        self.addCleanup(dispatcher.stop)
+
+        dispatcher.dispatch("move_forward")
+        time.sleep(0.05)
+        dispatcher.dispatch("move_forward")
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyUp.called))
+        time.sleep(0.05)
+        mock_pyautogui.keyDown.assert_called_once_with('w')
+        mock_pyautogui.keyUp.assert_called_once_with('w')
+
+    def test_attack_clicks(self, mock_pyautogui, mock_gw):
+        self._focused(mock_gw)
+        dispatcher = InputDispatcher()
+        self.addCleanup(dispatcher.stop)
+
+        dispatcher.dispatch("attack")
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.click.called))
+        mock_pyautogui.keyDown.assert_not_called()
+
+    def test_chord_presses_together(self, mock_pyautogui, mock_gw):
+        self._focused(mock_gw)
+        dispatcher = InputDispatcher(hold_duration=0.05)
+        self.addCleanup(dispatcher.stop)
+
+        self.assertTrue(dispatcher.dispatch_chord([0, 13, 7]))  # move_forward + camera_left + attack
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyUp.call_count == 2))
+        self.assertEqual(sorted(call.args[0] for call in mock_pyautogui.keyDown.call_args_list), ['left', 'w'])
+        mock_pyautogui.click.assert_called_once_with(button='left')
+
+    def test_unknown_action(self, mock_pyautogui, mock_gw):
+        dispatcher = InputDispatcher()
+        self.assertFalse(dispatcher.dispatch("dance"))
+        self.assertFalse(dispatcher.running)
+
+    def test_refocuses_only_when_focus_is_lost(self, mock_pyautogui, mock_gw):
+        mock_gw.getActiveWindow.return_value = Mock(title="Other window")
+        window = Mock(isMinimized=False)
+        window.activate.side_effect = lambda: self._focused(mock_gw)
+        mock_gw.getWindowsWithTitle.return_value = [window]
+        dispatcher = InputDispatcher(hold_duration=0.01, activation_delay=0.01)
+        self.addCleanup(dispatcher.stop)
+
+        dispatcher.dispatch("jump")
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyUp.called))
+        window.activate.assert_called_once()
+        self.assertEqual(dispatcher.get_stats()["refocus"], 1)
+
+    def test_holds_input_until_focus_is_confirmed(self, mock_pyautogui, mock_gw):
+        mock_gw.getActiveWindow.return_value = Mock(title="Other window")
+        mock_gw.getWindowsWithTitle.return_value = []
+        dispatcher = InputDispatcher(hold_duration=0.01, focus_check_interval=0.05, activation_delay=0.01)
+        self.addCleanup(dispatcher.stop)
+
+        dispatcher.dispatch("jump")
+        time.sleep(0.2)  # Several throttled checks
+        mock_pyautogui.keyDown.assert_not_called()
+
+        # Re-activating does not take effect either
+        window = Mock(isMinimized=False)
+        mock_gw.getWindowsWithTitle.return_value = [window]
+        self.assertTrue(_wait_for(lambda: window.activate.call_count >= 2))
+        mock_pyautogui.keyDown.assert_not_called()
+
+        self._focused(mock_gw)
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyUp.called))
+        mock_pyautogui.keyDown.assert_called_once_with('space')
+
+    def test_wait_until_pressed(self, mock_pyautogui, mock_gw):
+        self._focused(mock_gw)
+        dispatcher = InputDispatcher(hold_duration=0.01)
+        self.addCleanup(dispatcher.stop)
+
+        self.assertTrue(dispatcher.wait_until_pressed(timeout=0))  # Nothing dispatched yet
+        dispatcher.dispatch("jump", delay=0.05)
+        self.assertFalse(dispatcher.wait_until_pressed(timeout=0.01))
+        self.assertTrue(dispatcher.wait_until_pressed(timeout=1.0))
+        mock_pyautogui.keyDown.assert_called_once_with('space')
+
+    def test_stop_releases_held_keys(self, mock_pyautogui, mock_gw):
+        self._focused(mock_gw)
+        dispatcher = InputDispatcher(hold_duration=5.0)
+
+        dispatcher.dispatch("move_left")
+        self.assertTrue(_wait_for(lambda: mock_pyautogui.keyDown.called))
+        dispatcher.stop()
+        mock_pyautogui.keyUp.assert_called_once_with('a')
+
+
+if __name__ == "__main__":
+    unittest.main()
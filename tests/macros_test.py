@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, Mock
+
+from utilities.action_registry import ACTION_REGISTRY
+from utilities.input_handler import InputDispatcher
+from utilities.macros import load_macros, register_macros
+
+
+class TestMacros(unittest.TestCase):
+    def setUp(self):
+        self.registry = ACTION_REGISTRY.copy()
+
+    def test_register_macros(self):
+        indices = register_macros(self.registry, [{
+            "name": "opener",
+            "steps": [
+                {"action": "use_skill_1", "at_ms": 150},
+                {"action": "find_target", "at_ms": 0},
+                {"action": "move_left", "at_ms": 200, "hold_ms": 500},
+            ]
+        }])
+        self.assertEqual(indices, [16])
+        macro = self.registry.get("opener")
+        self.assertEqual(macro.group, "macro")
+        self.assertEqual(macro.sequence, ((0.0, 12, 0.1), (0.15, 8, 0.1), (0.2, 2, 0.5)))
+        self.assertAlmostEqual(macro.hold, 0.7)
+        self.assertEqual(len(ACTION_REGISTRY), 16)  # The shared registry is unchanged
+
+    def test_invalid_macros_are_skipped(self):
+        indices = register_macros(self.registry, [
+            {"name": "bad_action", "steps": [{"action": "fly", "at_ms": 0}]},
+            {"name": "no_steps"},
+            {"name": "ok", "steps": [{"action": "attack"}]},
+        ])
+        self.assertEqual(indices, [16])
+        self.assertIsNone(self.registry.get("bad_action"))
+
+    def test_load_shipped_macros(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "data", "macros.json")
+        indices = register_macros(self.registry, load_macros(path))
+        self.assertGreater(len(indices), 0)
+
+    def test_load_missing_file(self):
+        self.assertEqual(load_macros("missing_macros.json"), [])
+
+    @patch('utilities.input_handler.gw')
+    @patch('utilities.input_handler.pyautogui')
+    def test_dispatcher_plays_sequence(self, mock_pyautogui, mock_gw):
+        mock_gw.getActiveWindow.return_value = Mock(title="TL 1.281.22.935")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "macros.json")
+            with open(path, "w") as f:
+                json.dump({"macros": [{"name": "double_tap", "steps": [
+                    {"action": "use_skill_1", "at_ms": 0, "hold_ms": 20},
+                    {"action": "use_skill_1", "at_ms": 80, "hold_ms": 20},
+                ]}]}, f)
+            register_macros(self.registry, load_macros(path))
+
+        dispatcher = InputDispatcher(registry=self.registry)
+        self.addCleanup(dispatcher.stop)
+        presses = []
+        mock_pyautogui.keyDown.side_effect = lambda key: presses.append(time.perf_counter())
+
+        start = time.perf_counter()
+        self.assertTrue(dispatcher.dispatch("double_tap"))
+        self.assertLess(time.perf_counter() - start, 0.05)
+        deadline = time.perf_counter() + 1.0
+        while mock_pyautogui.keyUp.call_count < 2 and time.perf_counter() < deadline:
+            time.sleep(0.005)
+
+        # Two separate taps of the same key, 80ms apart
+        self.assertEqual(mock_pyautogui.keyDown.call_count, 2)
+        self.assertEqual(mock_pyautogui.keyUp.call_count, 2)
+        self.assertAlmostEqual(presses[1] - presses[0], 0.08, delta=0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import cv2
+import numpy as np
+from environments.observation_builder import ObservationBuilder
+
+
+class TestObservationBuilder(unittest.TestCase):
+    def setUp(self):
+        self.builder = ObservationBuilder(resized_size=(160, 90))
+        rng = np.random.default_rng(0)
+        self.screen = rng.integers(0, 256, (1080, 1920, 4), dtype=np.uint8)
+
+    def test_build_matches_reference(self):
+        expected = cv2.resize(cv2.cvtColor(self.screen, cv2.COLOR_BGRA2BGR), (160, 90))
+        observation = self.builder.build(self.screen)
+        self.assertEqual(observation.shape, (90, 160, 3))
+        self.assertTrue(np.array_equal(observation, expected))
+
+    def test_build_reuses_buffers(self):
+        first = self.builder.build(self.screen)
+        second = self.builder.build(self.screen)
+        third = self.builder.build(self.screen)
+        self.assertIsNot(first, second)
+        self.assertIs(first, third)
+
+    def test_failed_capture_shape(self):
+        observation = self.builder.build(None)
+        self.assertEqual(observation.shape, (90, 160, 3))
+        self.assertFalse(observation.any())
+
+    def test_build_bgr_input(self):
+        screen = cv2.cvtColor(self.screen, cv2.COLOR_BGRA2BGR)
+        observation = self.builder.build(screen)
+        self.assertTrue(np.array_equal(observation, cv2.resize(screen, (160, 90))))
+
+
+if __name__ == "__main__":
+    unittest.main()
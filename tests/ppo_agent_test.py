@@ -0,0 +1,106 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+from sb3_contrib import RecurrentPPO
+from sb3_contrib.ppo_recurrent import CnnLstmPolicy
+
+from agents import ppo_agent
+from environments.frame_skip import DEFAULT_FRAME_SKIP
+from environments.replay_env import ReplayThroneEnv
+
+create_wrapped_env = ppo_agent.create_wrapped_env
+
+
+class TestTrainPPO(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.model_path = os.path.join(self.temp_dir.name, "models", "ppo_test")
+        self.envs = []
+
+    def _create_wrapped_env(self, **kwargs):
+        env = create_wrapped_env(**kwargs)
+        self.envs.append(env)
+        return env
+
+    def _small_model(self, model_path, env):
+        return RecurrentPPO(CnnLstmPolicy, env, n_steps=8, batch_size=8, n_epochs=1)
+
+    def test_closes_envs_and_step_events(self):
+        events_path = os.path.join(self.temp_dir.name, "steps.jsonl")
+        with patch.object(ppo_agent, "create_wrapped_env", side_effect=self._create_wrapped_env), \
+                patch.object(ppo_agent, "load_model_if_exists", side_effect=self._small_model):
+            ppo_agent.train_ppo(total_timesteps=8, model_path=self.model_path, backend="synthetic",
+                                step_events_path=events_path)
+
+        self.assertEqual(len(self.envs), 2)  # Training and evaluation
+        train_env = self.envs[0].venv.envs[0].unwrapped
+        stream = train_env.step_events
+        self.assertIsNone(stream._thread)
+        self.assertTrue(stream._file.closed)
+        self.assertFalse(any(thread.name == "StepEventStream" for thread in threading.enumerate()))
+        with open(events_path) as f:
+            self.assertEqual(len(f.readlines()), stream.emitted)
+        self.assertTrue(os.path.exists(self.model_path + ".zip"))
+
+    def test_without_save_leaves_the_model_directory_untouched(self):
+        with patch.object(ppo_agent, "create_wrapped_env", side_effect=self._create_wrapped_env), \
+                patch.object(ppo_agent, "load_model_if_exists", side_effect=self._small_model):
+            ppo_agent.train_ppo(total_timesteps=8, model_path=self.model_path, backend="synthetic", save=False)
+        self.assertEqual(len(self.envs), 1)  # No evaluation environment
+        self.assertFalse(os.path.exists(os.path.dirname(self.model_path)))
+
+
+class TestStepTimingCallback(unittest.TestCase):
+    def test_records_pacing_stats(self):
+        records = {}
+        training_env = Mock()
+        training_env.env_method.return_value = [
+            {"ticks": 10, "overruns": 2, "max_overrun_ms": 30.0, "mean_jitter_ms": 0.5, "idle_time": 0.4},
+            {"ticks": 10, "overruns": 0, "max_overrun_ms": 0.0, "mean_jitter_ms": 0.2, "idle_time": 0.6},
+        ]
+        callback = ppo_agent.StepTimingCallback()
+        callback.model = Mock(logger=Mock(record=records.__setitem__))
+        callback.model.get_env.return_value = training_env
+        callback._on_rollout_start()
+        callback._on_rollout_end()
+        training_env.env_method.assert_called_once_with("get_pacing_stats", reset=True)
+        self.assertAlmostEqual(records["pacing/overrun_rate"], 0.1)
+        self.assertEqual(records["pacing/max_overrun_ms"], 30.0)
+        self.assertAlmostEqual(records["pacing/mean_jitter_ms"], (0.5 * 8 + 0.2 * 10) / 18)
+        self.assertAlmostEqual(records["pacing/idle_s"], 1.0)
+
+
+class TestRewardTelemetryCallback(unittest.TestCase):
+    def test_buffers_hold_a_rollout(self):
+        env = ppo_agent.create_wrapped_env(backend="synthetic", n_envs=2, frame_skip=DEFAULT_FRAME_SKIP)
+        self.addCleanup(env.close)
+        callback = ppo_agent.RewardTelemetryCallback()
+        callback.model = Mock(n_steps=1500)
+        callback.model.get_env.return_value = env
+        callback._on_training_start()
+        self.assertTrue(callback.enabled)
+        self.assertEqual([e.unwrapped.reward_manager.telemetry.capacity for e in env.venv.envs], [6000, 6000])
+
+
+class TestCreateWrappedEnv(unittest.TestCase):
+    def test_recordings_can_be_replayed(self):
+        with tempfile.TemporaryDirectory() as record_path:
+            env = ppo_agent.create_wrapped_env(backend="synthetic", record_path=record_path)
+            env.reset()
+            for _ in range(3):
+                env.step([12])
+            env.close()
+
+            replay = ReplayThroneEnv(os.path.join(record_path, "env_0"))
+            _, info = replay.reset()
+            _, _, _, _, info = replay.step(12)
+            replay.close()
+        self.assertEqual(info["replay_index"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from sb3_contrib import RecurrentPPO
+
+from utilities.profiler import DEFAULT_GROUPS, AllocationTracker, ProfileSession, SamplingProfiler
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def hud_work():
+    _busy(0.1)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_collapsed_stacks(self):
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        hud_work()
+        profiler.stop()
+        self.assertGreater(profiler.samples, 10)
+        stacks = [stack for stack in profiler.stacks if stack.startswith("MainThread;")]
+        self.assertTrue(any(stack.endswith("profiler_test.py:hud_work;profiler_test.py:_busy") for stack in stacks))
+        self.assertFalse(any("SamplingProfiler" in stack for stack in profiler.stacks))
+
+        summary = profiler.summarize({"hud": ("profiler_test.py", "hud_work"), "other": ("other.py", None)})
+        self.assertGreater(summary["hud"]["fraction"], 0.8)
+        self.assertEqual(summary["other"]["samples"], 0)
+
+    def test_profile_session_writes_files(self):
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        with ProfileSession(output_dir, interval=0.002):
+            hud_work()
+            buffers = [bytearray(1024) for _ in range(100)]
+        self.assertEqual(sorted(os.listdir(output_dir)), ["allocations.txt", "profile.collapsed", "profile_summary.txt"])
+        with open(os.path.join(output_dir, "profile.collapsed")) as f:
+            lines = f.read().splitlines()
+        # Other tests may leave daemon threads (e.g. tqdm's monitor) that are sampled too
+        for line in lines:
+            self.assertRegex(line, r"^[^;]+;.* \d+$")
+        self.assertTrue(any(line.startswith("MainThread;") and "hud_work" in line for line in lines))
+        with open(os.path.join(output_dir, "allocations.txt")) as f:
+            self.assertIn("profiler_test.py", f.read())
+        self.assertEqual(len(buffers), 100)
+
+    def test_sb3_groups_match_recurrent_ppo(self):
+        for group, method in (("sb3_rollout", RecurrentPPO.collect_rollouts), ("sb3_train", RecurrentPPO.train)):
+            file_suffix, function = DEFAULT_GROUPS[group]
+            self.assertTrue(method.__code__.co_filename.endswith(file_suffix), group)
+            self.assertEqual(method.__code__.co_name, function)
+
+
+class TestAllocationTracker(unittest.TestCase):
+    def test_reports_buffers_freed_before_stop(self):
+        tracker = AllocationTracker(interval=0.01)
+        tracker.start()
+        for _ in range(5):
+            step_buffer = bytearray(1 << 20)
+            time.sleep(0.03)
+            del step_buffer
+        tracker.stop()
+        report = tracker.format(top=5)
+        site = next(line for line in report.splitlines() if "profiler_test.py" in line)
+        fields = site.split()
+        peak, end = float(fields[0]), float(fields[3])
+        self.assertGreaterEqual(peak, 1024)
+        self.assertLess(end, 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from environments.region_cache import RegionCache
+from environments.health_bar_estimator import HealthBarEstimator
+
+
+class TestRegionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RegionCache()
+        self.roi = np.zeros((18, 207, 4), dtype=np.uint8)
+
+    def test_get_or_compute_hits_unchanged_region(self):
+        compute = Mock(return_value=0.5)
+        self.assertEqual(self.cache.get_or_compute("player_health", self.roi, compute), 0.5)
+        self.assertEqual(self.cache.get_or_compute("player_health", self.roi.copy(), compute), 0.5)
+        compute.assert_called_once()
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+
+    def test_single_column_change_is_detected(self):
+        compute = Mock(return_value=0.5)
+        self.cache.get_or_compute("player_health", self.roi, compute)
+        changed = self.roi.copy()
+        changed[:, 100] = 255
+        self.cache.get_or_compute("player_health", changed, compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_invalidate(self):
+        compute = Mock(return_value=0.5)
+        self.cache.get_or_compute("player_health", self.roi, compute)
+        self.cache.invalidate("player_health")
+        self.cache.get_or_compute("player_health", self.roi, compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_estimator_reuses_unchanged_bars(self):
+        estimator = HealthBarEstimator(region_cache=self.cache)
+        estimator.register_bar("player_health", {"start": (0, 0), "width": 100, "height": 10})
+        estimator.register_bar("target_health", {"start": (0, 20), "width": 100, "height": 10})
+        screen = np.zeros((30, 100, 4), dtype=np.uint8)
+        screen[0:10, :50] = 255
+        screen[20:30, :30] = 255
+
+        first = estimator.estimate(screen)
+        screen[20:30, 30:40] = 255  # Only the target bar changes
+        second = estimator.estimate(screen)
+
+        self.assertAlmostEqual(first["player_health"], 0.5)
+        self.assertAlmostEqual(second["player_health"], 0.5)
+        self.assertAlmostEqual(second["target_health"], 0.4)
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+        self.assertEqual(self.cache.get_stats()["misses"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
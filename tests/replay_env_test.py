@@ -0,0 +1,82 @@
+import logging
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from environments.replay_env import ReplayThroneEnv
+from environments.throne_env import ThroneAndLibertyEnv
+from environments.trajectory_recorder import TrajectoryRecorder
+
+
+class TestReplayThroneEnv(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+        cls.path = tempfile.mkdtemp()
+        recorder = TrajectoryRecorder(ThroneAndLibertyEnv(backend="synthetic"), cls.path, frames="raw", chunk_size=8)
+        cls.observations = []
+        cls.rewards = []
+        for actions in ([12, 7, 7, 0, 8, 7], [12, 9, 0]):  # find_target, attacks and skills
+            observation, _ = recorder.reset()
+            cls.observations.append(observation.copy())
+            cls.rewards.append(None)
+            for action in actions:
+                observation, reward, _, _, _ = recorder.step(action)
+                cls.observations.append(observation.copy())
+                cls.rewards.append(reward)
+        recorder.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(cls.path)
+
+    def setUp(self):
+        self.env = ReplayThroneEnv(self.path)
+        self.addCleanup(self.env.close)
+
+    def test_open_loop_reproduces_recording(self):
+        observation, info = self.env.reset()
+        self.assertEqual(info["replay_index"], 0)
+        np.testing.assert_array_equal(observation, self.observations[0])
+        for index in range(1, 7):
+            observation, reward, terminated, truncated, info = self.env.step(15)  # Action is ignored
+            self.assertEqual(info["replay_index"], index)
+            np.testing.assert_array_equal(observation, self.observations[index])
+            self.assertEqual(reward, self.rewards[index])
+            self.assertEqual(info["recorded_reward"], np.float32(self.rewards[index]))
+        self.assertTrue(truncated)
+        self.assertFalse(terminated)
+
+    def test_episodes_cycle(self):
+        self.env.reset()
+        _, info = self.env.reset()
+        self.assertEqual(info["replay_index"], 7)
+        _, info = self.env.reset()
+        self.assertEqual(info["replay_index"], 0)
+        _, info = self.env.reset(options={"episode": 1})
+        self.assertEqual(info["replay_index"], 7)
+
+    def test_nearest_action(self):
+        env = ReplayThroneEnv(self.path, policy="nearest_action")
+        self.addCleanup(env.close)
+        env.reset()
+        _, _, _, _, info = env.step(8)  # use_skill_1 is recorded 5 steps ahead
+        self.assertEqual(info["replay_index"], 5)
+        _, _, _, _, info = env.step(11)  # Not recorded: next step
+        self.assertEqual(info["replay_index"], 6)
+        self.assertEqual(info["recorded_action"][0], 7)
+
+    def test_requires_raw_frames(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        recorder = TrajectoryRecorder(ThroneAndLibertyEnv(backend="synthetic"), path)
+        recorder.reset()
+        recorder.close()
+        with self.assertRaises(ValueError):
+            ReplayThroneEnv(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from environments.reward_manager import RewardManager, REWARD_COMPONENTS
+from environments.reward_telemetry import RewardTelemetry, summarize_components
+
+
+class TestRewardTelemetry(unittest.TestCase):
+    def test_drain_in_order(self):
+        telemetry = RewardTelemetry(("a", "b"), capacity=4)
+        for step in range(3):
+            telemetry.record([step, -step])
+        np.testing.assert_array_equal(telemetry.drain(), [[0, 1, 2], [0, -1, -2]])
+        self.assertEqual(telemetry.drain().shape, (2, 0))
+
+    def test_wraps_and_counts_dropped_steps(self):
+        telemetry = RewardTelemetry(("a",), capacity=4)
+        for step in range(6):
+            telemetry.record([step])
+        np.testing.assert_array_equal(telemetry.drain(), [[2, 3, 4, 5]])
+        self.assertEqual(telemetry.dropped, 2)
+        telemetry.record([6])
+        np.testing.assert_array_equal(telemetry.drain(), [[6]])
+        self.assertEqual(telemetry.total, 7)
+
+    def test_reserve(self):
+        telemetry = RewardTelemetry(("a",), capacity=4)
+        telemetry.record([1])
+        telemetry.reserve(2)
+        self.assertEqual(telemetry.capacity, 4)
+        telemetry.reserve(6)
+        for step in range(6):
+            telemetry.record([step])
+        np.testing.assert_array_equal(telemetry.drain(), [[0, 1, 2, 3, 4, 5]])
+        self.assertEqual(telemetry.dropped, 0)
+
+    def test_summarize(self):
+        telemetry = RewardTelemetry(("survival", "kill"), capacity=8)
+        for survival, kill in ((10, 0), (8, 0), (6, 50), (4, 0)):
+            telemetry.record([survival, kill])
+        summary = telemetry.summarize()
+        self.assertAlmostEqual(summary["survival"]["mean"], 7.0)
+        self.assertAlmostEqual(summary["survival"]["var"], 5.0)
+        self.assertAlmostEqual(summary["kill"]["rate"], 0.25)
+        self.assertEqual(telemetry.summarize(), {})
+
+    def test_summarize_empty_window(self):
+        self.assertEqual(summarize_components(np.zeros((2, 0)), ("a", "b")), {})
+
+
+class TestRewardManagerTelemetry(unittest.TestCase):
+    def test_components_recorded(self):
+        movement_manager = Mock()
+        movement_manager.calculate_movement_reward.return_value = 0
+        movement_manager.calculate_exploration_reward.return_value = 5
+        combat_manager = Mock()
+        combat_manager.calculate_combat_reward.return_value = (2, 0)
+        combat_manager.missed_target_penalty.return_value = -20
+        reward_manager = RewardManager(Mock(), movement_manager, combat_manager, telemetry_capacity=16)
+
+        reward = reward_manager.calculate_reward({"player_hud_data": {"health": 0.9},
+                                                  "target_hud_data": {"health": 0.5}})
+        reward_manager.calculate_reward({"player_hud_data": {"health": 0.0}})
+
+        window = reward_manager.telemetry.drain()
+        self.assertEqual(window.shape, (len(REWARD_COMPONENTS), 2))
+        column = dict(zip(REWARD_COMPONENTS, window[:, 0]))
+        self.assertAlmostEqual(column["survival_reward"], 9.0)
+        self.assertEqual(column["combat_reward"], 2)
+        self.assertEqual(column["missed_target_penalty"], -20)
+        self.assertEqual(column["death_penalty"], 0)
+        self.assertAlmostEqual(column["normalized_reward"], reward)
+        death = REWARD_COMPONENTS.index("death_penalty")
+        self.assertEqual(window[death, 1], -500)
+        self.assertEqual(reward_manager.last_components[death], -500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from utilities.screen_capture import ScreenCapturer, BackgroundCapturer
+
+
+class TestScreenCapturer(unittest.TestCase):
+    def setUp(self):
+        self.region = {"top": 0, "left": 0, "width": 1920, "height": 1080}
+        self.frame = np.zeros((1080, 1920, 4), dtype=np.uint8)
+
+    @patch('utilities.screen_capture.mss')
+    @patch('utilities.screen_capture.get_game_region')
+    def test_geometry_is_cached(self, mock_get_game_region, mock_mss):
+        mock_get_game_region.return_value = self.region
+        mock_mss.return_value.grab.return_value = self.frame
+
+        capturer = ScreenCapturer(window_title="TL")
+        for _ in range(3):
+            screen = capturer.grab()
+            self.assertEqual(screen.shape, (1080, 1920, 4))
+
+        mock_get_game_region.assert_called_once_with("TL")
+        mock_mss.assert_called_once()
+        self.assertEqual(capturer.get_timing_stats()["grabs"], 3)
+
+    @patch('utilities.screen_capture.mss')
+    @patch('utilities.screen_capture.get_game_region')
+    def test_failed_grab_requeries_geometry(self, mock_get_game_region, mock_mss):
+        mock_get_game_region.return_value = self.region
+        mock_mss.return_value.grab.side_effect = [Exception("moved"), self.frame]
+
+        capturer = ScreenCapturer(window_title="TL")
+        screen = capturer.grab()
+        self.assertIsNotNone(screen)
+        self.assertEqual(mock_get_game_region.call_count, 2)
+
+    @patch('utilities.screen_capture.mss')
+    @patch('utilities.screen_capture.get_game_region')
+    def test_invalidate(self, mock_get_game_region, mock_mss):
+        mock_get_game_region.return_value = self.region
+        mock_mss.return_value.grab.return_value = self.frame
+
+        capturer = ScreenCapturer(window_title="TL")
+        capturer.grab()
+        capturer.invalidate()
+        capturer.grab()
+        self.assertEqual(mock_get_game_region.call_count, 2)
+
+    @patch('utilities.screen_capture.mss')
+    @patch('utilities.screen_capture.get_game_region')
+    def test_missing_window_returns_none(self, mock_get_game_region, mock_mss):
+        mock_get_game_region.return_value = None
+
+        capturer = ScreenCapturer(window_title="TL")
+        self.assertIsNone(capturer.grab())
+        self.assertEqual(capturer.get_timing_stats()["failures"], 1)
+
+    @patch('utilities.screen_capture.mss')
+    @patch('utilities.screen_capture.get_game_region')
+    def test_geometry_listener_on_resize(self, mock_get_game_region, mock_mss):
+        mock_get_game_region.return_value = self.region
+        mock_mss.return_value.grab.return_value = self.frame
+        sizes = []
+
+        capturer = ScreenCapturer(window_title="TL")
+        capturer.add_geometry_listener(sizes.append)
+        capturer.grab()
+        capturer.grab()
+        capturer.on_resize({"top": 0, "left": 0, "width": 1280, "height": 720})
+        self.assertEqual(sizes, [(1920, 1080), (1280, 720)])
+
+
+class TestBackgroundCapturer(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('utilities.screen_capture.ScreenCapturer')
+        self.MockScreenCapturer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.MockScreenCapturer.return_value.grab.return_value = np.ones((108, 192, 4), dtype=np.uint8)
+
+    def test_latest_frame_after_timestamp(self):
+        capturer = BackgroundCapturer(window_title="TL", target_fps=200, max_staleness=0.5)
+        capturer.start()
+        try:
+            action_time = time.perf_counter()
+            frame, timestamp = capturer.latest_frame(after=action_time)
+            self.assertIsNotNone(frame)
+            self.assertEqual(frame.shape, (108, 192, 4))
+            self.assertGreaterEqual(timestamp, action_time)
+        finally:
+            capturer.stop()
+        self.assertGreater(capturer.get_stats()["captured"], 0)
+        self.assertEqual(capturer.get_stats()["consumed"], 1)
+
+    def test_held_slot_is_not_overwritten(self):
+        capturer = BackgroundCapturer(window_title="TL", target_fps=200, max_staleness=0.5)
+        capturer.start()
+        try:
+            frame, _ = capturer.latest_frame()
+            frame[:] = 7
+            time.sleep(0.05)
+            self.assertTrue(np.all(frame == 7))
+        finally:
+            capturer.stop()
+        self.assertGreater(capturer.get_stats()["dropped"], 0)
+
+    def test_stale_when_no_frames(self):
+        self.MockScreenCapturer.return_value.grab.return_value = None
+        capturer = BackgroundCapturer(window_title="TL", target_fps=200, max_staleness=0.05)
+        capturer.start()
+        try:
+            frame, timestamp = capturer.latest_frame()
+        finally:
+            capturer.stop()
+        self.assertIsNone(frame)
+        self.assertIsNone(timestamp)
+        self.assertEqual(capturer.get_stats()["stale"], 1)
+
+    def test_ring_size_validation(self):
+        with self.assertRaises(ValueError):
+            BackgroundCapturer(ring_size=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
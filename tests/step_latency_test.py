@@ -0,0 +1,34 @@
+import logging
+import unittest
+
+import numpy as np
+from benchmarks.step_latency import STAGES, compare, run_benchmarks, summarize
+
+
+class TestStepLatency(unittest.TestCase):
+    def test_summarize(self):
+        summary = summarize(np.array([0.001] * 98 + [0.010, 0.020]))
+        self.assertAlmostEqual(summary["p50_ms"], 1.0)
+        self.assertAlmostEqual(summary["max_ms"], 20.0)
+        self.assertAlmostEqual(summary["per_second"], 100 / 0.128)
+
+    def test_run_benchmarks(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        results = run_benchmarks(resolutions=[(1280, 720)], observation_sizes=[(160, 90)], iterations=5, warmup=1)
+        self.assertEqual(len(results["results"]), 1)
+        entry = results["results"][0]
+        self.assertEqual(entry["resolution"], [1280, 720])
+        self.assertEqual(set(entry["stages"]), set(STAGES))
+        for stage in entry["stages"].values():
+            self.assertLessEqual(stage["p50_ms"], stage["p99_ms"])
+            self.assertIn("alloc_peak_bytes", stage)
+
+        # The same results are no regression; a slower step is
+        self.assertEqual(compare(results, results), [])
+        baseline = {"results": [dict(entry, stages={"step": {"p50_ms": entry["stages"]["step"]["p50_ms"] / 2}})]}
+        self.assertEqual([regression[2] for regression in compare(results, baseline)], ["step"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import time
+import unittest
+
+from utilities.step_logging import SamplingFilter, LazyQueueHandler, configure_logging, StepEventStream
+
+
+def make_record(name, level=logging.DEBUG, msg="value %s", args=(1,)):
+    return logging.LogRecord(name, level, __file__, 0, msg, args, None)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    def test_rate(self):
+        sampling_filter = SamplingFilter({"step.hud": 0.1})
+        kept = sum(sampling_filter.filter(make_record("step.hud")) for _ in range(100))
+        self.assertEqual(kept, 10)
+
+    def test_longest_prefix(self):
+        sampling_filter = SamplingFilter({"step": 1.0, "step.hud": 0.0})
+        self.assertTrue(sampling_filter.filter(make_record("step.reward")))
+        self.assertFalse(sampling_filter.filter(make_record("step.hud.bars")))
+        self.assertTrue(sampling_filter.filter(make_record("root")))
+
+    def test_warnings_always_kept(self):
+        sampling_filter = SamplingFilter({"step.hud": 0.0})
+        self.assertTrue(sampling_filter.filter(make_record("step.hud", level=logging.WARNING)))
+
+
+class TestLazyQueueHandler(unittest.TestCase):
+    def test_record_not_formatted(self):
+        log_queue = queue.SimpleQueue()
+        handler = LazyQueueHandler(log_queue)
+        handler.handle(make_record("step.action"))
+        record = log_queue.get_nowait()
+        self.assertEqual(record.args, (1,))
+        self.assertEqual(record.getMessage(), "value 1")
+
+
+class TestConfigureLogging(unittest.TestCase):
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved_handlers = self.root.handlers[:]
+        self.saved_level = self.root.level
+
+    def tearDown(self):
+        for handler in self.root.handlers[:]:
+            self.root.removeHandler(handler)
+        for handler in self.saved_handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved_level)
+
+    def test_writes_sampled_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, "training.log")
+            listener = configure_logging(level=logging.DEBUG, log_file=log_file, console=False,
+                                         sample_rates={"step.action": 0.5})
+            action_log = logging.getLogger("step.action")
+            for i in range(10):
+                action_log.debug("Performing action: %s", i)
+            logging.info("Done")
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+            with open(log_file) as f:
+                lines = f.read().splitlines()
+        self.assertEqual(sum("Performing action" in line for line in lines), 5)
+        self.assertIn("INFO - Done", lines[-1])
+
+
+class TestStepEventStream(unittest.TestCase):
+    def test_background_flush(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "steps.jsonl")
+            stream = StepEventStream(path, flush_interval=0.01)
+            for i in range(5):
+                stream.emit({"frame_id": i, "reward": 0.5})
+            deadline = time.time() + 2.0
+            while stream.written < 5 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(stream.written, 5)
+            stream.close()
+
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+        self.assertEqual([event["frame_id"] for event in events], list(range(5)))
+
+    def test_manual_flush(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "steps.jsonl")
+            stream = StepEventStream(path, flush_interval=None)
+            stream.emit({"frame_id": 0})
+            self.assertEqual(stream.written, 0)
+            stream.flush()
+            self.assertEqual(stream.written, 1)
+            stream.emit({"frame_id": 1})
+            stream.close()
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import time
+import unittest
+
+from environments.step_pacer import StepPacer
+
+
+class TestStepPacer(unittest.TestCase):
+    def test_fixed_rate(self):
+        pacer = StepPacer(rate_hz=50)
+        start = time.perf_counter()
+        for _ in range(11):
+            pacer.wait()
+        elapsed = time.perf_counter() - start
+        self.assertAlmostEqual(elapsed, 10 * 0.02, delta=0.01)
+        stats = pacer.get_stats()
+        self.assertEqual(stats["ticks"], 10)
+        self.assertEqual(stats["overruns"], 0)
+        self.assertEqual(sum(stats["jitter_histogram"]["counts"]), 10)
+        self.assertLess(stats["max_jitter_ms"], 5.0)
+
+    def test_overrun_restarts_schedule(self):
+        pacer = StepPacer(rate_hz=100)
+        pacer.wait()
+        time.sleep(0.035)  # Work that takes more than three periods
+        overrun = pacer.wait()
+        self.assertGreater(overrun, 0.02)
+        start = time.perf_counter()
+        pacer.wait()  # No burst to catch up: the next tick is a full period away
+        self.assertGreater(time.perf_counter() - start, 0.008)
+
+        stats = pacer.get_stats()
+        self.assertEqual(stats["overruns"], 1)
+        self.assertEqual(stats["missed_ticks"], 2)
+        self.assertEqual(sum(stats["overrun_histogram"]["counts"]), 1)
+
+    def test_idle_hooks_use_spare_time(self):
+        pacer = StepPacer(rate_hz=20)
+        calls = []
+        pacer.add_idle_hook(lambda: calls.append("flush"))
+        pacer.add_idle_hook(lambda: 1 / 0)  # Errors are logged, not raised
+        pacer.wait()
+        pacer.wait()
+        self.assertEqual(calls, ["flush"])
+
+    def test_reset(self):
+        pacer = StepPacer(rate_hz=10)
+        pacer.wait()
+        pacer.reset()
+        start = time.perf_counter()
+        pacer.wait()
+        self.assertLess(time.perf_counter() - start, 0.01)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            StepPacer(rate_hz=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import time
+import unittest
+
+from environments.step_timer import StepTimer, NULL_STEP_TIMER
+
+
+class TestStepTimer(unittest.TestCase):
+    def test_spans(self):
+        timer = StepTimer()
+        timer.start()
+        time.sleep(0.01)
+        timer.mark("capture")
+        timer.mark("hud")
+        time.sleep(0.01)
+        timer.mark("capture")
+        spans = timer.finish()
+        self.assertGreaterEqual(spans["capture"], 0.02)
+        self.assertLess(spans["hud"], 0.005)
+        self.assertGreaterEqual(spans["total"], spans["capture"] + spans["hud"])
+
+    def test_new_spans_per_step(self):
+        timer = StepTimer()
+        timer.start()
+        timer.mark("input")
+        first = timer.finish()
+        timer.start()
+        self.assertIn("input", first)
+        self.assertEqual(timer.spans, {})
+
+    def test_null_timer(self):
+        NULL_STEP_TIMER.start()
+        NULL_STEP_TIMER.mark("capture")
+        self.assertIsNone(NULL_STEP_TIMER.finish())
+        self.assertFalse(NULL_STEP_TIMER.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
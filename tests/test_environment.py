@@ -1,6 +1,7 @@
 # tests/test_environment.py
 from environments.throne_env import ThroneAndLibertyEnv
 import logging
+import tempfile
 
 
 def test_environment():
@@ -13,13 +14,16 @@ def test_environment():
         ]
     )
 
-    env = ThroneAndLibertyEnv()
+    cache_dir = tempfile.TemporaryDirectory()
+    env = ThroneAndLibertyEnv(cache_dir=cache_dir.name)
     obs, info = env.reset()
     logging.info("Environment reset successfully.")
 
     action = env.action_space.sample()
     obs, reward, done, truncated, info = env.step(action)
     logging.info(f"Performed action: {action}, Reward: {reward}, Done: {done}")
+    env.close()
+    cache_dir.cleanup()
 
 
 if __name__ == "__main__":
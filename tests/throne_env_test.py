@@ -1,8 +1,14 @@
+import json
+import os
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, Mock
 
 import numpy as np
+from environments.synthetic_game import make_synthetic_backends
 from environments.throne_env import ThroneAndLibertyEnv
+from utilities.input_handler import InputDispatcher
 
 
 class TestThroneAndLibertyEnv(unittest.TestCase):
@@ -28,20 +34,22 @@ class TestThroneAndLibertyEnv(unittest.TestCase):
         # Mock the reset methods
         MockMovementManager.return_value.reset.return_value = None
         MockCombatManager.return_value.reset.return_value = None
-        # Mock get_screen_observation to return an np.ndarray
-        MockHUDManager.return_value.get_screen_observation.return_value = np.zeros((90, 160, 1), dtype=np.uint8)
+        # Mock build_observation to return an np.ndarray
+        MockHUDManager.return_value.build_observation.return_value = np.zeros((90, 160, 1), dtype=np.uint8)
 
         env = ThroneAndLibertyEnv()
         initial_state, _ = env.reset()
         self.assertIsNotNone(initial_state)
         self.assertIsInstance(initial_state, np.ndarray)
 
+    @patch('environments.throne_env.InputDispatcher')
     @patch('environments.throne_env.perform_action')
     @patch('environments.throne_env.RewardManager')
     @patch('environments.throne_env.CombatManager')
     @patch('environments.throne_env.MovementManager')
     @patch('environments.throne_env.HUDManager')
-    def test_step(self, MockHUDManager, MockMovementManager, MockCombatManager, MockRewardManager, mock_perform_action):
+    def test_step(self, MockHUDManager, MockMovementManager, MockCombatManager, MockRewardManager, mock_perform_action,
+                  MockInputDispatcher):
         # Set up the mocks
         mock_perform_action.return_value = None
         MockRewardManager.return_value.calculate_reward.return_value = 0.0  # Set to float
@@ -50,13 +58,35 @@ class TestThroneAndLibertyEnv(unittest.TestCase):
             "target_hud": {},
             "info": {}
         }
-        MockHUDManager.return_value.get_screen_observation.return_value = np.zeros((90, 160, 1), dtype=np.uint8)
+        MockHUDManager.return_value.build_observation.return_value = np.zeros((90, 160, 1), dtype=np.uint8)
 
         env = ThroneAndLibertyEnv()
         observation, reward, terminated, _, _ = env.step(0)
         self.assertIsInstance(observation, np.ndarray)
         self.assertIsInstance(reward, float)
         self.assertIsInstance(terminated, bool)
+        MockInputDispatcher.return_value.dispatch.assert_called_once_with(0)
+        mock_perform_action.assert_not_called()
+
+    @patch('environments.throne_env.InputDispatcher')
+    @patch('environments.throne_env.RewardManager')
+    @patch('environments.throne_env.CombatManager')
+    @patch('environments.throne_env.MovementManager')
+    @patch('environments.throne_env.HUDManager')
+    def test_step_multi_discrete(self, MockHUDManager, MockMovementManager, MockCombatManager, MockRewardManager,
+                                 MockInputDispatcher):
+        MockRewardManager.return_value.calculate_reward.return_value = 0.0
+        MockHUDManager.return_value.process_hud.return_value = {
+            "player_hud": {"health": 1.0},
+            "target_hud": {},
+            "info": {}
+        }
+        MockHUDManager.return_value.build_observation.return_value = np.zeros((90, 160, 3), dtype=np.uint8)
+
+        env = ThroneAndLibertyEnv(action_mode="multi_discrete")
+        self.assertEqual(list(env.action_space.nvec), [6, 5, 8])
+        env.step(np.array([1, 0, 1]))
+        MockInputDispatcher.return_value.dispatch_chord.assert_called_once_with((0, 7))
 
     @patch('environments.throne_env.RewardManager')
     @patch('environments.throne_env.CombatManager')
@@ -69,7 +99,7 @@ class TestThroneAndLibertyEnv(unittest.TestCase):
             "target_hud": {},
             "info": {}
         }
-        MockHUDManager.return_value.get_screen_observation.return_value = np.zeros((90, 160, 1), dtype=np.uint8)
+        MockHUDManager.return_value.build_observation.return_value = np.zeros((90, 160, 1), dtype=np.uint8)
 
         env = ThroneAndLibertyEnv()
         state = env._get_state()
@@ -79,6 +109,24 @@ class TestThroneAndLibertyEnv(unittest.TestCase):
         self.assertIn('target_hud_data', state)
         self.assertIn('info', state)
 
+    @patch('environments.throne_env.RewardManager')
+    @patch('environments.throne_env.CombatManager')
+    @patch('environments.throne_env.MovementManager')
+    @patch('environments.throne_env.HUDManager')
+    def test_get_state_single_capture(self, MockHUDManager, MockMovementManager, MockCombatManager, MockRewardManager):
+        MockHUDManager.return_value.process_hud.return_value = {
+            "player_hud": {"health": 1.0},
+            "target_hud": {},
+            "info": {}
+        }
+        MockHUDManager.return_value.build_observation.return_value = np.zeros((90, 160, 3), dtype=np.uint8)
+
+        env = ThroneAndLibertyEnv()
+        state = env._get_state()
+        MockHUDManager.return_value.capture_frame.assert_called_once()
+        MockHUDManager.return_value.get_screen_observation.assert_not_called()
+        self.assertEqual(state['info']['frame_id'], state['frame_id'])
+
     @patch('environments.throne_env.RewardManager')
     @patch('environments.throne_env.CombatManager')
     @patch('environments.throne_env.MovementManager')
@@ -97,6 +145,113 @@ class TestThroneAndLibertyEnv(unittest.TestCase):
         done = env._check_done({"player_hud_data": {"health": 0.0}})
         self.assertTrue(done)
 
+    def test_step_timing(self):
+        env = ThroneAndLibertyEnv(backend="synthetic", timing=True)
+        self.addCleanup(env.close)
+        env.reset()
+        _, _, _, _, info = env.step(0)
+        timings = info["timings"]
+        self.assertEqual(set(timings), {"wait", "input", "capture", "observation", "hud", "reward", "total"})
+        self.assertAlmostEqual(sum(timings.values()) - timings["total"], timings["total"], delta=1e-4)
+
+        env = ThroneAndLibertyEnv(backend="synthetic")
+        self.addCleanup(env.close)
+        env.reset()
+        _, _, _, _, info = env.step(0)
+        self.assertNotIn("timings", info)
+
+    @patch('utilities.input_handler.gw')
+    @patch('utilities.input_handler.pyautogui')
+    def test_async_input_is_sent_before_capture(self, mock_pyautogui, mock_gw):
+        events = []
+        mock_pyautogui.keyDown.side_effect = lambda key: events.append("key_down")
+
+        def active_window():
+            time.sleep(0.02)  # A slow focus check delays the dispatcher thread
+            return Mock(title="TL 1.281.22.935")
+        mock_gw.getActiveWindow.side_effect = active_window
+
+        capture, _ = make_synthetic_backends()
+        grab = capture.grab
+
+        def recording_grab():
+            events.append("capture")
+            return grab()
+        capture.grab = recording_grab
+        dispatcher = InputDispatcher(hold_duration=0.01)
+        env = ThroneAndLibertyEnv(capture_backend=capture, input_backend=dispatcher)
+        self.addCleanup(env.close)
+        env.reset()
+        del events[:]
+
+        env.step(0)
+        self.assertEqual(events[:2], ["key_down", "capture"])
+
+    @patch('utilities.input_handler.gw')
+    @patch('utilities.input_handler.pyautogui')
+    def test_macro_plays_without_blocking_the_step(self, mock_pyautogui, mock_gw):
+        mock_gw.getActiveWindow.return_value = Mock(title="TL 1.281.22.935")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            macros_path = os.path.join(temp_dir, "macros.json")
+            with open(macros_path, "w") as f:
+                json.dump({"macros": [{"name": "slow", "steps": [
+                    {"action": "use_skill_1", "at_ms": 0, "hold_ms": 20},
+                    {"action": "use_skill_2", "at_ms": 200, "hold_ms": 20},
+                ]}]}, f)
+            capture, _ = make_synthetic_backends()
+            env = ThroneAndLibertyEnv(capture_backend=capture, macros_path=macros_path)
+        self.addCleanup(env.close)
+        env.input_dispatcher = InputDispatcher(hold_duration=None, registry=env.action_registry)
+        env.reset()
+
+        start = time.perf_counter()
+        _, _, _, _, info = env.step(env.action_registry.index("slow"))
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertNotIn("macro_playing", info)
+
+        _, _, _, _, info = env.step(0)  # move_forward
+        self.assertTrue(info["macro_playing"])
+        time.sleep(0.25)
+        _, _, _, _, info = env.step(0)
+        self.assertNotIn("macro_playing", info)
+        env.input_dispatcher.wait_until_pressed()
+        self.assertEqual([call.args[0] for call in mock_pyautogui.keyDown.call_args_list], ['1', '2', 'w'])
+
+    def test_observations_outlive_later_steps(self):
+        env = ThroneAndLibertyEnv(backend="synthetic")
+        self.addCleanup(env.close)
+        observations = [env.reset()[0]]
+        for action in (12, 13, 13, 0):  # find_target, camera_left, camera_left, move_forward
+            observations.append(env.step(action)[0])
+        snapshots = [observation.copy() for observation in observations]
+        for _ in range(3):
+            env.step(14)
+        for observation, snapshot in zip(observations, snapshots):
+            np.testing.assert_array_equal(observation, snapshot)
+
+        env = ThroneAndLibertyEnv(backend="synthetic", copy_observations=False)
+        self.addCleanup(env.close)
+        observation, _ = env.reset()
+        self.assertTrue(any(observation is buffer for buffer in env.hud_manager.observation_builder._buffers))
+
+    def test_paced_steps_flush_events_when_idle(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        env = ThroneAndLibertyEnv(backend="synthetic", control_hz=50,
+                                  step_events_path=os.path.join(temp_dir.name, "steps.jsonl"))
+        self.addCleanup(env.close)
+        env.reset()
+        for _ in range(5):
+            env.step(0)
+        env.step(0)  # Its wait runs the idle hook that writes the earlier steps' events
+        self.assertGreaterEqual(env.step_events.written, 5)
+
+        stats = env.get_pacing_stats(reset=True)
+        self.assertEqual(stats["ticks"], 5)
+        self.assertGreater(stats["idle_time"], 0)
+        self.assertEqual(env.get_pacing_stats()["ticks"], 0)
+        self.assertIsNone(ThroneAndLibertyEnv(backend="synthetic").get_pacing_stats())
+
 
 if __name__ == '__main__':
     unittest.main()
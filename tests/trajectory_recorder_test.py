@@ -0,0 +1,103 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from environments.reward_manager import REWARD_COMPONENTS
+from environments.throne_env import ThroneAndLibertyEnv
+from environments.trajectory_recorder import TrajectoryRecorder, TrajectoryReader
+
+
+class TestTrajectoryRecorder(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def _record(self, steps, **kwargs):
+        recorder = TrajectoryRecorder(ThroneAndLibertyEnv(backend="synthetic"), self.path, chunk_size=4, **kwargs)
+        recorder.reset()
+        observations = []
+        for step in range(steps):
+            observation, _, _, _, _ = recorder.step(12 if step == 0 else 7)  # find_target, then attack
+            observations.append(observation.copy())
+        recorder.close()
+        return recorder, observations
+
+    def test_round_trip(self):
+        _, observations = self._record(9)
+        reader = TrajectoryReader(self.path)
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(len(reader.chunks), 3)
+
+        steps = reader.steps()
+        self.assertEqual(steps["action"][0, 0], -1)
+        np.testing.assert_array_equal(steps["action"][1:3, 0], [12, 7])
+        np.testing.assert_array_equal(steps["step"], np.arange(10))
+        self.assertTrue((np.diff(steps["frame_id"]) == 1).all())
+        self.assertAlmostEqual(steps["target_health"][2], 0.95, delta=0.02)
+        survival = REWARD_COMPONENTS.index("survival_reward")
+        self.assertGreater(steps["components"][1, survival], 0)
+        np.testing.assert_array_equal(reader.frames(1, 10), observations)
+
+    def test_slices_within_a_chunk_are_views(self):
+        self._record(9)
+        reader = TrajectoryReader(self.path)
+        frames = reader.frames(4, 7)
+        self.assertIsInstance(frames.base, np.memmap)
+        self.assertFalse(frames.flags["WRITEABLE"])
+        parts = list(reader.iter_slices(2, 9))
+        self.assertEqual([(start, len(steps)) for start, steps, _ in parts], [(2, 2), (4, 4), (8, 1)])
+
+    def test_appends_episodes(self):
+        self._record(3)
+        self._record(2)
+        reader = TrajectoryReader(self.path)
+        self.assertEqual(reader.episodes(), [(0, 0, 4), (1, 4, 7)])
+
+    def test_raw_frames(self):
+        self._record(2, frames="raw")
+        reader = TrajectoryReader(self.path)
+        self.assertEqual(reader.frames().shape, (3, 1080, 1920, 4))
+        self.assertEqual(sorted(os.listdir(self.path))[-1], "index.json")
+
+    def test_slow_writer_blocks_instead_of_queueing(self):
+        write_chunk = TrajectoryRecorder._write_chunk
+
+        def slow_write_chunk(recorder, chunk, length):
+            time.sleep(0.02)
+            write_chunk(recorder, chunk, length)
+
+        with patch.object(TrajectoryRecorder, "_write_chunk", slow_write_chunk):
+            recorder = TrajectoryRecorder(ThroneAndLibertyEnv(backend="synthetic"), self.path, chunk_size=1,
+                                          max_pending_chunks=2)
+            recorder.reset()
+            for _ in range(8):
+                recorder.step(7)
+                self.assertLessEqual(recorder._write_queue.qsize(), 2)
+            recorder.close()
+        self.assertGreater(recorder.writer_stalls, 0)
+        self.assertEqual(len(TrajectoryReader(self.path)), 9)
+
+    def test_recycled_chunks_get_frames_once_the_shape_is_known(self):
+        recorder = TrajectoryRecorder(ThroneAndLibertyEnv(backend="synthetic"), self.path, frames="raw", chunk_size=4)
+        self.addCleanup(recorder.close)
+        recorder._free_chunks.put({"frames": None, "steps": np.zeros(4, dtype=recorder.dtype)})
+        recorder._set_frame_shape((1080, 1920, 4))
+        chunk = recorder._new_chunk()
+        self.assertEqual(chunk["frames"].shape, (recorder.chunk_size, 1080, 1920, 4))
+
+    def test_no_frames(self):
+        self._record(2, frames="none")
+        reader = TrajectoryReader(self.path)
+        self.assertFalse(reader.has_frames)
+        self.assertEqual(len(reader.steps()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
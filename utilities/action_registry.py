@@ -0,0 +1,224 @@
+# utilities/action_registry.py
+
+import logging
+from collections import namedtuple
+
+Action = namedtuple("Action", ["index", "name", "keys", "hold", "click", "group", "sequence"], defaults=(None,))
+Action.__doc__ = """
+A discrete action compiled to input primitives.
+
+Fields:
+    index (int): Position of the action in the action space.
+    name (str): Action name.
+    keys (tuple): Keys held down together for the action.
+    hold (float): Seconds the keys are held, or the total duration of a macro.
+    click (str or None): Mouse button clicked by the action.
+    group (str): Action class, e.g. "movement" or "skill".
+    sequence (tuple or None): For macros, timed (offset seconds, action index, hold seconds) steps.
+"""
+
+
+class ActionRegistry:
+    """
+    Maps discrete action indices to input primitives.
+
+    Actions are compiled once into a list indexed by action number, so the env
+    and the input layer look an action up by integer index. Name lookups are
+    only needed where actions are chosen by name (e.g. scripted movement).
+    """
+
+    def __init__(self, default_hold=0.1):
+        """
+        Initializes the ActionRegistry.
+
+        Args:
+            default_hold (float): Hold duration in seconds for actions registered without one.
+        """
+        self.default_hold = default_hold
+        self.actions = []
+        self.indices = {}
+
+    def register(self, name, keys=(), hold=None, click=None, group="other", sequence=None):
+        """
+        Adds an action at the next free index.
+
+        Args:
+            name (str): Action name.
+            keys (str or iterable): Key or keys held down together.
+            hold (float, optional): Seconds the keys are held. Defaults to default_hold.
+            click (str, optional): Mouse button to click, e.g. 'left'.
+            group (str): Action class used to configure per-class behaviour such as frame skip.
+            sequence (iterable, optional): Makes the action a macro of (offset seconds, action,
+                hold seconds or None) steps, where action is the index or name of a non-macro action.
+
+        Returns:
+            int: Index of the new action.
+        """
+        if name in self.indices:
+            raise ValueError(f"Action '{name}' is already registered.")
+        keys = (keys,) if isinstance(keys, str) else tuple(keys)
+        hold = self.default_hold if hold is None else hold
+        if sequence is not None:
+            sequence = tuple(sorted(self._compile_step(name, step) for step in sequence))
+            hold = max((offset + step_hold for offset, _, step_hold in sequence), default=0.0)
+        index = len(self.actions)
+        self.actions.append(Action(index, name, keys, hold, click, group, sequence))
+        self.indices[name] = index
+        return index
+
+    def _compile_step(self, name, step):
+        offset, action, hold = step
+        compiled = self.get(action)
+        if compiled is None or compiled.sequence is not None:
+            raise ValueError(f"Macro '{name}' step '{action}' is not a registered non-macro action.")
+        return (float(offset), compiled.index, compiled.hold if hold is None else float(hold))
+
+    def copy(self):
+        """
+        Returns a registry with the same actions that can be extended independently.
+        """
+        registry = ActionRegistry(self.default_hold)
+        registry.actions = list(self.actions)
+        registry.indices = dict(self.indices)
+        return registry
+
+    def __len__(self):
+        return len(self.actions)
+
+    def get(self, action):
+        """
+        Returns the compiled action for an index or name.
+
+        Args:
+            action (int or str): Action index or name.
+
+        Returns:
+            Action or None: The compiled action, or None if it is not registered.
+        """
+        if isinstance(action, str):
+            action = self.indices.get(action)
+            if action is None:
+                return None
+        try:
+            return self.actions[action] if action >= 0 else None
+        except (IndexError, TypeError):
+            return None
+
+    def index(self, name, default=None):
+        """
+        Returns the index of an action name.
+
+        Args:
+            name (str): Action name.
+            default (int, optional): Returned if the name is not registered.
+
+        Returns:
+            int: Action index.
+        """
+        index = self.indices.get(name)
+        if index is None:
+            logging.debug(f"Unknown action '{name}', using {default}.")
+            return default
+        return index
+
+    def name(self, index, default="unknown_action"):
+        """
+        Returns the name of an action index.
+
+        Args:
+            index (int): Action index.
+            default (str): Returned if the index is not registered.
+
+        Returns:
+            str: Action name.
+        """
+        action = self.get(index)
+        return default if action is None else action.name
+
+
+# Action passed to ThroneAndLibertyEnv.step() to advance one frame without sending input.
+# Being a plain action, it passes through Monitor and recording wrappers like any other step.
+IDLE_ACTION = -1
+
+# Actions in action-space order
+ACTION_REGISTRY = ActionRegistry()
+ACTION_REGISTRY.register("move_forward", 'w', group="movement")
+ACTION_REGISTRY.register("move_backward", 's', group="movement")
+ACTION_REGISTRY.register("move_left", 'a', group="movement")
+ACTION_REGISTRY.register("move_right", 'd', group="movement")
+ACTION_REGISTRY.register("jump", 'space', group="movement")
+ACTION_REGISTRY.register("camera_up", 'up', group="camera")  # Move camera angle up
+ACTION_REGISTRY.register("camera_down", 'down', group="camera")  # Move camera angle down
+ACTION_REGISTRY.register("attack", click='left', group="combat")  # Perform attack
+ACTION_REGISTRY.register("use_skill_1", '1', group="skill")  # Cast skill 1
+ACTION_REGISTRY.register("use_skill_2", '2', group="skill")  # Cast skill 2
+ACTION_REGISTRY.register("use_skill_3", '3', group="skill")  # Cast skill 3
+ACTION_REGISTRY.register("use_skill_4", '4', group="skill")  # Cast skill 4
+ACTION_REGISTRY.register("find_target", 'tab', group="utility")  # Tab to find a target
+ACTION_REGISTRY.register("camera_left", 'left', group="camera")  # Move camera angle left
+ACTION_REGISTRY.register("camera_right", 'right', group="camera")  # Move camera angle right
+ACTION_REGISTRY.register("interact", 'f', group="utility")  # Interact with objects
+
+
+class ActionHeads:
+    """
+    Factors actions into independent heads (e.g. movement x camera x ability) for a
+    MultiDiscrete action space. Choice 0 of every head is a no-op, and the chosen
+    actions of all heads are sent together as one chord.
+    """
+
+    def __init__(self, heads, registry=ACTION_REGISTRY):
+        """
+        Initializes the ActionHeads.
+
+        Args:
+            heads (sequence): (head name, sequence of action names) pairs. The no-op choice is
+                added in front of each head's actions.
+            registry (ActionRegistry): Registry the action names are looked up in.
+        """
+        self.names = [name for name, _ in heads]
+        self.tables = []
+        for head, action_names in heads:
+            indices = [registry.index(action_name) for action_name in action_names]
+            if None in indices:
+                raise ValueError(f"Unknown action in head '{head}': {list(action_names)}")
+            self.tables.append((-1,) + tuple(indices))
+        self.nvec = [len(table) for table in self.tables]
+
+    def index_of(self, head, choice):
+        """
+        Returns the action index of one head's choice.
+
+        Args:
+            head (int): Head position.
+            choice (int): Choice within the head.
+
+        Returns:
+            int or None: Action index, or None for the no-op or an invalid choice.
+        """
+        table = self.tables[head]
+        choice = int(choice)
+        if choice <= 0 or choice >= len(table):
+            return None
+        return table[choice]
+
+    def chord(self, action):
+        """
+        Resolves a MultiDiscrete action into the action indices to send together.
+
+        Args:
+            action (sequence): One choice per head.
+
+        Returns:
+            tuple: Action indices of the chord, without no-ops.
+        """
+        chord = (self.index_of(head, choice) for head, choice in enumerate(action))
+        return tuple(index for index in chord if index is not None)
+
+
+# Default factored action space
+DEFAULT_ACTION_HEADS = (
+    ("movement", ("move_forward", "move_backward", "move_left", "move_right", "jump")),
+    ("camera", ("camera_up", "camera_down", "camera_left", "camera_right")),
+    ("ability", ("attack", "use_skill_1", "use_skill_2", "use_skill_3", "use_skill_4", "find_target", "interact")),
+)
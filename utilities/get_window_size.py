@@ -1,5 +1,8 @@
 # utilities/get_window_size.py
-import pygetwindow as gw
+try:
+    import pygetwindow as gw
+except Exception:  # Unsupported platform or no display: only non-live backends are usable
+    gw = None
 import logging
 
 def get_game_window_size(window_title="TL 1.281.22.935"):
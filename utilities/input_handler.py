@@ -1,8 +1,20 @@
 # utilities/input_handler.py
-import pyautogui
+try:
+    import pyautogui
+except Exception:  # No display, e.g. on a headless box: only non-live backends are usable
+    pyautogui = None
+import heapq
+import itertools
+import queue
+import threading
 import time
 import logging
-import pygetwindow as gw
+try:
+    import pygetwindow as gw
+except Exception:  # Unsupported platform or no display: only non-live backends are usable
+    gw = None
+from utilities.action_registry import ACTION_REGISTRY
+from utilities.step_logging import ACTION_LOG
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
@@ -12,7 +24,7 @@ def press_key(key):
     """
     try:
         pyautogui.press(key)
-        logging.info(f"Pressed key: {key}")
+        ACTION_LOG.info("Pressed key: %s", key)
     except Exception as e:
         logging.error(f"Error pressing key {key}: {e}")
         raise
@@ -22,22 +34,66 @@ def hold_key(key, duration=1):
     Simulates holding a key for a duration.
     """
     try:
-        logging.info(f"Holding key: {key} for {duration}s")
+        ACTION_LOG.info("Holding key: %s for %ss", key, duration)
         pyautogui.keyDown(key)
         time.sleep(duration)
         pyautogui.keyUp(key)
-        logging.info(f"Released key: {key}")
+        ACTION_LOG.info("Released key: %s", key)
     except Exception as e:
         logging.error(f"Error holding key {key}: {e}")
         raise
 
-def perform_action(action_name, window_title="TL 1.281.22.935"):
+def send_action(action):
+    """
+    Presses a compiled action: holds its keys together and clicks its mouse button.
+
+    Args:
+        action (Action): Action from the ACTION_REGISTRY.
+    """
+    send_chord((action,))
+
+def send_chord(actions):
+    """
+    Presses several compiled actions at once and holds their keys for the longest hold.
+
+    Args:
+        actions (sequence): Actions from the ACTION_REGISTRY.
+    """
+    keys = [key for action in actions for key in action.keys]
+    for action in actions:
+        if action.click is not None:
+            pyautogui.click(button=action.click)
+    if keys:
+        for key in keys:
+            pyautogui.keyDown(key)
+        time.sleep(max(action.hold for action in actions if action.keys))  # Duration to hold the keys
+        for key in keys:
+            pyautogui.keyUp(key)
+
+def send_sequence(action, registry=ACTION_REGISTRY):
+    """
+    Plays a macro's timed steps, blocking until the last step is sent.
+
+    Args:
+        action (Action): Macro action with a sequence.
+        registry (ActionRegistry): Registry the macro's steps refer to.
+    """
+    start = time.perf_counter()
+    for offset, index, hold in action.sequence:
+        remaining = start + offset - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        send_chord((registry.get(index)._replace(hold=hold),))
+
+def perform_action(action_name, window_title="TL 1.281.22.935", registry=ACTION_REGISTRY):
     """
     Executes the specified action in the game window.
 
     Args:
-        action_name (str): The action to perform.
+        action_name (str, int or list): The action name or index to perform, or a list of
+            them to perform together as a chord.
         window_title (str): The title of the game window.
+        registry (ActionRegistry): Registry the actions are looked up in.
     """
     try:
         # Bring the game window to the foreground
@@ -51,48 +107,300 @@ def perform_action(action_name, window_title="TL 1.281.22.935"):
         window.activate()
         time.sleep(0.1)  # Allow some time for the window to activate
 
-        # Define action mappings
-        action_mappings = {
-            "move_forward": 'w',
-            "move_backward": 's',
-            "move_left": 'a',
-            "move_right": 'd',
-            "jump": 'space',
-            "camera_up": 'up',  # Move camera angle up
-            "camera_down": 'down',  # Move camera angle down
-            "camera_left": 'left',  # Move camera angle left
-            "camera_right": 'right',  # Move camera angle right
-            "attack": 'leftclick',  # Perform attack
-            "use_skill_1": '1',  # Cast skill 1
-            "use_skill_2": '2',  # Cast skill 2
-            "use_skill_3": '3',  # Cast skill 3
-            "use_skill_4": '4',  # Cast skill 4
-            "find_target": 'tab',  # Tab to find a target
-            "interact": 'f'  # Interact with objects
-        }
-
-        keys = action_mappings.get(action_name, None)
-        if keys is None:
+        names = action_name if isinstance(action_name, (list, tuple)) else [action_name]
+        actions = [registry.get(name) for name in names]
+        if None in actions:
             logging.warning(f"Unknown action '{action_name}'.")
             return
-
-        if isinstance(keys, list):
-            for key in keys:
-                if key == 'leftclick':
-                    pyautogui.click(button='left')
-                else:
-                    pyautogui.keyDown(key)
-            time.sleep(0.1)  # Duration to hold the keys
-            for key in keys:
-                if key != 'leftclick':
-                    pyautogui.keyUp(key)
-        else:
-            if keys == 'leftclick':
-                pyautogui.click(button='left')
-            else:
-                pyautogui.keyDown(keys)
-                time.sleep(0.1)
-                pyautogui.keyUp(keys)
+        for action in actions:
+            if action.sequence is not None:
+                send_sequence(action, registry)
+        send_chord([action for action in actions if action.sequence is None])
 
     except Exception as e:
         logging.error(f"Error performing action '{action_name}': {e}")
+
+
+class InputDispatcher:
+    """
+    Sends input to the game window from a background thread.
+
+    dispatch() only queues a command and returns immediately. The dispatcher
+    thread fires key-down and key-up events at their deadlines, keeps a key held
+    (instead of releasing and pressing it again) when the same action is repeated,
+    and only re-activates the game window when it has lost focus. Callers that
+    observe the game after an action use wait_until_pressed() to make sure its
+    keys are down first.
+    """
+
+    def __init__(self, window_title="TL 1.281.22.935", hold_duration=None, focus_check_interval=0.5,
+                 activation_delay=0.1, spin_threshold=0.002, registry=ACTION_REGISTRY):
+        """
+        Initializes the InputDispatcher.
+
+        Args:
+            window_title (str): The title of the game window.
+            hold_duration (float, optional): Seconds keys are held. Defaults to each action's hold.
+            focus_check_interval (float): Minimum seconds between focus checks.
+            activation_delay (float): Seconds after re-activating the window until focus is checked again.
+                Input is held until a check finds the window active.
+            spin_threshold (float): Remaining time below which the thread busy-waits for a deadline.
+            registry (ActionRegistry): Registry actions and macros are looked up in.
+        """
+        self.window_title = window_title
+        self.registry = registry
+        self.hold_duration = hold_duration
+        self.focus_check_interval = focus_check_interval
+        self.activation_delay = activation_delay
+        self.spin_threshold = spin_threshold
+
+        self._commands = queue.Queue()
+        self._events = []  # Heap of (deadline, sequence, kind, key)
+        self._sequence = itertools.count()
+        self._release_deadlines = {}  # Held key -> scheduled release deadline
+        self._window = None
+        self._pressed = threading.Condition()
+        self._dispatched_ticket = 0  # Ticket of the last dispatch() call
+        self._pressed_ticket = 0  # Ticket of the last dispatch whose first keys were sent
+        self._focused = False
+        self._next_focus_check = None  # Until then, the result of the last focus check is reused
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Counters
+        self.dispatched_count = 0
+        self.refocus_count = 0
+        self.max_lateness = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the dispatcher thread.
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="InputDispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Releases held keys and stops the dispatcher thread.
+
+        Args:
+            timeout (float): Seconds to wait for the thread to exit.
+        """
+        self._stop_event.set()
+        self._commands.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def dispatch(self, action, hold_duration=None, delay=0.0):
+        """
+        Queues an action without blocking.
+
+        Args:
+            action (int or str): Action index or name in the registry. Macros are expanded
+                into their timed steps.
+            hold_duration (float, optional): Seconds to hold the keys. Defaults to the dispatcher's
+                hold_duration, then the action's hold.
+            delay (float): Seconds from now until the keys are pressed.
+
+        Returns:
+            bool: True if the action was queued.
+        """
+        return self.dispatch_chord((action,), hold_duration=hold_duration, delay=delay)
+
+    def dispatch_chord(self, actions, hold_duration=None, delay=0.0):
+        """
+        Queues several actions to be pressed at the same moment, without blocking.
+
+        Args:
+            actions (sequence): Action indices or names in the registry.
+            hold_duration (float, optional): Seconds to hold the keys. Defaults to the dispatcher's
+                hold_duration, then each action's hold.
+            delay (float): Seconds from now until the keys are pressed.
+
+        Returns:
+            bool: True if every action was queued.
+        """
+        compiled = [self.registry.get(action) for action in actions]
+        if None in compiled:
+            logging.warning(f"Unknown action in {list(actions)}.")
+            return False
+        if not self.running:
+            self.start()
+        press_at = time.perf_counter() + delay
+        commands = []
+        for action in compiled:
+            if action.sequence is not None:
+                # Macro steps keep their own timing and holds
+                for offset, index, hold in action.sequence:
+                    commands.append((press_at + offset, self.registry.get(index), hold))
+                self.dispatched_count += 1
+                continue
+            hold = hold_duration
+            if hold is None:
+                hold = action.hold if self.hold_duration is None else self.hold_duration
+            commands.append((press_at, action, hold))
+            self.dispatched_count += 1
+        if commands:
+            # The earliest commands carry the ticket wait_until_pressed() waits for
+            self._dispatched_ticket += 1
+            first = min(command[0] for command in commands)
+            for command in commands:
+                self._commands.put(command + (self._dispatched_ticket if command[0] == first else None,))
+        return True
+
+    def wait_until_pressed(self, timeout=0.5):
+        """
+        Blocks until the first keys of the last dispatched action have been sent.
+
+        Args:
+            timeout (float): Maximum seconds to wait, e.g. while input is held for a lost focus.
+
+        Returns:
+            bool: True if the keys were sent, False on timeout.
+        """
+        with self._pressed:
+            return self._pressed.wait_for(lambda: self._pressed_ticket >= self._dispatched_ticket, timeout)
+
+    def _schedule(self, deadline, kind, key):
+        heapq.heappush(self._events, (deadline, next(self._sequence), kind, key))
+
+    def _handle_command(self, command):
+        press_at, action, hold_duration, _ = command
+        if action.click is not None:
+            self._schedule(press_at, "click", action.click)
+        release_at = press_at + hold_duration
+        for key in action.keys:
+            if key in self._release_deadlines:
+                # Already held: extend the hold instead of releasing and pressing again
+                self._release_deadlines[key] = max(self._release_deadlines[key], release_at)
+            else:
+                self._release_deadlines[key] = release_at
+                self._schedule(press_at, "down", key)
+            self._schedule(release_at, "up", key)
+
+    def _ensure_focus(self, now):
+        if self._next_focus_check is not None and now < self._next_focus_check:
+            if not self._focused:
+                self._hold_events(self._next_focus_check)
+            return self._focused
+
+        # Input is only sent once a check finds the game window active
+        self._focused = False
+        wait = self.focus_check_interval
+        try:
+            active_window = gw.getActiveWindow()
+            if active_window is not None and self.window_title in active_window.title:
+                self._focused = True
+            else:
+                if self._window is None:
+                    windows = gw.getWindowsWithTitle(self.window_title)
+                    if windows:
+                        self._window = windows[0]
+                    else:
+                        logging.error(f"No window found with title '{self.window_title}'.")
+                if self._window is not None:
+                    if self._window.isMinimized:
+                        self._window.restore()
+                    self._window.activate()
+                    self.refocus_count += 1
+                    logging.info(f"Re-focused game window '{self.window_title}'")
+                    # Check again once the window had time to activate
+                    wait = self.activation_delay
+        except Exception as e:
+            logging.error(f"Error focusing window '{self.window_title}': {e}")
+            self._window = None
+
+        self._next_focus_check = now + wait
+        if not self._focused:
+            self._hold_events(self._next_focus_check)
+        return self._focused
+
+    def _hold_events(self, until):
+        # Postpone pending input so it starts at `until`, keeping the relative timing of the events
+        if not self._events or self._events[0][0] >= until:
+            return
+        shift = until - self._events[0][0]
+        self._events = [(deadline + shift, seq, kind, key) for deadline, seq, kind, key in self._events]
+        heapq.heapify(self._events)
+        self._release_deadlines = {key: deadline + shift for key, deadline in self._release_deadlines.items()}
+
+    def _fire(self, kind, key, deadline, now):
+        if kind == "press":
+            self._handle_command(key)
+            return
+        if kind == "up" and self._release_deadlines.get(key, deadline) > deadline:
+            return  # Superseded by an extended hold
+        try:
+            if kind == "click":
+                pyautogui.click(button=key)
+            elif kind == "down":
+                pyautogui.keyDown(key)
+            else:
+                pyautogui.keyUp(key)
+                self._release_deadlines.pop(key, None)
+        except Exception as e:
+            logging.error(f"Error sending {kind} for key {key}: {e}")
+        self.max_lateness = max(self.max_lateness, now - deadline)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            timeout = None
+            if self._events:
+                timeout = max(self._events[0][0] - time.perf_counter() - self.spin_threshold, 0.0)
+            try:
+                command = self._commands.get(timeout=timeout)
+                if command is not None:
+                    # Expand the command when it is due, so holds are merged in time order
+                    self._schedule(command[0], "press", command)
+                continue
+            except queue.Empty:
+                pass
+
+            # Busy-wait the last moment for precise timing
+            while time.perf_counter() < self._events[0][0]:
+                pass
+
+            now = time.perf_counter()
+            if not self._ensure_focus(now):
+                continue
+            pressed_ticket = None
+            while self._events and self._events[0][0] <= now:
+                deadline, _, kind, key = heapq.heappop(self._events)
+                if kind == "press" and key[3] is not None:
+                    pressed_ticket = key[3]
+                self._fire(kind, key, deadline, now)
+            if pressed_ticket is not None:
+                # The command's key-down events were due now, so they have been sent in this loop
+                with self._pressed:
+                    self._pressed_ticket = max(self._pressed_ticket, pressed_ticket)
+                    self._pressed.notify_all()
+
+        # Release anything still held
+        for key in list(self._release_deadlines):
+            try:
+                pyautogui.keyUp(key)
+            except Exception as e:
+                logging.error(f"Error releasing key {key}: {e}")
+        self._release_deadlines.clear()
+        self._events.clear()
+
+    def get_stats(self):
+        """
+        Returns dispatcher counters.
+
+        Returns:
+            dict: Dispatched actions, focus recoveries and worst event lateness in milliseconds.
+        """
+        return {
+            "dispatched": self.dispatched_count,
+            "refocus": self.refocus_count,
+            "max_lateness_ms": self.max_lateness * 1000,
+        }
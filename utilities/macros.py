@@ -0,0 +1,56 @@
+# utilities/macros.py
+
+import json
+import logging
+
+
+def load_macros(path):
+    """
+    Loads macro definitions from a JSON file.
+
+    The file holds {"macros": [{"name": ..., "steps": [{"action": ..., "at_ms": ...,
+    "hold_ms": ...}]}]}, where each step's action is a registered action name, at_ms
+    is the step's offset from the start of the macro and hold_ms is optional.
+
+    Args:
+        path (str): Path to the JSON file.
+
+    Returns:
+        list: Macro definitions, or an empty list if the file could not be read.
+    """
+    try:
+        with open(path, "r") as f:
+            macros = json.load(f).get("macros", [])
+        logging.info(f"Loaded {len(macros)} macros from {path}")
+        return macros
+    except Exception as e:
+        logging.error(f"Error loading macros from {path}: {e}")
+        return []
+
+
+def register_macros(registry, macros):
+    """
+    Registers macro definitions as actions of a registry.
+
+    Args:
+        registry (ActionRegistry): Registry to add the macros to.
+        macros (list): Definitions as returned by load_macros().
+
+    Returns:
+        list: Indices of the registered macros. Invalid macros are skipped.
+    """
+    indices = []
+    for macro in macros:
+        try:
+            sequence = [
+                (
+                    step.get("at_ms", 0) / 1000.0,
+                    step["action"],
+                    step["hold_ms"] / 1000.0 if "hold_ms" in step else None,
+                )
+                for step in macro["steps"]
+            ]
+            indices.append(registry.register(macro["name"], group=macro.get("group", "macro"), sequence=sequence))
+        except (KeyError, TypeError, ValueError) as e:
+            logging.error(f"Skipping invalid macro {macro.get('name', macro) if isinstance(macro, dict) else macro}: {e}")
+    return indices
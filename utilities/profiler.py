@@ -0,0 +1,322 @@
+# utilities/profiler.py
+
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Module groups time is attributed to: group name -> (file name suffix, function name or None)
+DEFAULT_GROUPS = {
+    "hud_manager": ("hud_manager.py", None),
+    "reward_manager": ("reward_manager.py", None),
+    "input_handler": ("input_handler.py", None),
+    "frame_pipeline": ("frame_pipeline.py", None),
+    "screen_capture": ("screen_capture.py", None),
+    "sb3_rollout": ("ppo_recurrent.py", "collect_rollouts"),  # RecurrentPPO overrides OnPolicyAlgorithm's
+    "sb3_train": ("ppo_recurrent.py", "train"),
+}
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples every thread's Python stack from a daemon thread.
+
+    Sampling only reads interpreter frames, so the profiled code runs unmodified and
+    the overhead is set by the interval. Stacks are aggregated into counts of
+    collapsed stacks ("thread;file:function;...") as used by flamegraph tools.
+    """
+
+    def __init__(self, interval=0.005):
+        """
+        Initializes the SamplingProfiler.
+
+        Args:
+            interval (float): Seconds between samples.
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._labels = {}  # Code object -> frame label
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def sample(self):
+        """
+        Records the current stack of every thread except the profiler's own.
+        """
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self):
+        next_sample = time.perf_counter()
+        while not self._stop_event.is_set():
+            self.sample()
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                next_sample = time.perf_counter()  # Fell behind; do not burst
+
+    def start(self):
+        """
+        Starts sampling.
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling and waits for the sampling thread.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.duration += time.perf_counter() - self._start_time
+
+    def write_collapsed(self, path):
+        """
+        Writes the stacks in collapsed format, one "stack count" line each, for flamegraph.pl
+        or speedscope.
+
+        Args:
+            path (str): Output file.
+        """
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summarize(self, groups=DEFAULT_GROUPS, thread_name="MainThread"):
+        """
+        Attributes one thread's samples to module groups.
+
+        Args:
+            groups (dict): Group name -> (file name suffix, function name or None). A sample counts
+                for a group if any frame of its stack matches.
+            thread_name (str): Thread whose samples are summarized.
+
+        Returns:
+            dict: Group name -> {"samples", "fraction", "seconds"}, inclusive of callees.
+        """
+        prefix = thread_name + ";"
+        thread_samples = sum(count for stack, count in self.stacks.items() if stack.startswith(prefix))
+        summary = {}
+        for group, (file_suffix, function) in groups.items():
+            target = f"{file_suffix}:{function}" if function else file_suffix + ":"
+            count = 0
+            for stack, stack_count in self.stacks.items():
+                if not stack.startswith(prefix):
+                    continue
+                frames = stack.split(";")
+                if function:
+                    matched = target in frames
+                else:
+                    matched = any(frame.startswith(target) for frame in frames)
+                if matched:
+                    count += stack_count
+            summary[group] = {
+                "samples": count,
+                "fraction": count / thread_samples if thread_samples else 0.0,
+                "seconds": count / self.samples * self.duration if self.samples else 0.0,
+            }
+        return summary
+
+
+class AllocationTracker:
+    """
+    Traces allocations with tracemalloc and compares snapshots against a baseline
+    taken at start().
+
+    A snapshot only holds memory that is still allocated, so buffers that live
+    for part of a step are missed by a single snapshot at the end. Snapshots are
+    therefore also taken from a daemon thread every `interval` seconds, and each
+    site's largest growth over the baseline is kept as its peak.
+    """
+
+    def __init__(self, interval=0.05):
+        """
+        Initializes the AllocationTracker.
+
+        Args:
+            interval (float or None): Seconds between snapshots during the run. None only compares
+                the snapshot taken by stop().
+        """
+        self.interval = interval
+        self.peaks = {}  # (file, line) -> largest size growth seen in any snapshot
+        self.final = {}  # (file, line) -> (size growth, block growth) at stop()
+        self.snapshots = 0
+        self._baseline = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def sample(self):
+        """
+        Compares a snapshot with the baseline and updates the peaks.
+
+        Returns:
+            list: tracemalloc.StatisticDiff of each site, largest growth first.
+        """
+        stats = self._snapshot().compare_to(self._baseline, "lineno")
+        for stat in stats:
+            frame = stat.traceback[0]
+            key = (frame.filename, frame.lineno)
+            if stat.size_diff > self.peaks.get(key, 0):
+                self.peaks[key] = stat.size_diff
+        self.snapshots += 1
+        return stats
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        """
+        Starts tracing and takes the baseline snapshot.
+        """
+        if self._baseline is not None:
+            return
+        tracemalloc.start()
+        self._baseline = self._snapshot()
+        if self.interval:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="AllocationTracker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the snapshot thread, takes the final snapshot and stops tracing.
+        """
+        if self._baseline is None:
+            return
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        for stat in self.sample():
+            frame = stat.traceback[0]
+            self.final[(frame.filename, frame.lineno)] = (stat.size_diff, stat.count_diff)
+        self._baseline = None
+        tracemalloc.stop()
+
+    def format(self, top=25):
+        """
+        Formats the allocation sites that grew the most.
+
+        Args:
+            top (int): Number of sites listed.
+
+        Returns:
+            str: One line per site with its peak growth, its growth still allocated at stop() and
+                the blocks behind it, and its source line.
+        """
+        lines = [f"{self.snapshots} snapshots; peak and end growth over the start of the run:"]
+        for (filename, lineno), peak in sorted(self.peaks.items(), key=lambda item: -item[1])[:top]:
+            size, count = self.final.get((filename, lineno), (0, 0))
+            lines.append(f"{peak / 1024:10.1f} KiB peak {size / 1024:10.1f} KiB end {count:8d} blocks  "
+                         f"{filename}:{lineno}")
+        return "\n".join(lines)
+
+
+class ProfileSession:
+    """
+    Context manager that runs a block under the sampling profiler and, optionally,
+    tracemalloc, then writes the results to a directory:
+
+    - profile.collapsed: collapsed stacks for flamegraphs.
+    - profile_summary.txt: time attributed to the module groups.
+    - allocations.txt: allocation sites that grew the most during the block.
+    """
+
+    def __init__(self, output_dir, interval=0.005, allocations=True, top_allocations=25, groups=DEFAULT_GROUPS,
+                 allocation_interval=0.05):
+        """
+        Initializes the ProfileSession.
+
+        Args:
+            output_dir (str): Directory the results are written to.
+            interval (float): Seconds between stack samples.
+            allocations (bool): Whether to trace allocations with tracemalloc.
+            top_allocations (int): Allocation sites listed.
+            groups (dict): Module groups for the summary (see SamplingProfiler.summarize()).
+            allocation_interval (float or None): Seconds between allocation snapshots
+                (see AllocationTracker).
+        """
+        self.output_dir = output_dir
+        self.profiler = SamplingProfiler(interval=interval)
+        self.allocations = AllocationTracker(allocation_interval) if allocations else None
+        self.top_allocations = top_allocations
+        self.groups = groups
+
+    def __enter__(self):
+        if self.allocations is not None:
+            self.allocations.start()
+        self.profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.stop()
+        if self.allocations is not None:
+            self.allocations.stop()
+        try:
+            self.write()
+        except Exception as e:
+            logging.error(f"Error writing profile to {self.output_dir}: {e}")
+        return False
+
+    def write(self):
+        """
+        Writes the profile files.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        profiler = self.profiler
+        profiler.write_collapsed(os.path.join(self.output_dir, "profile.collapsed"))
+
+        lines = [f"{profiler.samples} samples over {profiler.duration:.1f} s "
+                 f"(interval {profiler.interval * 1000:.1f} ms), main thread, inclusive:"]
+        for group, stats in sorted(profiler.summarize(self.groups).items(), key=lambda item: -item[1]["samples"]):
+            lines.append(f"  {group:16s} {stats['fraction'] * 100:6.1f} %  {stats['seconds']:8.2f} s")
+        summary = "\n".join(lines)
+        with open(os.path.join(self.output_dir, "profile_summary.txt"), "w") as f:
+            f.write(summary + "\n")
+        logging.info(f"Profile summary:\n{summary}")
+
+        if self.allocations is not None:
+            with open(os.path.join(self.output_dir, "allocations.txt"), "w") as f:
+                f.write(self.allocations.format(top=self.top_allocations) + "\n")
+        logging.info(f"Profile written to {self.output_dir}")
@@ -1,10 +1,19 @@
 # utilities/screen_capture.py
 import cv2
 import numpy as np
-import pyautogui
+try:
+    import pyautogui
+except Exception:  # No display, e.g. on a headless box: only non-live backends are usable
+    pyautogui = None
 from mss import mss
 import logging
-import pygetwindow as gw
+import threading
+import time
+try:
+    import pygetwindow as gw
+except Exception:  # Unsupported platform or no display: only non-live backends are usable
+    gw = None
+from utilities.step_logging import FRAME_LOG
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,10 +40,354 @@ def capture_screen(window_title=None):
                 raise ValueError(f"Window titled '{window_title}' not found.")
             with mss() as sct:
                 screen = np.array(sct.grab(region))
-                logging.info(f"Captured screen of {window_title}")
+                FRAME_LOG.info("Captured screen of %s", window_title)
                 return screen
         else:
             return np.array(pyautogui.screenshot())
     except Exception as e:
         logging.error(f"Error capturing screen: {e}")
         return None
+
+
+class ScreenCapturer:
+    """
+    Long-lived capture session that keeps a single grab handle and caches the
+    game window geometry between frames.
+
+    The window rectangle is only re-queried when a grab fails or when
+    invalidate() / on_resize() is called. Geometry listeners are notified with the
+    new (width, height) whenever the captured size changes.
+
+    Note: mss handles are not thread-safe, so a capturer must be used from the
+    thread that performs the grabs.
+    """
+
+    def __init__(self, window_title=None):
+        """
+        Initializes the ScreenCapturer.
+
+        Args:
+            window_title (str, optional): Title of the window to capture. If None, the
+                primary monitor is captured.
+        """
+        self.window_title = window_title
+        self.region = None
+        self.size = None
+        self.geometry_listeners = []
+        self._sct = None
+
+        # Grab timing statistics
+        self.grab_count = 0
+        self.failure_count = 0
+        self.geometry_queries = 0
+        self.last_grab_time = 0.0
+        self.total_grab_time = 0.0
+        self.max_grab_time = 0.0
+
+    def _get_handle(self):
+        if self._sct is None:
+            self._sct = mss()
+        return self._sct
+
+    def _query_region(self):
+        self.geometry_queries += 1
+        if self.window_title:
+            return get_game_region(self.window_title)
+        return dict(self._get_handle().monitors[1])
+
+    def add_geometry_listener(self, listener):
+        """
+        Registers a callback invoked with (width, height) when the captured size changes.
+
+        Args:
+            listener (callable): Callback taking the new (width, height) tuple.
+        """
+        self.geometry_listeners.append(listener)
+
+    def _set_region(self, region):
+        self.region = dict(region) if region else None
+        if not self.region:
+            return
+        size = (self.region["width"], self.region["height"])
+        if size != self.size:
+            previous_size, self.size = self.size, size
+            if previous_size is not None:
+                logging.info(f"Capture size changed from {previous_size} to {size}")
+            for listener in self.geometry_listeners:
+                try:
+                    listener(size)
+                except Exception as e:
+                    logging.error(f"Error in geometry listener: {e}")
+
+    def invalidate(self):
+        """
+        Drops the cached window geometry so it is re-queried on the next grab.
+        """
+        self.region = None
+
+    def on_resize(self, region=None):
+        """
+        Handles a window resize or move event.
+
+        Args:
+            region (dict, optional): New capture region with 'top', 'left', 'width' and
+                'height'. If None, the geometry is re-queried on the next grab.
+        """
+        self._set_region(region)
+        logging.info(f"Capture region updated: {self.region}")
+
+    def grab(self):
+        """
+        Grabs a frame of the cached capture region.
+
+        Returns:
+            np.ndarray or None: Captured BGRA frame, or None if the capture failed.
+        """
+        start = time.perf_counter()
+        for attempt in range(2):
+            try:
+                if self.region is None:
+                    self._set_region(self._query_region())
+                    if not self.region:
+                        raise ValueError(f"Window titled '{self.window_title}' not found.")
+                screen = np.asarray(self._get_handle().grab(self.region))
+                self._record_grab(time.perf_counter() - start)
+                return screen
+            except Exception as e:
+                # The window may have moved, resized or closed; re-query once before giving up
+                logging.debug(f"Grab attempt {attempt + 1} failed: {e}")
+                self.invalidate()
+
+        self.failure_count += 1
+        logging.error(f"Error capturing screen of {self.window_title}")
+        return None
+
+    def _record_grab(self, duration):
+        self.grab_count += 1
+        self.last_grab_time = duration
+        self.total_grab_time += duration
+        self.max_grab_time = max(self.max_grab_time, duration)
+
+    def get_timing_stats(self):
+        """
+        Returns grab timing statistics.
+
+        Returns:
+            dict: Grab counts and timings in milliseconds.
+        """
+        mean_grab_time = self.total_grab_time / self.grab_count if self.grab_count else 0.0
+        return {
+            "grabs": self.grab_count,
+            "failures": self.failure_count,
+            "geometry_queries": self.geometry_queries,
+            "last_ms": self.last_grab_time * 1000,
+            "mean_ms": mean_grab_time * 1000,
+            "max_ms": self.max_grab_time * 1000,
+        }
+
+    def close(self):
+        """
+        Releases the grab handle.
+        """
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+
+class BackgroundCapturer:
+    """
+    Captures frames continuously on a daemon thread into a small preallocated
+    ring buffer, so that capture overlaps with input instead of running after it.
+
+    The reader always receives the newest frame. The slot it receives is held
+    until the next call to latest_frame(), and the capture thread never writes
+    into the held or the newest slot, so frames are handed out without copying.
+    """
+
+    def __init__(self, window_title=None, target_fps=30, ring_size=3, max_staleness=0.1, capturer_factory=None):
+        """
+        Initializes the BackgroundCapturer.
+
+        Args:
+            window_title (str, optional): Title of the window to capture.
+            target_fps (float): Target capture rate of the background thread.
+            ring_size (int): Number of preallocated frame slots (at least 3).
+            max_staleness (float): Maximum age in seconds of a frame returned by latest_frame().
+            capturer_factory (callable, optional): Creates the capture backend on the capture thread.
+                Defaults to a ScreenCapturer of window_title.
+        """
+        if ring_size < 3:
+            raise ValueError("ring_size must be at least 3")
+        if target_fps <= 0:
+            raise ValueError("target_fps must be positive")
+
+        self.window_title = window_title
+        self.target_fps = target_fps
+        self.ring_size = ring_size
+        self.max_staleness = max_staleness
+        self.capturer_factory = capturer_factory
+
+        self._frames = [None] * ring_size
+        self._timestamps = [0.0] * ring_size
+        self._sequences = [-1] * ring_size
+        self._latest_slot = -1
+        self._held_slot = -1
+        self._write_slot = -1
+        self._next_sequence = 0
+        self._last_consumed_sequence = -1
+
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.capturer = None
+        self.geometry_listeners = []
+
+        # Counters
+        self.captured_count = 0
+        self.consumed_count = 0
+        self.dropped_count = 0
+        self.stale_count = 0
+        self.overrun_count = 0
+
+    def add_geometry_listener(self, listener):
+        """
+        Registers a callback invoked from the capture thread with (width, height)
+        when the captured size changes.
+
+        Args:
+            listener (callable): Callback taking the new (width, height) tuple.
+        """
+        self.geometry_listeners.append(listener)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the capture thread.
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="BackgroundCapturer", daemon=True)
+        self._thread.start()
+        logging.info(f"Background capture started at {self.target_fps} FPS")
+
+    def stop(self, timeout=1.0):
+        """
+        Stops the capture thread.
+
+        Args:
+            timeout (float): Seconds to wait for the thread to exit.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        # The grab handle must be created on the thread that uses it
+        if self.capturer_factory is not None:
+            self.capturer = self.capturer_factory()
+        else:
+            self.capturer = ScreenCapturer(window_title=self.window_title)
+        self.capturer.geometry_listeners = self.geometry_listeners
+        interval = 1.0 / self.target_fps
+        next_tick = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                timestamp = time.perf_counter()
+                screen = self.capturer.grab()
+                if screen is not None:
+                    self._store(screen, timestamp)
+
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    self.overrun_count += 1
+                    next_tick = time.perf_counter()
+        finally:
+            self.capturer.close()
+
+    def _store(self, screen, timestamp):
+        with self._condition:
+            slot = self._write_slot
+            for _ in range(self.ring_size):
+                slot = (slot + 1) % self.ring_size
+                if slot != self._latest_slot and slot != self._held_slot:
+                    break
+            self._write_slot = slot
+
+        buffer = self._frames[slot]
+        if buffer is None or buffer.shape != screen.shape:
+            buffer = self._frames[slot] = np.empty_like(screen)
+        np.copyto(buffer, screen)
+
+        with self._condition:
+            latest = self._latest_slot
+            if latest >= 0 and self._sequences[latest] > self._last_consumed_sequence:
+                self.dropped_count += 1  # Superseded before it was ever read
+            self._timestamps[slot] = timestamp
+            self._sequences[slot] = self._next_sequence
+            self._next_sequence += 1
+            self._latest_slot = slot
+            self.captured_count += 1
+            self._condition.notify_all()
+
+    def latest_frame(self, after=None, timeout=None):
+        """
+        Returns the newest captured frame, waiting for one if necessary.
+
+        The returned array is a view into the ring buffer and stays valid until
+        the next call to latest_frame().
+
+        Args:
+            after (float, optional): time.perf_counter() value the frame must be captured after,
+                e.g. the time an action was sent.
+            timeout (float, optional): Seconds to wait for a suitable frame. Defaults to max_staleness.
+
+        Returns:
+            tuple: (frame, timestamp), or (None, None) if no suitable frame arrived in time.
+        """
+        now = time.perf_counter()
+        not_before = now - self.max_staleness
+        if after is not None:
+            not_before = max(not_before, after)
+        deadline = now + (self.max_staleness if timeout is None else timeout)
+
+        with self._condition:
+            self._held_slot = -1  # Release the previously returned slot
+            while True:
+                slot = self._latest_slot
+                if slot >= 0 and self._timestamps[slot] >= not_before:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or self._stop_event.is_set():
+                    self.stale_count += 1
+                    return None, None
+                self._condition.wait(remaining)
+
+            self._held_slot = slot
+            self._last_consumed_sequence = self._sequences[slot]
+            self.consumed_count += 1
+            return self._frames[slot], self._timestamps[slot]
+
+    def get_stats(self):
+        """
+        Returns capture counters.
+
+        Returns:
+            dict: Captured, consumed, dropped, stale and overrun frame counts.
+        """
+        return {
+            "captured": self.captured_count,
+            "consumed": self.consumed_count,
+            "dropped": self.dropped_count,
+            "stale": self.stale_count,
+            "overruns": self.overrun_count,
+        }
@@ -0,0 +1,211 @@
+# utilities/step_logging.py
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+# Per-step log categories. Hot-path modules log through these loggers with %-style
+# arguments, so sampled-out and disabled records are never formatted.
+ACTION_LOG = logging.getLogger("step.action")
+FRAME_LOG = logging.getLogger("step.frame")
+HUD_LOG = logging.getLogger("step.hud")
+REWARD_LOG = logging.getLogger("step.reward")
+COMBAT_LOG = logging.getLogger("step.combat")
+
+# Fraction of records kept per logger name prefix; loggers not listed keep everything
+DEFAULT_SAMPLE_RATES = {
+    "step.action": 0.01,
+    "step.frame": 0.01,
+    "step.hud": 0.01,
+    "step.reward": 0.01,
+    "step.combat": 0.1,
+}
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fixed fraction of the records of each category.
+
+    The category of a record is the longest configured prefix of its logger name.
+    Sampling is deterministic: with rate r, the n-th record of a category is kept when
+    int(n * r) increases, e.g. every 100th record for r=0.01. Warnings and errors are
+    always kept.
+    """
+
+    def __init__(self, sample_rates=DEFAULT_SAMPLE_RATES):
+        """
+        Initializes the SamplingFilter.
+
+        Args:
+            sample_rates (dict): Logger name prefix -> fraction of records kept, in [0, 1].
+        """
+        super().__init__()
+        self.sample_rates = dict(sample_rates)
+        self._counts = {}
+        self._categories = {}  # Logger name -> category, or None if not sampled
+
+    def _category(self, name):
+        category = self._categories.get(name, False)
+        if category is False:
+            matches = [prefix for prefix in self.sample_rates if name == prefix or name.startswith(prefix + ".")]
+            category = max(matches, key=len) if matches else None
+            self._categories[name] = category
+        return category
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        category = self._category(record.name)
+        if category is None:
+            return True
+        count = self._counts.get(category, 0) + 1
+        self._counts[category] = count
+        rate = self.sample_rates[category]
+        return int(count * rate) > int((count - 1) * rate)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that hands records to the listener thread unformatted.
+
+    The standard QueueHandler formats each message in the logging thread; here the
+    message and its arguments are formatted by the listener's handlers instead, so
+    the step loop only pays for creating the record and queueing it. Arguments must
+    not be mutated after logging.
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            # Tracebacks refer to frames that may be gone by the time the listener runs
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def configure_logging(level=logging.INFO, log_file="training.log", console=True, sample_rates=DEFAULT_SAMPLE_RATES):
+    """
+    Routes all logging through a queue to a background listener thread.
+
+    Replaces the root logger's handlers with a LazyQueueHandler that samples the
+    per-step categories. A QueueListener writes the records to the log file and the
+    console.
+
+    Args:
+        level (int or str): Root log level.
+        log_file (str, optional): Human-readable log file. Not written if None.
+        console (bool): Whether to also log to stdout.
+        sample_rates (dict): Logger name prefix -> fraction of records kept (see SamplingFilter).
+
+    Returns:
+        logging.handlers.QueueListener: Running listener. Call stop() at exit to write the
+            remaining records.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if log_file is not None:
+        handlers.append(logging.FileHandler(log_file))
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class StepEventStream:
+    """
+    Compact JSONL stream of per-step events, separate from the human-readable log.
+
+    emit() only queues the event; events are serialized and written in batches by a
+    background thread every `flush_interval` seconds, and by every flush() call. With
+    paced steps, ThroneAndLibertyEnv registers flush() as a StepPacer idle hook so the
+    writes happen in the slack before each control tick.
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        """
+        Initializes the StepEventStream.
+
+        Args:
+            path (str): JSONL file events are appended to.
+            flush_interval (float, optional): Seconds between background writes. If None, no
+                thread is started and events are written by flush().
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.emitted = 0
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+        self._stop_event = threading.Event()
+        self._thread = None
+        if flush_interval is not None:
+            self._thread = threading.Thread(target=self._run, name="StepEventStream", daemon=True)
+            self._thread.start()
+
+    def emit(self, event):
+        """
+        Queues an event.
+
+        Args:
+            event (dict): JSON-serializable event. It must not be mutated afterwards.
+        """
+        self._queue.put(event)
+        self.emitted += 1
+
+    def flush(self):
+        """
+        Writes all queued events.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            lines = []
+            while True:
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    lines.append(json.dumps(event, separators=(",", ":"), default=float))
+                except (TypeError, ValueError) as e:
+                    logging.error(f"Error serializing step event: {e}")
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+                self.written += len(lines)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """
+        Stops the background thread, writes the remaining events and closes the file.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            self._file.close()